@@ -0,0 +1,513 @@
+import numpy as np
+from functools import cached_property
+from math import comb, erfc, sqrt
+
+from channels import AwgnChannel, FadingChannel
+from codes import get_code
+from crc import get_crc
+
+NUM_BITS = 64  # Data bits per packet
+polynomial = "CRC3"  # Same 3-bit CRC as sender.py / receiver.py
+# First-transmission BLER NackHistoryPolicy aims for. With Chase combining a
+# failed first transmission is not wasted, so goodput peaks well above the
+# 10% usual without HARQ.
+TARGET_BLER = 0.3
+# Highest predicted rate of first transmissions that pass the 3-bit CRC with
+# wrong data a policy accepts for a level (about that of the fixed scheme at
+# 6 dB); goodput alone favours weak levels whose errors the CRC mostly misses.
+MAX_UNDETECTED = 1e-3
+NUM_LINKS = 200  # Links simulated side by side per policy and SNR point
+NUM_SLOTS = 500  # Transmissions per link
+SNR_GRID_DB = np.arange(-10.0, 30.0, 0.05)  # Es/N0 grid of the SyndromePolicy lookup tables
+MAX_OFFSET_DB = 10.0  # Bound of the SyndromePolicy outer-loop correction
+
+
+# --- MCS table ---
+class Mcs:
+    """
+    One modulation and coding scheme.
+
+    The NUM_BITS data bits are split into codewords of the codes.py registry
+    code `code_name` (None sends them uncoded), the CRC of the data is appended
+    uncoded as in sender.encode_packet, and the result is sent with
+    `modulation`. max_transmission is the retransmission limit that goes with
+    this level.
+    """
+    BITS_PER_SYMBOL = {"bpsk": 1, "qpsk": 2}
+
+    def __init__(self, modulation, code_name=None, max_transmission=4, polynomial=polynomial):
+        if modulation not in self.BITS_PER_SYMBOL:
+            raise ValueError(f"Unsupported modulation {modulation!r}")
+        self.modulation = modulation
+        self.bits_per_symbol = self.BITS_PER_SYMBOL[modulation]
+        self.code_name = code_name
+        self.max_transmission = max_transmission
+        self.crc = get_crc(polynomial)
+
+    def __repr__(self):
+        return f"Mcs({self.name}, max_transmission={self.max_transmission})"
+
+    @property
+    def name(self):
+        return f"{self.modulation.upper()} {self.code_name or 'uncoded'}"
+
+    # Codes are built on first use, so importing the table is cheap
+    @cached_property
+    def code(self):
+        return None if self.code_name is None else get_code(self.code_name)
+
+    @cached_property
+    def segments(self):
+        k = NUM_BITS if self.code is None else self.code.k
+        if NUM_BITS % k:
+            raise ValueError(f"{self.code_name} carries {k} data bits, which does not divide {NUM_BITS}")
+        return NUM_BITS // k
+
+    @cached_property
+    def coded_bits(self):
+        return NUM_BITS if self.code is None else self.segments * self.code.n
+
+    @cached_property
+    def miscorrection(self):
+        """Share of nonzero syndromes the decoder corrects (1 if uncoded: every error goes through)."""
+        if self.code is None:
+            return 1.0
+        return np.count_nonzero(self.code.correctable[1:]) / (len(self.code.correctable) - 1)
+
+    @cached_property
+    def _error_weights(self):
+        # Bits flipped by the decoder per syndrome; t + 1 for uncorrectable ones
+        weights = np.count_nonzero(np.unpackbits(self.code.error_table, axis=1), axis=1)
+        return np.where(self.code.correctable, weights, self.code.t + 1)
+
+    @property
+    def tx_bits(self):
+        return self.coded_bits + self.crc.width
+
+    @property
+    def symbols(self):
+        """Channel symbols per transmission."""
+        return -(-self.tx_bits // self.bits_per_symbol)
+
+    @property
+    def efficiency(self):
+        """Data bits per channel symbol of an error-free first transmission."""
+        return NUM_BITS / self.symbols
+
+    def encode(self, data):
+        """Encode (N, NUM_BITS) (or (NUM_BITS,)) data into (N, tx_bits) transmit bits."""
+        data = np.asarray(data, dtype=np.uint8)
+        squeeze = data.ndim == 1
+        data = np.atleast_2d(data)
+        coded = data if self.code is None else self.code.encode(data.reshape(-1, self.code.k))
+        tx = np.concatenate((coded.reshape(len(data), -1), self.crc.compute_batch(data)), axis=1)
+        return tx[0] if squeeze else tx
+
+    def decode(self, bits):
+        """
+        Decode (N, tx_bits) hard bits.
+
+        Returns:
+            (data with the received CRC appended, valid mask, corrected bits).
+            valid is False if any codeword had an uncorrectable syndrome; such
+            codewords count as code.t + 1 corrected bits, a lower bound on
+            their errors.
+        """
+        bits = np.atleast_2d(np.asarray(bits, dtype=np.uint8))
+        crc_bits = bits[:, self.coded_bits:]
+        if self.code is None:
+            return bits.copy(), np.ones(len(bits), dtype=bool), np.zeros(len(bits), dtype=np.int64)
+        code = self.code
+        packed = np.packbits(bits[:, :self.coded_bits].reshape(-1, code.n), axis=1)
+        corrected, syndrome, valid = code.decode_packed(packed)
+        corrections = self._error_weights[syndrome].reshape(len(bits), -1).sum(axis=1)
+        data = code.extract_data(np.unpackbits(corrected, axis=1, count=code.n)).reshape(len(bits), -1)
+        valid = valid.reshape(len(bits), -1).all(axis=1)
+        return np.concatenate((data, crc_bits), axis=1), valid, corrections
+
+
+# Ordered from the most robust to the most efficient level. DEFAULT_MCS is the
+# fixed scheme of sender.py (BPSK, Hamming(71,64), MAX_TRANSMISSION = 4).
+MCS_TABLE = (
+    Mcs("bpsk", "BCH(31,16)", max_transmission=4),
+    Mcs("bpsk", "BCH(78,64)", max_transmission=4),
+    Mcs("bpsk", "Hamming(71,64)", max_transmission=4),
+    Mcs("qpsk", "BCH(78,64)", max_transmission=3),
+    Mcs("qpsk", "Hamming(71,64)", max_transmission=3),
+    Mcs("qpsk", None, max_transmission=2),
+)
+DEFAULT_MCS = 2
+
+
+def get_mcs(index, table=MCS_TABLE):
+    if not 0 <= index < len(table):
+        raise ValueError(f"Unknown MCS index {index}")
+    return table[index]
+
+
+# --- Link adaptation policies ---
+# A policy tracks num_links links. select(links) returns the MCS index for the
+# next new packet of each link; update(links, mcs, ack, attempts, corrections)
+# feeds back the outcome of one transmission per link: the MCS it used,
+# whether it was ACKed, which attempt it was and the corrected bits the
+# receiver reported. Both take an index or an index array, so one policy
+# object serves a single socket link (link 0) or a whole batch of simulated
+# links. Retransmission limits come with the MCS level (Mcs.max_transmission).
+class FixedPolicy:
+    """Always the same MCS level (by default the fixed scheme of sender.py)."""
+
+    def __init__(self, num_links=1, mcs=DEFAULT_MCS, table=MCS_TABLE):
+        self.num_links = num_links
+        self.table = table
+        self.mcs = mcs
+
+    def select(self, links):
+        return np.full(np.shape(links), self.mcs, dtype=np.intp)
+
+    def update(self, links, mcs, ack, attempts, corrections):
+        pass
+
+
+class NackHistoryPolicy(FixedPolicy):
+    """
+    Outer-loop link adaptation on the ACK/NACK history of first transmissions.
+
+    Every link has a fractional MCS offset that goes up by step * target_bler
+    on an ACK and down by step * (1 - target_bler) on a NACK, and uses the
+    level floor(offset). The offset settles where the first-transmission BLER
+    equals target_bler; a NACK costs as much as (1 - target) / target ACKs, so
+    a run of NACKs drops the level at once while climbing back takes a
+    sustained run of ACKs.
+
+    The target is lowered per level to the predicted BLER at the Es/N0 where
+    predicted_undetected() falls to max_undetected, so a level is only kept
+    where its CRC misses few enough wrong packets.
+    """
+
+    def __init__(self, num_links=1, target_bler=TARGET_BLER, step=0.5, initial=DEFAULT_MCS, table=MCS_TABLE,
+                 max_undetected=MAX_UNDETECTED):
+        super().__init__(num_links, initial, table)
+        self.target_bler = target_bler
+        self.max_undetected = max_undetected
+        self.step = step
+        self.offset = np.full(num_links, initial + 0.5)
+        self.targets = np.array([min(target_bler, float(predicted_bler(mcs, _safe_snr_db(mcs, max_undetected))))
+                                 for mcs in table])
+
+    def select(self, links):
+        return np.floor(self.offset[links]).astype(np.intp)
+
+    def update(self, links, mcs, ack, attempts, corrections):
+        first = np.atleast_1d(attempts) == 1
+        links, ack = np.atleast_1d(links)[first], np.atleast_1d(ack)[first]
+        target = self.targets[np.atleast_1d(mcs)[first]]
+        delta = np.where(ack, self.step * target, -self.step * (1 - target))
+        np.add.at(self.offset, links, delta)
+        np.clip(self.offset, 0, len(self.table) - 1e-9, out=self.offset)
+
+
+def _bpsk_ber(SNR_dB):
+    SNR_dB = np.asarray(SNR_dB, dtype=np.float64)
+    return np.array([0.5 * erfc(sqrt(10 ** (s / 10))) for s in SNR_dB.ravel()]).reshape(SNR_dB.shape)
+
+
+def predicted_bler(mcs, SNR_dB):
+    """
+    First-transmission BLER of an Mcs over AWGN at Es/N0 = SNR_dB, assuming
+    bounded-distance decoding (a codeword fails with more than t errors) and
+    that any error in the uncoded CRC fails the packet.
+    """
+    p = _bpsk_ber(np.asarray(SNR_dB) - 10 * np.log10(mcs.bits_per_symbol))
+    if mcs.code is None:
+        return 1 - (1 - p) ** mcs.tx_bits
+    n, t = mcs.code.n, mcs.code.t
+    codeword_ok = sum(comb(n, i) * p ** i * (1 - p) ** (n - i) for i in range(t + 1))
+    return 1 - codeword_ok ** mcs.segments * (1 - p) ** mcs.crc.width
+
+
+def predicted_undetected(mcs, SNR_dB):
+    """
+    Probability that a first transmission of an Mcs over AWGN at Es/N0 =
+    SNR_dB passes the CRC with wrong data: a codeword with more than t errors
+    is miscorrected (with the code's miscorrection share) or, uncoded, any
+    data bit is wrong, and the uncoded CRC then passes with the random-error
+    probability 2^-width.
+    """
+    p = _bpsk_ber(np.asarray(SNR_dB) - 10 * np.log10(mcs.bits_per_symbol))
+    # Tail sums and expm1, as 1 - P(success) cancels to 0 at high SNR
+    if mcs.code is None:
+        wrong = -np.expm1(NUM_BITS * np.log1p(-p))
+    else:
+        n, t = mcs.code.n, mcs.code.t
+        codeword_fail = sum(comb(n, i) * p ** i * (1 - p) ** (n - i) for i in range(t + 1, n + 1))
+        wrong = -np.expm1(mcs.segments * np.log1p(-mcs.miscorrection * codeword_fail))
+    return wrong * 2.0 ** -mcs.crc.width
+
+
+def _safe_snr_db(mcs, max_undetected):
+    """Lowest SNR_GRID_DB point where predicted_undetected() is at most max_undetected."""
+    safe = predicted_undetected(mcs, SNR_GRID_DB) <= max_undetected
+    return SNR_GRID_DB[np.argmax(safe)] if safe.any() else SNR_GRID_DB[-1]
+
+
+def predicted_goodput(mcs, SNR_dB):
+    """
+    Expected data bits per channel symbol of an Mcs with Chase combining over
+    AWGN. Summing the LLRs of k transmissions is one transmission at k times
+    the SNR, so attempt k fails with predicted_bler(SNR_dB + 10 log10 k).
+    """
+    SNR_dB = np.asarray(SNR_dB, dtype=np.float64)
+    failed = np.ones_like(SNR_dB)  # P(the first k attempts all failed)
+    attempts = np.zeros_like(SNR_dB)
+    for k in range(1, mcs.max_transmission + 1):
+        attempts += failed
+        failed = predicted_bler(mcs, SNR_dB + 10 * np.log10(k))
+    return mcs.efficiency * (1 - failed) / attempts
+
+
+class SyndromePolicy(FixedPolicy):
+    """
+    Link adaptation on the receiver-reported syndrome weight.
+
+    The corrected bits of every first transmission (at least 1 for a NACK)
+    give an estimate of the raw bit error rate. Per link, an exponential
+    moving average (weight alpha) of errors and of received bits is kept; their
+    ratio is mapped to an Es/N0 estimate through the uncoded BER curve of the
+    modulation in use, and the level with the highest predicted_goodput() at
+    that Es/N0 among those whose predicted_undetected() is at most
+    max_undetected (the most robust level if none is) is selected. Unlike NackHistoryPolicy it sees the channel
+    getting worse from the correction count before packets start failing.
+
+    A failed codeword only reports t + 1 corrections, so at low SNR the raw
+    estimate is too optimistic. An outer loop corrects it: every link adds an
+    offset (dB) to its estimate that goes down by step * (1 - b) on a NACK and
+    up by step * b on an ACK, where b is the predicted first-transmission BLER
+    of the level used, so it settles where the observed BLER matches the
+    prediction (within +-MAX_OFFSET_DB).
+    """
+
+    def __init__(self, num_links=1, alpha=0.05, step=1.0, initial_SNR_dB=5.0, table=MCS_TABLE,
+                 max_undetected=MAX_UNDETECTED):
+        super().__init__(num_links, DEFAULT_MCS, table)
+        self.alpha = alpha
+        self.max_undetected = max_undetected
+        self.step = step
+        self.offset = np.zeros(num_links)
+        self._grid = SNR_GRID_DB
+        self._log_ber = np.log(np.maximum(_bpsk_ber(SNR_GRID_DB), 1e-300))
+        safe = np.array([predicted_undetected(mcs, SNR_GRID_DB) <= max_undetected for mcs in table])
+        goodput = np.array([predicted_goodput(mcs, SNR_GRID_DB) for mcs in table])
+        self._best = np.argmax(np.where(safe, goodput, -1.0), axis=0)
+        self._bler = np.clip([predicted_bler(mcs, SNR_GRID_DB) for mcs in table], 0.01, 0.9)
+        self._bits_per_symbol = np.array([mcs.bits_per_symbol for mcs in table])
+        self._tx_bits = np.array([mcs.tx_bits for mcs in table], dtype=np.float64)
+
+        # Start every link at initial_SNR_dB, measured with BPSK
+        self.modulation_bits = np.ones(num_links, dtype=np.intp)
+        self.bits = np.full(num_links, self._tx_bits[DEFAULT_MCS])
+        self.errors = self.bits * _bpsk_ber(initial_SNR_dB)
+
+    def _ber_to_snr_db(self, ber, bits_per_symbol):
+        # The BPSK curve decreases with SNR; np.interp needs increasing x
+        snr = np.interp(-np.log(np.maximum(ber, 1e-300)), -self._log_ber, self._grid)
+        return snr + 10 * np.log10(bits_per_symbol)
+
+    def _snr_db_to_ber(self, SNR_dB, bits_per_symbol):
+        return np.exp(np.interp(SNR_dB - 10 * np.log10(bits_per_symbol), self._grid, self._log_ber))
+
+    def estimated_snr_db(self, links):
+        """Es/N0 estimate of the syndrome weights alone, without the outer-loop offset."""
+        return self._ber_to_snr_db(self.errors[links] / self.bits[links], self.modulation_bits[links])
+
+    def _grid_index(self, links):
+        SNR_dB = self.estimated_snr_db(links) + self.offset[links]
+        return np.searchsorted(self._grid, SNR_dB).clip(0, len(self._grid) - 1)
+
+    def select(self, links):
+        return self._best[self._grid_index(links)]
+
+    def update(self, links, mcs, ack, attempts, corrections):
+        first = np.atleast_1d(attempts) == 1
+        links = np.atleast_1d(links)[first]
+        mcs = np.atleast_1d(mcs)[first]
+        ack = np.atleast_1d(ack)[first]
+        errors = np.maximum(np.atleast_1d(corrections)[first], ~ack)
+        bits_per_symbol = self._bits_per_symbol[mcs]
+
+        bler = self._bler[mcs, self._grid_index(links)]
+        self.offset[links] = np.clip(self.offset[links] + np.where(ack, self.step * bler, -self.step * (1 - bler)),
+                                     -MAX_OFFSET_DB, MAX_OFFSET_DB)
+
+        # Carry the estimate over to the modulation of this observation
+        changed = bits_per_symbol != self.modulation_bits[links]
+        if changed.any():
+            moved = links[changed]
+            SNR_dB = self.estimated_snr_db(moved)
+            self.errors[moved] = self.bits[moved] * self._snr_db_to_ber(SNR_dB, bits_per_symbol[changed])
+            self.modulation_bits[moved] = bits_per_symbol[changed]
+
+        self.errors[links] += self.alpha * (errors - self.errors[links])
+        self.bits[links] += self.alpha * (self._tx_bits[mcs] - self.bits[links])
+
+
+POLICIES = {
+    "fixed": FixedPolicy,
+    "nack": NackHistoryPolicy,
+    "syndrome": SyndromePolicy,
+}
+
+
+# --- Goodput simulation ---
+CHANNELS = {"awgn": AwgnChannel, "rayleigh": FadingChannel}
+
+
+def simulate_adaptation(policy, SNR_dB, num_slots=NUM_SLOTS, channel="awgn", rng=None):
+    """
+    Run policy.num_links independent HARQ links for num_slots slots at
+    Es/N0 = SNR_dB (per channel symbol, the same for every MCS level).
+
+    In every slot each link sends one transmission: a new packet at the level
+    policy.select() picks, or a retransmission of its current packet, which
+    is Chase-combined with the earlier ones and hard-decoded. Feedback reaches
+    the sender before the next slot. A packet is finished when its CRC passes
+    or after the level's max_transmission attempts. channel is "awgn" or
+    "rayleigh" (block fading, one gain per transmission).
+
+    Returns:
+        dict of counts: "packets" (finished), "delivered" (CRC passed and
+        correct), "undetected" (CRC passed but wrong), "dropped",
+        "transmissions", "symbols", "first_transmissions", "first_nacks" and
+        "mcs_transmissions" (transmissions per MCS level).
+    """
+    rng = np.random.default_rng(rng)
+    table, num_links = policy.table, policy.num_links
+    EsN0 = 10 ** (SNR_dB / 10)
+    models = [CHANNELS[channel](mcs.modulation) for mcs in table]
+    max_transmission = np.array([mcs.max_transmission for mcs in table])
+    max_bits = max(mcs.tx_bits for mcs in table)
+    all_links = np.arange(num_links)
+
+    data = np.zeros((num_links, NUM_BITS), dtype=np.uint8)
+    tx = np.zeros((num_links, max_bits), dtype=np.uint8)
+    llr = np.zeros((num_links, max_bits), dtype=np.float32)
+    level = np.zeros(num_links, dtype=np.intp)
+    attempts = np.zeros(num_links, dtype=np.int64)
+    idle = np.ones(num_links, dtype=bool)
+    counts = dict.fromkeys(("packets", "delivered", "undetected", "dropped", "first_transmissions",
+                            "first_nacks", "transmissions", "symbols"), 0)
+    mcs_transmissions = np.zeros(len(table), dtype=np.int64)
+
+    for _ in range(num_slots):
+        new = np.flatnonzero(idle)
+        if new.size:
+            level[new] = policy.select(new)
+            data[new] = rng.integers(0, 2, (new.size, NUM_BITS), dtype=np.uint8)
+            attempts[new] = 0
+            llr[new] = 0
+            for index, mcs in enumerate(table):
+                rows = new[level[new] == index]
+                if rows.size:
+                    tx[rows, :mcs.tx_bits] = mcs.encode(data[rows])
+        attempts += 1
+
+        ack = np.zeros(num_links, dtype=bool)
+        corrections = np.zeros(num_links, dtype=np.int64)
+        for index, mcs in enumerate(table):
+            rows = np.flatnonzero(level == index)
+            if not rows.size:
+                continue
+            n = mcs.tx_bits
+            llr[rows, :n] += models[index](tx[rows, :n], EsN0 / mcs.bits_per_symbol, rng=rng, soft=True)
+            decoded, valid, corrections[rows] = mcs.decode((llr[rows, :n] < 0).astype(np.uint8))
+            ok = valid & mcs.crc.check_batch(decoded)
+            wrong = ok & (decoded[:, :NUM_BITS] != data[rows]).any(axis=1)
+            ack[rows] = ok
+            counts["delivered"] += int(np.count_nonzero(ok & ~wrong))
+            counts["undetected"] += int(np.count_nonzero(wrong))
+            counts["symbols"] += rows.size * mcs.symbols
+            mcs_transmissions[index] += rows.size
+
+        policy.update(all_links, level, ack, attempts, corrections)
+        done = ack | (attempts >= max_transmission[level])
+        counts["first_transmissions"] += new.size
+        counts["first_nacks"] += int(np.count_nonzero(~ack & (attempts == 1)))
+        counts["dropped"] += int(np.count_nonzero(done & ~ack))
+        counts["packets"] += int(np.count_nonzero(done))
+        counts["transmissions"] += num_links
+        idle = done
+
+    counts["mcs_transmissions"] = mcs_transmissions
+    return counts
+
+
+def summarize_adaptation(counts):
+    """
+    goodput: correctly delivered data bits per channel symbol.
+    bler: first-transmission BLER. residual_bler: finished packets that were
+    dropped or delivered wrong. undetected: finished packets delivered wrong
+    with a passing CRC. mean_attempts: transmissions per finished packet.
+    """
+    packets = max(counts["packets"], 1)
+    return {
+        "goodput": counts["delivered"] * NUM_BITS / max(counts["symbols"], 1),
+        "bler": counts["first_nacks"] / max(counts["first_transmissions"], 1),
+        "residual_bler": (counts["dropped"] + counts["undetected"]) / packets,
+        "undetected": counts["undetected"] / packets,
+        "mean_attempts": counts["transmissions"] / packets,
+        "mcs_share": counts["mcs_transmissions"] / max(counts["transmissions"], 1),
+    }
+
+
+def compare_policies(SNR_dB_values, policies=POLICIES, num_links=NUM_LINKS, num_slots=NUM_SLOTS,
+                     channel="awgn", rng=None):
+    """
+    Goodput, residual BLER and undetected errors vs SNR of every policy. policies maps a name to a factory taking
+    num_links (e.g. a policy class or functools.partial). Returns a list of
+    {"SNR_dB": ..., name: summarize_adaptation() dict, ...}.
+    """
+    rng = np.random.default_rng(rng)
+    results = []
+    for SNR_dB in SNR_dB_values:
+        result = {"SNR_dB": SNR_dB}
+        for name, factory in policies.items():
+            counts = simulate_adaptation(factory(num_links), SNR_dB, num_slots, channel, rng)
+            result[name] = summarize_adaptation(counts)
+        results.append(result)
+    return results
+
+
+def print_report(results):
+    names = [key for key in results[0] if key != "SNR_dB"]
+    print("Goodput (data bits per channel symbol) / residual BLER / undetected errors per packet vs Es/N0")
+    print(f"{'SNR (dB)':>8} " + " ".join(f"{name:>28}" for name in names) + "  most used MCS per policy")
+    for result in results:
+        columns = " ".join(f"{result[name]['goodput']:8.3f} {result[name]['residual_bler']:9.2e} "
+                           f"{result[name]['undetected']:9.2e}" for name in names)
+        levels = ", ".join(MCS_TABLE[int(np.argmax(result[name]["mcs_share"]))].name for name in names)
+        print(f"{result['SNR_dB']:8.1f} {columns}  {levels}")
+
+
+def plot_goodput(results, path=None):
+    import matplotlib.pyplot as plt
+
+    SNR_dB_values = [r["SNR_dB"] for r in results]
+    plt.figure(figsize=(8, 5))
+    for name in (key for key in results[0] if key != "SNR_dB"):
+        plt.plot(SNR_dB_values, [r[name]["goodput"] for r in results], marker='o', label=name)
+    plt.xlabel('Es/N0 (dB)')
+    plt.ylabel('Goodput (data bits / symbol)')
+    plt.grid(True)
+    plt.legend()
+    if path:
+        plt.savefig(path)
+    else:
+        plt.show()
+
+
+if __name__ == "__main__":
+    import time
+
+    start = time.perf_counter()
+    report = compare_policies(np.arange(-2.0, 15.0, 2.0), rng=0)
+    print_report(report)
+    print(f"Simulated in {time.perf_counter() - start:.1f} s")
@@ -0,0 +1,388 @@
+import hashlib
+import json
+import os
+from functools import lru_cache, wraps
+from itertools import combinations
+from math import comb
+
+import numpy as np
+from scipy.special import erfc
+
+from channels import AwgnChannel, BscChannel
+from codes import get_code
+from crc import get_crc
+from run import channel as run_channel
+from simulation import MAX_TRANSMISSIONS, NUM_BITS, get_codec
+
+# Directory of the on-disk memo of analytic_point(); "" disables it
+CACHE_DIR = os.environ.get("HARQ_ANALYTIC_CACHE", ".analytic_cache")
+MODEL_VERSION = 3  # Part of every cache key; bump when a model below changes
+MAX_DUAL_BITS = 16  # Widest CRC whose dual code crc_undetected() enumerates
+MAX_PATTERNS = 200_000  # Error patterns per weight that decoder_outcomes() enumerates
+
+
+# --- Disk memoization ---
+def _canonical(value):
+    """JSON-able description of an argument, so equal parameter sets get equal cache keys."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    name = f"{type(value).__module__}.{type(value).__qualname__}"
+    if callable(value) and hasattr(value, "__qualname__"):
+        return f"{value.__module__}.{value.__qualname__}"  # plain functions such as run.channel
+    return {"type": name, **{k: _canonical(v) for k, v in vars(value).items()}}
+
+
+def disk_cache(func):
+    """
+    Memoize func(*args, **kwargs) in one JSON file per argument set under
+    CACHE_DIR. The key covers the function name, MODEL_VERSION and every
+    argument (channel objects by type and attributes), and files are replaced
+    atomically, so concurrent sweeps can share the directory.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not CACHE_DIR:
+            return func(*args, **kwargs)
+        key = json.dumps([func.__qualname__, MODEL_VERSION, _canonical(args), _canonical(kwargs)], sort_keys=True)
+        path = os.path.join(CACHE_DIR, hashlib.sha1(key.encode()).hexdigest() + ".json")
+        try:
+            with open(path) as f:
+                return json.load(f)["result"]
+        except (OSError, ValueError, KeyError):
+            pass
+        result = func(*args, **kwargs)
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"key": key, "result": result}, f)
+        os.replace(tmp_path, path)
+        return result
+    return wrapper
+
+
+# --- Channel bit error rates ---
+def bpsk_ber(SNR_dB):
+    """Hard-decision BPSK (or Gray-mapped QPSK) bit error rate Q(sqrt(2 Eb/N0)) at Eb/N0 = SNR_dB."""
+    return 0.5 * erfc(np.sqrt(10 ** (np.asarray(SNR_dB, dtype=np.float64) / 10)))
+
+
+def _majority_error(p, votes):
+    """Error rate of the sum of `votes` equal-magnitude BSC LLRs; a tie decides 0, i.e. is wrong half the time."""
+    j = np.arange(votes + 1)
+    pmf = _binomial_pmf(p, votes)
+    return (pmf * np.where(2 * j > votes, 1.0, np.where(2 * j == votes, 0.5, 0.0))).sum(axis=-1)
+
+
+def channel_ber(channel, SNR_dB, combined=1):
+    """
+    Raw bit error rate of a simulation channel at SNR_dB after hard decision
+    on the sum of the LLRs of `combined` transmissions (Chase combining).
+
+    run.channel sends levels 0/1 with noise variance 1 / (2 SNR) and slices at
+    1/2, so p = Q(sqrt(SNR / 2)); AwgnChannel is BPSK/QPSK at Eb/N0 times its
+    code rate. Summing k Gaussian LLRs is one observation at k times the SNR;
+    for BscChannel it is a majority vote. Other models raise ValueError.
+    """
+    SNR = 10 ** (np.asarray(SNR_dB, dtype=np.float64) / 10)
+    if channel is run_channel:
+        return 0.5 * erfc(np.sqrt(combined * SNR) / 2)
+    if isinstance(channel, AwgnChannel):
+        return 0.5 * erfc(np.sqrt(combined * SNR * channel.code_rate))
+    if isinstance(channel, BscChannel):
+        p = np.full_like(SNR, channel.p) if channel.p is not None else 0.5 * erfc(np.sqrt(SNR))
+        return _majority_error(p, combined)
+    raise ValueError(f"No analytic bit error rate for channel {channel!r}")
+
+
+# --- Block codes ---
+def _binomial_pmf(p, n):
+    """P(j of n independent bits are in error), j = 0..n, along a new last axis."""
+    p = np.asarray(p, dtype=np.float64)[..., None]
+    j = np.arange(n + 1)
+    return np.array([comb(n, i) for i in j], dtype=np.float64) * p ** j * (1 - p) ** (n - j)
+
+
+def block_error(p, n, t):
+    """
+    P(more than t of n bits in error): the block error rate of bounded-distance
+    decoding. Summed over the tail directly, so it stays accurate far below 1e-16.
+    """
+    return _binomial_pmf(p, n)[..., t + 1:].sum(axis=-1)
+
+
+def post_decoding_ber(p, n, t, miscorrection=1.0):
+    """
+    Bit error rate after bounded-distance decoding. A word with j > t errors
+    leaves the decoder with j errors, plus t more when the decoder acts on the
+    (wrong) syndrome, which happens with probability `miscorrection`; t = 1,
+    miscorrection = 1 is the textbook Hamming estimate sum (j + 1) C(n, j) p^j (1 - p)^(n - j) / n.
+    """
+    j = np.arange(n + 1)
+    return (_binomial_pmf(p, n)[..., t + 1:] * (j[t + 1:] + miscorrection * t)).sum(axis=-1) / n
+
+
+def code_parameters(code=None, num_bits=NUM_BITS):
+    """
+    (n, t, miscorrection) of a simulate_batch code: None for the positional
+    Hamming code of num_bits, a codes.py name or a LinearBlockCode.
+    miscorrection is the fraction of non-zero syndromes the decoder corrects;
+    for a shortened code the others are detected and the packet fails.
+    """
+    if code is None:
+        codec = get_codec(num_bits)
+        return codec.n, 1, codec.n / (2 ** codec.r - 1)
+    codec = get_code(code) if isinstance(code, str) else code
+    return codec.n, codec.t, np.count_nonzero(codec.correctable[1:]) / (len(codec.correctable) - 1)
+
+
+@lru_cache(maxsize=None)
+def decoder_outcomes(code=None, num_bits=NUM_BITS, polynomial="CRC3"):
+    """
+    Exact decoder + CRC behaviour for every codeword error pattern of weight
+    0..J, where J <= t + 2 is the largest weight with at most MAX_PATTERNS
+    patterns. The code is linear, so decoding a pattern on its own gives the
+    data error pattern e; whether the received CRC bits then pass depends
+    only on the CRC syndrome of e, crc(e), which must equal the CRC bit errors.
+
+    Returns:
+        (J, fractions): fractions[j, outcome, w] is the share of weight-j
+        patterns with outcome 0 = valid decode, wrong data; 1 = valid, right
+        data; 2 = invalid, wrong data; 3 = invalid, right data; and a CRC
+        syndrome of weight w.
+    """
+    n, t, _ = code_parameters(code, num_bits)
+    codec = get_codec(num_bits) if code is None else get_code(code) if isinstance(code, str) else code
+    crc = get_crc(polynomial)
+    J = t + 1
+    while J < min(t + 2, n) and comb(n, J + 1) <= MAX_PATTERNS:
+        J += 1
+    fractions = np.zeros((J + 1, 4, crc.width + 1))
+    for j in range(J + 1):
+        positions = np.array(list(combinations(range(n), j)), dtype=np.intp).reshape(comb(n, j), j)
+        patterns = np.zeros((len(positions), n), dtype=np.uint8)
+        patterns[np.arange(len(positions))[:, None], positions] = 1
+        result = codec.decode(patterns)
+        wrong = result.data.any(axis=1)
+        syndrome_weight = crc.compute_batch(result.data).sum(axis=1)
+        outcome = np.where(result.valid, np.where(wrong, 0, 1), np.where(wrong, 2, 3))
+        np.add.at(fractions[j], (outcome, syndrome_weight), 1 / len(patterns))
+    return J, fractions
+
+
+# --- CRC ---
+@lru_cache(maxsize=None)
+def crc_weight_distribution(polynomial="CRC3", num_bits=NUM_BITS):
+    """
+    Number of codewords of each weight 0..n of the (num_bits + width, num_bits)
+    code formed by data followed by its CRC. The 2^width words of the dual
+    code (spanned by the parity-check matrix [P^T | I]) are enumerated and
+    turned into the code's distribution with the MacWilliams identity in exact
+    integer arithmetic.
+    """
+    crc = get_crc(polynomial)
+    r = crc.width
+    if r > MAX_DUAL_BITS:
+        raise ValueError(f"CRC width {r} is too large to enumerate its dual code (max {MAX_DUAL_BITS})")
+    n = num_bits + r
+    # Column i of H as an r-bit integer: the CRC of unit vector i, then the identity
+    parity = crc.compute_batch(np.eye(num_bits, dtype=np.uint8)).astype(np.int64)
+    columns = np.concatenate(((parity << np.arange(r - 1, -1, -1)).sum(axis=1), 1 << np.arange(r - 1, -1, -1)))
+    dual = np.arange(1 << r, dtype=np.int64)[:, None] & columns[None, :]
+    for shift in (16, 8, 4, 2, 1):
+        dual ^= dual >> shift
+    B = np.bincount((dual & 1).sum(axis=1), minlength=n + 1)
+
+    def krawtchouk(w, j):
+        return sum((-1) ** s * comb(j, s) * comb(n - j, w - s) for s in range(w + 1))
+
+    support = [j for j in range(n + 1) if B[j]]
+    return tuple(sum(int(B[j]) * krawtchouk(w, j) for j in support) >> r for w in range(n + 1))
+
+
+def crc_undetected(p, polynomial="CRC3", num_bits=NUM_BITS):
+    """
+    Probability that independent bit errors (probability p) over data + CRC
+    form a non-zero codeword, i.e. corrupt the packet without failing the CRC.
+    Tends to 2^-width for p -> 1/2.
+    """
+    A = np.array(crc_weight_distribution(polynomial, num_bits), dtype=np.float64)
+    p = np.asarray(p, dtype=np.float64)[..., None]
+    w = np.arange(1, len(A))
+    return (A[1:] * p ** w * (1 - p) ** (len(A) - 1 - w)).sum(axis=-1)
+
+
+# --- HARQ ---
+def harq_model(SNR_dB, num_bits=NUM_BITS, max_transmissions=MAX_TRANSMISSIONS, polynomial="CRC3",
+               channel=run_channel, combining=None, code=None, round_trip=None):
+    """
+    Semi-analytic counterpart of simulation.simulate_batch() + summarize() for
+    stop-and-wait HARQ with up to max_transmissions transmissions.
+
+    Each round sees independent bit errors at the raw bit error rate
+    channel_ber(). For codeword error weights up to the J of
+    decoder_outcomes() the decoder result and the CRC check are exact: a
+    wrong decode passes when the uncoded CRC bits are hit in exactly the
+    pattern of its CRC syndrome. Heavier patterns (rare wherever the model is
+    used to skip simulation) are miscorrected with the code's miscorrection
+    probability and then pass the CRC with the random-error probability
+    2^-width, the limit of crc_undetected(). Without combining the rounds are
+    independent; with combining="chase" round k sees k combined transmissions
+    and is taken to fail only if the earlier rounds failed.
+
+    Returns:
+        dict of arrays shaped like SNR_dB with the summarize() keys "ber",
+        "bler", "residual_bler", "throughput", "mean_delay" (transmissions per
+        delivered packet), plus "raw_ber", "undetected" (packets delivered
+        wrong with a passing CRC) and, if round_trip (seconds per stop-and-wait
+        transmission) is given, "mean_delay_s".
+    """
+    if combining not in (None, "chase"):
+        raise ValueError(f"No analytic model for combining mode {combining!r}")
+    SNR_dB = np.asarray(SNR_dB, dtype=np.float64)
+    n, t, miscorrection = code_parameters(code, num_bits)
+    width = get_crc(polynomial).width
+    J, outcomes = decoder_outcomes(code, num_bits, polynomial)
+    tail_pass = miscorrection * 2.0 ** -width  # a pattern heavier than J that ends up passing the CRC
+    crc_weights = np.arange(width + 1)
+
+    survived = np.ones_like(SNR_dB)  # P(no CRC pass in the rounds so far)
+    not_correct = np.ones_like(SNR_dB)  # P(round k - 1 did not decode correctly), for Chase nesting
+    transmissions = np.zeros_like(SNR_dB)
+    delay = np.zeros_like(SNR_dB)
+    undetected = np.zeros_like(SNR_dB)
+    for k in range(1, max_transmissions + 1):
+        p = channel_ber(channel, SNR_dB, k if combining == "chase" else 1)
+        codeword_fail = block_error(p, n, t)
+        # P(the CRC bit errors equal a CRC syndrome of weight w), per w
+        crc_match = p[..., None] ** crc_weights * (1 - p[..., None]) ** (width - crc_weights)
+        # and its complement; 1 - (1 - p)^width for w = 0 would cancel at high SNR
+        crc_miss = 1 - crc_match
+        crc_miss[..., 0] = -np.expm1(width * np.log1p(-p))
+        weight_pmf = _binomial_pmf(p, n)
+        # P(weight j) * P(outcome, syndrome weight | j), summed over j <= J
+        joint = np.einsum("...j,jow->...ow", weight_pmf[..., :J + 1], outcomes)
+        tail = weight_pmf[..., J + 1:].sum(axis=-1)
+        passed_wrong = (joint[..., 0, :] * crc_match).sum(axis=-1) + tail * tail_pass
+        # Failures are summed from their own (tiny) terms rather than taken as 1 - passes,
+        # so the BLER stays accurate far below 1e-16
+        fail_wrong = ((joint[..., 0, :] * crc_miss).sum(axis=-1) + joint[..., 2, :].sum(axis=-1)
+                      + tail * (1 - tail_pass))
+        fail = fail_wrong + (joint[..., 1, :] * crc_miss).sum(axis=-1) + joint[..., 3, :].sum(axis=-1)
+        if k == 1:
+            raw_ber, bler = p, fail
+        # Correct decodes of Chase rounds are nested (a packet that decodes at round
+        # k - 1 also would at round k), while CRC passes of garbage are independent
+        previous = not_correct if combining == "chase" else 1.0
+        conditional = np.minimum(1.0, np.divide(fail, previous, out=np.ones_like(fail), where=previous > 0))
+        transmissions += survived
+        undetected += survived * np.minimum(1.0, passed_wrong / np.maximum(previous, 1e-300))
+        delay += k * survived * (1 - conditional)
+        survived = survived * conditional
+        not_correct = fail + passed_wrong
+
+    delivered = 1 - survived
+    # After the last round a failed packet keeps its (possibly right) last decode
+    residual_bler = undetected + survived * np.divide(fail_wrong, fail, out=np.zeros_like(fail), where=fail > 0)
+    errors_per_word = np.divide(post_decoding_ber(p, n, t, miscorrection) * n, codeword_fail,
+                                out=np.full_like(p, t + 1.0), where=codeword_fail > 0)
+    result = {
+        "ber": residual_bler * errors_per_word / n,
+        "bler": bler,
+        "residual_bler": residual_bler,
+        "throughput": num_bits * delivered / ((n + width) * transmissions),
+        "mean_delay": np.divide(delay, delivered, out=np.full_like(delay, np.nan), where=delivered > 0),
+        "raw_ber": raw_ber,
+        "undetected": undetected,
+    }
+    if round_trip is not None:
+        result["mean_delay_s"] = result["mean_delay"] * round_trip
+    return result
+
+
+@disk_cache
+def analytic_point(SNR_dB, **kwargs):
+    """harq_model() at one SNR point as a dict of floats, memoized on disk (see disk_cache)."""
+    return {key: float(value) for key, value in harq_model(float(SNR_dB), **kwargs).items()}
+
+
+def analytic_sweep(SNR_dB_values, **kwargs):
+    """analytic_point() for every SNR point, shaped like simulation.sweep() results."""
+    return [{**analytic_point(SNR_dB, **kwargs), "SNR_dB": SNR_dB} for SNR_dB in SNR_dB_values]
+
+
+def plot_overlay(simulated, analytic=None, keys=("ber", "bler", "residual_bler"), path=None, **kwargs):
+    """
+    Plot simulated points (sweep() / parallel_sweep() results) as markers over
+    the analytic curves; analytic defaults to analytic_sweep() on a 0.25 dB
+    grid spanning the simulated points, with **kwargs as model parameters.
+    Points a sweep took from the analytic model (source "analytic") are left out.
+    """
+    import matplotlib.pyplot as plt
+
+    simulated = [r for r in simulated if r.get("source", "simulation") == "simulation"]
+    if analytic is None:
+        SNR_dB_values = [r["SNR_dB"] for r in simulated]
+        analytic = analytic_sweep(np.arange(min(SNR_dB_values), max(SNR_dB_values) + 0.125, 0.25), **kwargs)
+    plt.figure(figsize=(8, 7))
+    plt.subplot(2, 1, 1)
+    for key in keys:
+        line, = plt.semilogy([r["SNR_dB"] for r in analytic], [r[key] for r in analytic], label=f"{key} (analytic)")
+        plt.semilogy([r["SNR_dB"] for r in simulated], [r[key] for r in simulated], 'o', color=line.get_color(),
+                     label=f"{key} (simulated)")
+    plt.xlabel('SNR (dB)')
+    plt.ylabel('Error rate')
+    plt.grid(True)
+    plt.legend()
+
+    plt.subplot(2, 1, 2)
+    line, = plt.plot([r["SNR_dB"] for r in analytic], [r["throughput"] for r in analytic], label="analytic")
+    plt.plot([r["SNR_dB"] for r in simulated], [r["throughput"] for r in simulated], 'o', color=line.get_color(),
+             label="simulated")
+    plt.xlabel('SNR (dB)')
+    plt.ylabel('Throughput')
+    plt.grid(True)
+    plt.legend()
+    plt.tight_layout()
+    if path:
+        plt.savefig(path)
+    else:
+        plt.show()
+
+
+if __name__ == "__main__":
+    from simulation import sweep
+
+    # The CRC3 code has 2^64 codewords; check the MacWilliams result on a short one by brute force
+    crc = get_crc("CRC3")
+    data = ((np.arange(1 << 8)[:, None] >> np.arange(7, -1, -1)) & 1).astype(np.uint8)
+    brute = np.bincount(crc.append_batch(data).sum(axis=1), minlength=12)
+    assert tuple(brute) == crc_weight_distribution("CRC3", 8), brute
+    assert abs(crc_undetected(0.5) - (2 ** -3 - 2.0 ** -67)) < 1e-12
+
+    for combining in (None, "chase"):
+        simulated = sweep(range(0, 13, 2), 50_000, rng=1, combining=combining)
+        print(f"combining={combining}")
+        for r, a in zip(simulated, analytic_sweep([r["SNR_dB"] for r in simulated], combining=combining)):
+            print(f"  SNR {r['SNR_dB']:2d} dB: BLER {r['bler']:.3e} / {a['bler']:.3e}  "
+                  f"residual {r['residual_bler']:.3e} / {a['residual_bler']:.3e}  "
+                  f"throughput {r['throughput']:.3f} / {a['throughput']:.3f}  "
+                  f"delay {r['mean_delay']:.2f} / {a['mean_delay']:.2f}  (simulated / analytic)")
+    print(f"CRC3 undetected error probability at p=1e-2: {crc_undetected(1e-2):.3e}")
+
+    # Far below what plain Monte Carlo reaches, the model must stay positive and track importance sampling
+    from importance import importance_sweep
+
+    for r in importance_sweep((20, 22), 50_000, rng=1):
+        model = harq_model(r["SNR_dB"])
+        for key in ("bler", "residual_bler"):
+            estimate, std_error = r[key]["estimate"], r[key]["std_error"]
+            assert model[key] > 0 and abs(model[key] - estimate) < 5 * std_error + 0.1 * estimate, (r["SNR_dB"], key)
+        print(f"SNR {r['SNR_dB']} dB: BLER {model['bler']:.3e} (importance sampling {r['bler']['estimate']:.3e} "
+              f"+- {r['bler']['std_error']:.1e}), residual {model['residual_bler']:.3e} "
+              f"(importance sampling {r['residual_bler']['estimate']:.3e})")
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import os
+import numpy as np
+
+from frame import HEADER, FrameError, FrameHeader, FRAME_VERSION, decode_payload, payload_size
+from receiver import HarqReceiver, NUM_PROCESSES as RECEIVER_WINDOW, error, loss_packet
+from sender import HarqSender, MAX_TRANSMISSION, NUM_PROCESSES, timeout
+
+logger = logging.getLogger(__name__)
+
+
+async def read_frame(stream):
+    """Read one frame from an asyncio StreamReader. Returns (FrameHeader, payload bytes)."""
+    header = FrameHeader(*HEADER.unpack(await stream.readexactly(HEADER.size)))
+    if header.version != FRAME_VERSION:
+        raise FrameError(f"Unsupported frame version {header.version}")
+    payload = await stream.readexactly(payload_size(header.nbits)) if header.nbits else b''
+    return header, payload
+
+
+# --- Receiver ---
+async def _handle_connection(stream_reader, stream_writer, loss_packet, error, window, channel, on_close):
+    addr = stream_writer.get_extra_info('peername')
+    harq = HarqReceiver(loss_packet, error, window=window, channel=channel)
+    try:
+        while True:
+            try:
+                header, payload = await read_frame(stream_reader)
+            except asyncio.IncompleteReadError:
+                break
+            feedback = harq.on_frame(header, decode_payload(payload, header.nbits))
+            if feedback is not None:
+                stream_writer.write(feedback)
+                await stream_writer.drain()
+    except (ConnectionError, FrameError) as e:
+        logger.warning("[Receiver] Connection %s aborted: %s", addr, e)
+    finally:
+        harq.flush()
+        stream_writer.close()
+        if on_close is not None:
+            on_close(addr, harq)
+
+
+async def serve_receiver(host_ip, host_port, loss_packet=loss_packet, error=error,
+                         window=RECEIVER_WINDOW, channel=None, on_close=None):
+    """
+    Start an asyncio receiver that terminates any number of sender connections.
+
+    Every connection gets its own HarqReceiver, simulating `channel` (a
+    channels.py model; default BSC with `error` and `loss_packet`). on_close(addr, harq) is called
+    when a connection ends, with all of its packets delivered to
+    harq.received_packets. Returns the asyncio.Server.
+    """
+    def handle(stream_reader, stream_writer):
+        return _handle_connection(stream_reader, stream_writer, loss_packet, error, window, channel, on_close)
+
+    server = await asyncio.start_server(handle, host_ip, host_port)
+    logger.info("[Receiver] Listening on %s:%d...", host_ip, host_port)
+    return server
+
+
+# --- Sender ---
+async def async_sender(packets, server_ip, server_port, timeout=timeout,
+                       num_processes=NUM_PROCESSES, window=None, max_transmission=MAX_TRANSMISSION):
+    """
+    asyncio version of sender.sender().
+
+    ACK timers are the per-process deadlines of HarqSender; waiting for feedback
+    never blocks the event loop, so many senders can share one process.
+    Returns the HarqSender with the final counters.
+    """
+    loop = asyncio.get_running_loop()
+    stream_reader, stream_writer = await asyncio.open_connection(server_ip, server_port)
+    harq = HarqSender(packets, num_processes=num_processes, window=window,
+                      max_transmission=max_transmission, timeout=timeout)
+
+    read_task = None
+    frames = harq.poll(loop.time())
+    try:
+        while True:
+            for frame in frames:
+                stream_writer.write(frame)
+            await stream_writer.drain()
+            if harq.finished:
+                break
+
+            if read_task is None:
+                read_task = loop.create_task(read_frame(stream_reader))
+            deadline = harq.next_deadline()
+            wait = None if deadline is None else max(0.0, deadline - loop.time())
+            done, _ = await asyncio.wait({read_task}, timeout=wait)
+
+            frames = []
+            if read_task in done:
+                task, read_task = read_task, None
+                try:
+                    header, _ = task.result()
+                except asyncio.IncompleteReadError:
+                    logger.warning("[Sender] Connection closed by receiver.")
+                    break
+                frames += harq.on_feedback(header, loop.time())
+            frames += harq.poll(loop.time())
+    finally:
+        if read_task is not None:
+            read_task.cancel()
+        stream_writer.close()
+    return harq
+
+
+async def load_test(num_links, packets_per_link, server_ip, server_port, **sender_kwargs):
+    """Run num_links concurrent senders with random 64-bit packets. Returns their HarqSenders."""
+    links = [[np.random.randint(0, 2, 64) for _ in range(packets_per_link)] for _ in range(num_links)]
+    return await asyncio.gather(*(async_sender(packets, server_ip, server_port, **sender_kwargs)
+                                  for packets in links))
+
+
+async def main(host_ip="127.0.0.1", host_port=5056, num_links=100, packets_per_link=20):
+    finished = []
+    server = await serve_receiver(host_ip, host_port, on_close=lambda addr, harq: finished.append(harq))
+    async with server:
+        senders = await load_test(num_links, packets_per_link, host_ip, host_port)
+        while len(finished) < num_links:
+            await asyncio.sleep(0.01)
+
+    logger.info("[Load test] Links: %d", num_links)
+    logger.info("[Load test] Packets acknowledged: %d, dropped: %d, transmissions: %d",
+                sum(s.acked for s in senders), sum(s.failed for s in senders),
+                sum(s.transmissions for s in senders))
+    logger.info("[Load test] Packets delivered: %d", sum(h.delivered for h in finished))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=os.environ.get("HARQ_LOG_LEVEL", "INFO"), format="%(message)s")
+    asyncio.run(main())
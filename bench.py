@@ -0,0 +1,316 @@
+"""
+Throughput benchmarks for every codec and link stage.
+
+    python bench.py                          # run everything, write bench.json
+    python bench.py --filter hamming         # only stages whose name contains "hamming"
+    python bench.py --compare old.json       # flag stages that got slower than old.json
+
+Every stage is timed at several batch sizes (packets per call) and reported
+as packets/s and bits/s (the width of the rows the stage processes, e.g. 64
+data bits for the CRC or 74 coded bits for a channel, times packets/s). Results are
+written as JSON together with the Python/NumPy versions and the git commit,
+so runs from different commits can be compared with --compare.
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+
+import numpy as np
+
+from channels import AwgnChannel, BscChannel, FadingChannel, GilbertElliottChannel
+from codes import get_code
+from crc import append_crc, crc_remainder, get_crc, validate_crc
+from hamming import hamming_71_64
+from interleaver import get_interleaver
+
+NUM_BITS = 64  # Data bits per packet
+BATCH_SIZES = (1, 1_000, 100_000)
+MIN_TIME = 0.2  # Seconds each measurement runs for at least
+REPEAT = 3  # Measurements per stage and batch size; the fastest one is reported
+THRESHOLD = 0.10  # Relative packets/s drop reported as a regression by --compare
+
+BENCHMARKS = []
+
+
+def benchmark(name, max_batch=None, batch_sizes=None, bits=NUM_BITS):
+    """
+    Register a stage. The decorated function takes (batch_size, rng), does
+    all setup and returns a zero-argument callable that processes batch_size
+    packets of `bits` bits each (the stage's input row width).
+    """
+    def register(setup):
+        BENCHMARKS.append({"name": name, "setup": setup, "max_batch": max_batch, "batch_sizes": batch_sizes,
+                           "bits": bits})
+        return setup
+    return register
+
+
+def _packets(batch_size, rng, num_bits=NUM_BITS):
+    return rng.integers(0, 2, (batch_size, num_bits), dtype=np.uint8)
+
+
+# Row widths of the coded stages: data + CRC3, and the Hamming(71,64) codeword + CRC3 on the link
+CRC_BITS = NUM_BITS + 3
+LINK_BITS = hamming_71_64.n + 3
+
+
+# --- CRC ---
+@benchmark("crc_remainder", max_batch=10_000)
+def _crc_remainder(batch_size, rng):
+    strings = [''.join(map(str, bits)) for bits in _packets(batch_size, rng)]
+    return lambda: [crc_remainder(s, "1101") for s in strings]
+
+
+@benchmark("append_crc", max_batch=10_000)
+def _append_crc(batch_size, rng):
+    packets = list(_packets(batch_size, rng))
+    return lambda: [append_crc(p, "1101") for p in packets]
+
+
+@benchmark("validate_crc", max_batch=10_000, bits=CRC_BITS)
+def _validate_crc(batch_size, rng):
+    packets = [append_crc(p, "1101") for p in _packets(batch_size, rng)]
+    return lambda: [validate_crc(p, "1101") for p in packets]
+
+
+@benchmark("crc.compute_batch[CRC24A]")
+def _crc_batch(batch_size, rng):
+    crc, packets = get_crc("CRC24A"), _packets(batch_size, rng)
+    return lambda: crc.compute_batch(packets)
+
+
+# --- Block codes ---
+@benchmark("hamming_encode", max_batch=10_000, bits=CRC_BITS)
+def _hamming_encode(batch_size, rng):
+    from sender import hamming_encode
+    packets = [append_crc(p, "1101") for p in _packets(batch_size, rng)]
+    return lambda: [hamming_encode(p) for p in packets]
+
+
+@benchmark("hamming_decode", max_batch=10_000, bits=LINK_BITS)
+def _hamming_decode(batch_size, rng):
+    from receiver import hamming_decode
+    from sender import encode_packet
+    packets = [encode_packet(p) for p in _packets(batch_size, rng)]
+    return lambda: [hamming_decode(p) for p in packets]
+
+
+@benchmark("HammingCodec.encode")
+def _codec_encode(batch_size, rng):
+    packets = _packets(batch_size, rng)
+    return lambda: hamming_71_64.encode(packets)
+
+
+@benchmark("HammingCodec.decode", bits=hamming_71_64.n)
+def _codec_decode(batch_size, rng):
+    codewords = hamming_71_64.encode(_packets(batch_size, rng))
+    return lambda: hamming_71_64.decode(codewords)
+
+
+@benchmark("LinearBlockCode.decode[BCH(78,64)]", bits=get_code("BCH(78,64)").n)
+def _bch_decode(batch_size, rng):
+    code = get_code("BCH(78,64)")
+    codewords = code.encode(_packets(batch_size, rng))
+    return lambda: code.decode(codewords)
+
+
+# --- Interleavers ---
+def _interleave_benchmark(kind):
+    def setup(batch_size, rng):
+        interleaver = get_interleaver(kind, LINK_BITS)
+        codewords = _packets(batch_size, rng, LINK_BITS)
+        return lambda: interleaver.deinterleave(interleaver.interleave(codewords))
+    benchmark(f"interleave+deinterleave[{kind}]", bits=LINK_BITS)(setup)
+
+
+for _kind in ("block", "random", "subblock"):
+    _interleave_benchmark(_kind)
+
+
+# --- Channels ---
+def _channel_benchmark(name, model, soft):
+    def setup(batch_size, rng):
+        codewords = _packets(batch_size, rng, LINK_BITS)
+        return lambda: model(codewords, 4.0, rng=rng, soft=soft)
+    benchmark(f"channel[{name}{', soft' if soft else ''}]", bits=LINK_BITS)(setup)
+
+
+for _name, _model in (("AWGN", AwgnChannel()), ("Rayleigh", FadingChannel()),
+                      ("BSC", BscChannel(0.02)), ("Gilbert-Elliott", GilbertElliottChannel(0.01, 0.2))):
+    for _soft in (False, True):
+        _channel_benchmark(_name, _model, _soft)
+
+
+# --- Receiver ---
+def _receiver_frames(batch_size, rng):
+    from adaptation import DEFAULT_MCS
+    from frame import encode_frame
+    from sender import encode_packet
+    return b"".join(encode_frame(seq, encode_packet(packet), process=seq % 8, mcs=DEFAULT_MCS)
+                    for seq, packet in enumerate(_packets(batch_size, rng)))
+
+
+@benchmark("HarqReceiver.on_frame", max_batch=10_000, bits=LINK_BITS)
+def _receiver_on_frame(batch_size, rng):
+    from frame import MAX_FRAME_SIZE, FrameReader, decode_payload
+    from receiver import HarqReceiver
+    stream = _receiver_frames(batch_size, rng)
+
+    def run():
+        harq, reader = HarqReceiver(rng=rng, keep_packets=False), FrameReader(len(stream) + MAX_FRAME_SIZE)
+        reader.feed(stream)
+        for header, payload in reader.frames():
+            harq.on_frame(header, decode_payload(payload, header.nbits))
+    return run
+
+
+@benchmark("HarqReceiver.on_batch", max_batch=10_000, bits=LINK_BITS)
+def _receiver_on_batch(batch_size, rng):
+    from frame import MAX_FRAME_SIZE, FrameReader
+    from receiver import HarqReceiver
+    stream = _receiver_frames(batch_size, rng)
+
+    def run():
+        harq, reader = HarqReceiver(rng=rng, keep_packets=False), FrameReader(len(stream) + MAX_FRAME_SIZE)
+        reader.feed(stream)
+        for frames in reader.batches():
+            harq.on_batch(frames)
+    return run
+
+
+# --- End to end ---
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@benchmark("loopback sender()->receiver()", batch_sizes=(100, 1_000))
+def _loopback(batch_size, rng):
+    import receiver
+    import sender
+
+    packets = list(_packets(batch_size, rng))
+    results_dir = tempfile.mkdtemp()
+
+    def run():
+        port = _free_port()
+        listening = threading.Event()
+        thread = threading.Thread(target=receiver.receiver, args=("127.0.0.1", port, 0.0, 0.0),
+                                  kwargs={"results_path": os.path.join(results_dir, "data_receiver.harq"),
+                                          "ready": listening})
+        thread.start()
+        listening.wait()
+        sender.sender(packets, "127.0.0.1", port)
+        thread.join()
+    return run
+
+
+# --- Runner ---
+def measure(func, min_time=MIN_TIME, repeat=REPEAT):
+    """Best seconds per call over `repeat` measurements of at least min_time each."""
+    func()  # warm-up (caches, lazy allocations)
+    best = float("inf")
+    for _ in range(repeat):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            func()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = min(best, elapsed / calls)
+    return best
+
+
+def run_benchmarks(batch_sizes=BATCH_SIZES, name_filter=None, min_time=MIN_TIME, repeat=REPEAT, seed=0):
+    results = []
+    for bench in BENCHMARKS:
+        if name_filter and name_filter not in bench["name"]:
+            continue
+        for batch_size in bench["batch_sizes"] or batch_sizes:
+            if bench["max_batch"] is not None and batch_size > bench["max_batch"]:
+                continue
+            func = bench["setup"](batch_size, np.random.default_rng(seed))
+            with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+                seconds = measure(func, min_time, repeat)
+            result = {
+                "name": bench["name"],
+                "batch_size": batch_size,
+                "seconds": seconds,
+                "bits_per_packet": bench["bits"],
+                "packets_per_s": batch_size / seconds,
+                "bits_per_s": batch_size * bench["bits"] / seconds,
+            }
+            print(f"{result['name']:>40} batch {batch_size:>7}: {result['packets_per_s']:14,.0f} packets/s "
+                  f"{result['bits_per_s'] / 1e6:12,.2f} Mbit/s")
+            results.append(result)
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """Return the stages whose packets/s dropped by more than `threshold` relative to baseline."""
+    previous = {(r["name"], r["batch_size"]): r["packets_per_s"] for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        before = previous.get((r["name"], r["batch_size"]))
+        if before and r["packets_per_s"] < (1 - threshold) * before:
+            regressions.append({"name": r["name"], "batch_size": r["batch_size"], "before": before,
+                                "after": r["packets_per_s"], "change": r["packets_per_s"] / before - 1})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default="bench.json", help="JSON file to write the results to")
+    parser.add_argument("--compare", help="baseline JSON file from an earlier run")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="relative slowdown that counts as a regression")
+    parser.add_argument("--filter", help="only run stages whose name contains this string")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=list(BATCH_SIZES))
+    parser.add_argument("--min-time", type=float, default=MIN_TIME)
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.batch_sizes, args.filter, args.min_time, args.repeat)
+    with open(args.output, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {r['name']} batch {r['batch_size']}: {r['before']:,.0f} -> "
+                  f"{r['after']:,.0f} packets/s ({r['change']:+.1%})")
+        if regressions:
+            raise SystemExit(1)
+        print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
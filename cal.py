@@ -1,56 +1,171 @@
 import numpy as np
-import matplotlib.pyplot as plt
 
-# Load the original and received data arrays
-data_original = np.load('data_original.npy', allow_pickle=True)
-data_receiver = np.load('data_receiver.npy', allow_pickle=True)
+from results import open_results
+from stats import wilson_interval
 
-# Check the shape of the arrays
-print(f"Original data shape: {data_original.shape}")
-print(f"Received data shape: {data_receiver.shape}")
+CHUNK_SIZE = 1 << 20  # Received records processed per step
+MAX_PLOT_POINTS = 2000  # Per-packet curves are averaged down to at most this many points
 
-# Ensure that both arrays have the same number of packets
-if len(data_original) != len(data_receiver):
-    raise ValueError(f"Different number of packets: {len(data_original)} vs {len(data_receiver)}")
+# Number of set bits of every byte value, for popcounts over packed payloads
+POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
 
-# Initialize lists to store BER values for each packet
-ber_per_packet = []
 
-# Loop through each packet and calculate the BER
-for i in range(len(data_original)):
-    original_packet = np.array(data_original[i]).flatten()
-    received_packet = np.array(data_receiver[i]).flatten()
+def _sorted_seqs(records, chunk_size=CHUNK_SIZE):
+    """
+    Sequence numbers of records and, if they are not increasing, the sort order.
 
-    # Debug print to check the lengths of each packet
-    print(f"Packet {i} - Original length: {len(original_packet)}, Received length: {len(received_packet)}")
+    Increasing sequence numbers (what the sender writes) stay a view of the
+    memory-mapped file. Otherwise the sorted copy and the order are built in
+    RAM, 16 bytes per record.
+    """
+    seqs = np.asarray(records['seq'])
+    increasing = all(np.all(np.diff(seqs[start:start + chunk_size + 1].astype(np.int64)) > 0)
+                     for start in range(0, len(seqs), chunk_size))
+    if increasing:
+        return seqs, None
+    order = np.argsort(seqs, kind='stable')
+    return seqs[order], order
 
-    # Ensure the lengths of both packets are the same
-    if len(original_packet) != len(received_packet):
-        raise ValueError(f"Packet {i} has different lengths.")
 
-    # Calculate the number of bit errors
-    bit_errors = np.count_nonzero(original_packet != received_packet)
+def analyze(original_path='data_original.harq', received_path='data_receiver.harq',
+            chunk_size=CHUNK_SIZE, max_plot_points=MAX_PLOT_POINTS):
+    """
+    Compare a received result file against the original one.
 
-    # Calculate the total number of bits
-    total_bits = len(original_packet)
+    Received packets are matched to original packets by sequence number, and
+    bit errors are counted with one XOR + popcount over the packed payload
+    bytes per chunk of chunk_size records, so neither file is loaded whole.
+    Original packets that were never delivered count as block errors;
+    received packets with an unknown sequence number or a repeated one are
+    counted but otherwise ignored.
 
-    # Calculate the Bit Error Rate (BER)
-    ber = bit_errors / total_bits
-    ber_per_packet.append(ber)
+    Memory: the received file is streamed, but one "seen" flag per original
+    packet (1 byte each) is held in RAM to find duplicates, plus 16 bytes per
+    original packet if the original file is not in increasing sequence order
+    (see _sorted_seqs). A run of 100 million packets therefore needs about
+    100 MB, or 1.7 GB for an unordered original file.
 
-# Calculate the average BER
-average_ber = np.mean(ber_per_packet)
+    Returns:
+        dict with the raw counts, the rates ber, bler (first-attempt block
+        error rate of the delivered packets), residual_bler (packets wrong or
+        missing after the last retransmission), undetected (CRC passed but
+        wrong), their 95% "ci" intervals, an attempts histogram and the
+        binned per-packet BER curve ("plot_index", "plot_ber").
+    """
+    original = open_results(original_path)
+    received = open_results(received_path)
+    if original.payload_bits != received.payload_bits:
+        raise ValueError(f"Payload sizes differ: {original.payload_bits} vs {received.payload_bits} bits")
+    payload_bits = original.payload_bits
+    original_seqs, original_order = _sorted_seqs(original.records, chunk_size)
 
-# Plot the BER for each packet
-plt.figure(figsize=(10, 6))
-plt.plot(range(1, len(ber_per_packet) + 1), ber_per_packet, marker='o', linestyle='-', color='b', label='BER per Packet')
-plt.axhline(y=average_ber, color='r', linestyle='--', label=f'Average BER = {average_ber:.4f}')
-plt.title('Bit Error Rate (BER) for Each Packet')
-plt.xlabel('Packet Number')
-plt.ylabel('Bit Error Rate (BER)')
-plt.grid(True)
-plt.legend()
+    # Per-packet BER is summed over bins of bin_size received packets for plotting
+    bin_size = max(1, -(-len(received) // max_plot_points))
+    chunk_size = max(bin_size, chunk_size - chunk_size % bin_size)
+    bin_errors = []
+    bin_counts = []
 
-# Save the plot to a file
-plt.savefig('ber_plot.png', dpi=300, bbox_inches='tight')  # Lưu ảnh với độ phân giải 300 DPI
-plt.show()
\ No newline at end of file
+    seen = np.zeros(len(original), dtype=bool)
+    attempts_histogram = np.zeros(256, dtype=np.int64)
+    counts = dict.fromkeys(("matched", "unknown", "duplicates", "bit_errors", "block_errors",
+                            "first_attempt_failures", "crc_failures", "undetected"), 0)
+
+    for chunk in received.iter_chunks(chunk_size):
+        index = np.searchsorted(original_seqs, chunk['seq'])
+        known = index < len(original_seqs)
+        known[known] = original_seqs[index[known]] == chunk['seq'][known]
+        counts["unknown"] += int(np.count_nonzero(~known))
+
+        index = index[known]
+        if original_order is not None:
+            index = original_order[index]
+        chunk = chunk[known]
+        # Packets delivered more than once only count the first time
+        first = np.zeros(len(index), dtype=bool)
+        first[np.unique(index, return_index=True)[1]] = True
+        first &= ~seen[index]
+        counts["duplicates"] += int(len(index) - np.count_nonzero(first))
+        index = index[first]
+        chunk = chunk[first]
+        seen[index] = True
+
+        original_payload = original.records['payload'][index]
+        errors = POPCOUNT[original_payload ^ chunk['payload']].sum(axis=1, dtype=np.int64)
+        wrong = errors > 0
+        crc_ok = chunk['crc_ok'] != 0
+
+        counts["matched"] += len(index)
+        counts["bit_errors"] += int(errors.sum())
+        counts["block_errors"] += int(np.count_nonzero(wrong))
+        counts["first_attempt_failures"] += int(np.count_nonzero((chunk['attempts'] != 1) | ~crc_ok))
+        counts["crc_failures"] += int(np.count_nonzero(~crc_ok))
+        counts["undetected"] += int(np.count_nonzero(crc_ok & wrong))
+        attempts_histogram += np.bincount(chunk['attempts'], minlength=256)
+
+        if len(errors):
+            starts = np.arange(0, len(errors), bin_size)
+            bin_errors.append(np.add.reduceat(errors, starts))
+            bin_counts.append(np.diff(np.append(starts, len(errors))))
+
+    counts["original"] = len(original)
+    counts["received"] = len(received)
+    counts["missing"] = len(original) - counts["matched"]
+    matched = counts["matched"]
+    residual = counts["block_errors"] + counts["missing"]
+
+    bin_errors = np.concatenate(bin_errors) if bin_errors else np.zeros(0, dtype=np.int64)
+    bin_counts = np.concatenate(bin_counts) if bin_counts else np.zeros(0, dtype=np.int64)
+    return {
+        "counts": counts,
+        "payload_bits": payload_bits,
+        "ber": counts["bit_errors"] / max(matched * payload_bits, 1),
+        "bler": counts["first_attempt_failures"] / max(matched, 1),
+        "residual_bler": residual / max(len(original), 1),
+        "undetected": counts["undetected"] / max(matched, 1),
+        "ci": {
+            "ber": wilson_interval(counts["bit_errors"], matched * payload_bits),
+            "bler": wilson_interval(counts["first_attempt_failures"], matched),
+            "residual_bler": wilson_interval(residual, len(original)),
+            "undetected": wilson_interval(counts["undetected"], matched),
+        },
+        "attempts_histogram": np.trim_zeros(attempts_histogram, 'b'),
+        "plot_index": np.cumsum(bin_counts) - bin_counts / 2,
+        "plot_ber": bin_errors / np.maximum(bin_counts * payload_bits, 1),
+    }
+
+
+def print_report(report):
+    counts = report["counts"]
+    print(f"Original packets: {counts['original']}, received records: {counts['received']}")
+    print(f"Matched: {counts['matched']}, missing: {counts['missing']}, "
+          f"unknown seq: {counts['unknown']}, duplicates: {counts['duplicates']}")
+    for key, label in (("ber", "BER"), ("bler", "BLER (1st attempt)"),
+                       ("residual_bler", "Residual BLER"), ("undetected", "Undetected errors")):
+        low, high = report["ci"][key]
+        print(f"{label:>20}: {report[key]:.3e}  95% CI [{low:.3e}, {high:.3e}]")
+    print("Attempts histogram: " + ", ".join(
+        f"{attempts}: {number}" for attempts, number in enumerate(report["attempts_histogram"]) if number))
+
+
+def plot_ber(report, path='ber_plot.png'):
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(10, 6))
+    plt.plot(report["plot_index"], report["plot_ber"], linestyle='-', color='b',
+             label='BER per packet (binned mean)')
+    plt.axhline(y=report["ber"], color='r', linestyle='--', label=f'Average BER = {report["ber"]:.4f}')
+    plt.title('Bit Error Rate (BER) over the run')
+    plt.xlabel('Packet Number')
+    plt.ylabel('Bit Error Rate (BER)')
+    plt.grid(True)
+    plt.legend()
+
+    # Save the plot to a file
+    plt.savefig(path, dpi=300, bbox_inches='tight')  # Lưu ảnh với độ phân giải 300 DPI
+    plt.show()
+
+
+if __name__ == "__main__":
+    report = analyze()
+    print_report(report)
+    plot_ber(report)
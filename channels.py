@@ -0,0 +1,237 @@
+import numpy as np
+from abc import ABC, abstractmethod
+from math import erfc, sqrt
+
+from combining import bsc_llr
+
+# Every channel model is called like run.channel():
+#     model(tx_bits, SNR, rng=None, soft=False)
+# on an (N, n) (or (n,)) 0/1 array. SNR is Eb/N0 (linear) for the models that
+# use it. The result is hard bits (uint8), or LLRs (float32, llr < 0 decides 1)
+# with soft=True. Packet loss is a separate model returned by model.lost(N, rng).
+
+
+def _rng(rng):
+    return np.random.default_rng(rng)
+
+
+def _markov_states(length, p_good_to_bad, p_bad_to_good, state, rng):
+    """
+    Sample `length` steps of a two-state Markov chain starting after `state`
+    (False = good, True = bad). Sojourn times are geometric, so the chain is
+    built from run lengths instead of one step at a time.
+
+    Returns (states bool array, last state).
+    """
+    states = np.empty(length, dtype=bool)
+    filled = 0
+    while filled < length:
+        # Draw enough runs to most likely cover the remaining steps
+        mean_run = 0.5 * (1 / max(p_good_to_bad, 1e-12) + 1 / max(p_bad_to_good, 1e-12))
+        num_runs = int((length - filled) / mean_run) + 16
+        run_states = (np.arange(num_runs) % 2 == 0) ^ (not state)  # alternate, starting with the current state
+        leave = np.where(run_states, p_bad_to_good, p_good_to_bad)
+        run_lengths = rng.geometric(np.clip(leave, 1e-12, 1))
+        run_lengths[0] -= 1  # the first run continues the last sampled step and may be empty
+        run_lengths = np.minimum(np.cumsum(run_lengths), length - filled)
+        run_lengths = np.diff(run_lengths, prepend=0)
+        states[filled:filled + run_lengths.sum()] = np.repeat(run_states, run_lengths)
+        filled += int(run_lengths.sum())
+        used = np.flatnonzero(run_lengths)
+        state = bool(run_states[used[-1]]) if used.size else state
+    return states, state
+
+
+# --- Packet loss models ---
+class NoLoss:
+    def lost(self, num_packets, rng=None):
+        return np.zeros(num_packets, dtype=bool)
+
+
+class BernoulliLoss:
+    """Every packet is lost independently with probability p."""
+
+    def __init__(self, p):
+        self.p = p
+
+    def lost(self, num_packets, rng=None):
+        return _rng(rng).random(num_packets) < self.p
+
+
+class GilbertElliottLoss:
+    """
+    Bursty packet loss: a good/bad Markov chain over packets with loss
+    probabilities loss_good and loss_bad. The chain state carries over between
+    calls, so consecutive calls see one continuous packet stream.
+    """
+
+    def __init__(self, p_good_to_bad, p_bad_to_good, loss_good=0.0, loss_bad=1.0):
+        self.p_good_to_bad = p_good_to_bad
+        self.p_bad_to_good = p_bad_to_good
+        self.loss_good = loss_good
+        self.loss_bad = loss_bad
+        self.state = False
+
+    def lost(self, num_packets, rng=None):
+        rng = _rng(rng)
+        bad, self.state = _markov_states(num_packets, self.p_good_to_bad, self.p_bad_to_good, self.state, rng)
+        return rng.random(num_packets) < np.where(bad, self.loss_bad, self.loss_good)
+
+
+# --- Channel models ---
+class ChannelModel(ABC):
+    """Base class: subclasses implement llr(); hard decisions and loss come for free."""
+
+    def __init__(self, loss=None):
+        self.loss = loss if loss is not None else NoLoss()
+
+    @abstractmethod
+    def llr(self, tx_bits, SNR, rng):
+        """LLRs (float32, llr < 0 decides 1) of the (N, n) tx_bits received at SNR."""
+
+    def hard(self, tx_bits, SNR, rng):
+        return (self.llr(tx_bits, SNR, rng) < 0).astype(np.uint8)
+
+    def llr_range(self, SNR):
+        """|LLR| that one transmission rarely exceeds, for sizing fixed-point soft buffers; None if unknown."""
+        return None
+
+    def __call__(self, tx_signal, SNR=None, rng=None, soft=False):
+        tx_bits = np.asarray(tx_signal, dtype=np.uint8)
+        rng = _rng(rng)
+        return self.llr(tx_bits, SNR, rng) if soft else self.hard(tx_bits, SNR, rng)
+
+    def lost(self, num_packets, rng=None):
+        return self.loss.lost(num_packets, rng)
+
+
+class _ModulatedChannel(ChannelModel):
+    BITS_PER_SYMBOL = {"bpsk": 1, "qpsk": 2}
+    MAX_GAIN = 1.0  # Channel amplitude covered by llr_range()
+
+    def __init__(self, modulation="bpsk", code_rate=1.0, loss=None):
+        super().__init__(loss)
+        if modulation not in self.BITS_PER_SYMBOL:
+            raise ValueError(f"Unsupported modulation {modulation!r}")
+        self.modulation = modulation
+        self.code_rate = code_rate
+
+    def noise_sigma(self, SNR):
+        """Noise standard deviation per real dimension for unit-energy symbols at Eb/N0 = SNR."""
+        EsN0 = SNR * self.code_rate * self.BITS_PER_SYMBOL[self.modulation]
+        return np.sqrt(1 / (2 * EsN0))
+
+    def gains(self, num_rows, rng):
+        """Per-row channel amplitude |h| after coherent equalization."""
+        return None
+
+    def llr_range(self, SNR):
+        # The LLR 2 a y / sigma^2 has mean 2 a^2 / sigma^2 and standard deviation 2 a / sigma; cover 3 of them
+        if SNR is None:
+            return None
+        sigma = self.noise_sigma(SNR)
+        amplitude = (1.0 if self.modulation == "bpsk" else np.sqrt(0.5)) * self.MAX_GAIN
+        return float(2 * amplitude * (amplitude + 3 * sigma) / sigma ** 2)
+
+    def llr(self, tx_bits, SNR, rng):
+        if SNR is None:
+            raise ValueError(f"{type(self).__name__} needs an SNR")
+        shape = tx_bits.shape
+        bits = np.atleast_2d(tx_bits)
+        sigma = self.noise_sigma(SNR)
+        # Gray-mapped QPSK carries two bits on independent I/Q rails, each with
+        # amplitude 1/sqrt(2); per bit this is BPSK with that amplitude.
+        amplitude = 1.0 if self.modulation == "bpsk" else np.sqrt(0.5)
+        gain = self.gains(bits.shape[0], rng)
+        if gain is not None:
+            amplitude = amplitude * gain[:, None]
+
+        symbols = (1 - 2 * bits.astype(np.float32)) * amplitude
+        received = symbols + sigma * rng.standard_normal(bits.shape, dtype=np.float32)
+        return (2 * amplitude * received / sigma ** 2).astype(np.float32).reshape(shape)
+
+
+class AwgnChannel(_ModulatedChannel):
+    """BPSK or Gray-mapped QPSK over AWGN, with Es/N0 = Eb/N0 * code_rate * bits per symbol."""
+
+
+class FadingChannel(_ModulatedChannel):
+    """
+    Block fading: one complex gain per packet (row), constant over the packet and
+    known at the receiver. k_factor = 0 gives Rayleigh fading, k_factor > 0
+    Rician fading with that ratio of line-of-sight to scattered power. The mean
+    channel power is 1.
+    """
+    MAX_GAIN = 2.0  # a Rayleigh |h| exceeds 2 with probability exp(-4)
+
+    def __init__(self, modulation="bpsk", code_rate=1.0, k_factor=0.0, loss=None):
+        super().__init__(modulation, code_rate, loss)
+        self.k_factor = k_factor
+
+    def gains(self, num_rows, rng):
+        los = np.sqrt(self.k_factor / (self.k_factor + 1))
+        scatter = np.sqrt(1 / (2 * (self.k_factor + 1)))
+        h = los + scatter * (rng.standard_normal(num_rows) + 1j * rng.standard_normal(num_rows))
+        return np.abs(h).astype(np.float32)
+
+
+class BscChannel(ChannelModel):
+    """
+    Binary symmetric channel. With a fixed crossover probability p the SNR
+    argument is ignored; with p=None, p is the hard-decision BPSK error rate
+    Q(sqrt(2 SNR)).
+    """
+
+    def __init__(self, p=None, loss=None):
+        super().__init__(loss)
+        self.p = p
+
+    def crossover(self, SNR):
+        if self.p is not None:
+            return self.p
+        return 0.5 * erfc(sqrt(SNR))
+
+    def hard(self, tx_bits, SNR, rng):
+        flips = rng.random(tx_bits.shape, dtype=np.float32) < self.crossover(SNR)
+        return tx_bits ^ flips.view(np.uint8)
+
+    def llr(self, tx_bits, SNR, rng):
+        return bsc_llr(self.hard(tx_bits, SNR, rng), self.crossover(SNR))
+
+    def llr_range(self, SNR):
+        if self.p is None and SNR is None:
+            return None
+        return float(np.abs(bsc_llr(0, self.crossover(SNR))))
+
+
+class GilbertElliottChannel(ChannelModel):
+    """
+    Burst bit errors: a good/bad Markov chain over the bit stream (rows in
+    order, then columns) with error probabilities error_good and error_bad.
+    The SNR argument is ignored and the chain state carries over between calls.
+    """
+
+    def __init__(self, p_good_to_bad, p_bad_to_good, error_good=0.0, error_bad=0.5, loss=None):
+        super().__init__(loss)
+        self.p_good_to_bad = p_good_to_bad
+        self.p_bad_to_good = p_bad_to_good
+        self.error_good = error_good
+        self.error_bad = error_bad
+        self.state = False
+
+    def mean_error(self):
+        """Stationary bit error probability, used for the LLR magnitude."""
+        p_bad = self.p_good_to_bad / (self.p_good_to_bad + self.p_bad_to_good)
+        return (1 - p_bad) * self.error_good + p_bad * self.error_bad
+
+    def hard(self, tx_bits, SNR, rng):
+        bad, self.state = _markov_states(tx_bits.size, self.p_good_to_bad, self.p_bad_to_good, self.state, rng)
+        error_prob = np.where(bad, self.error_bad, self.error_good).reshape(tx_bits.shape)
+        flips = rng.random(tx_bits.shape, dtype=np.float32) < error_prob
+        return tx_bits ^ flips.view(np.uint8)
+
+    def llr(self, tx_bits, SNR, rng):
+        return bsc_llr(self.hard(tx_bits, SNR, rng), self.mean_error())
+
+    def llr_range(self, SNR):
+        return float(np.abs(bsc_llr(0, self.mean_error())))
@@ -0,0 +1,410 @@
+import numpy as np
+from functools import lru_cache
+from itertools import combinations
+from math import comb
+
+from hamming import DecodeResult
+
+MAX_SYNDROME_BITS = 20  # Largest n - k for which a full syndrome table is built
+
+# Primitive polynomials of GF(2^m), bit i is the coefficient of x^i
+PRIMITIVE_POLYNOMIALS = {3: 0b1011, 4: 0b10011, 5: 0b100101, 6: 0b1000011, 7: 0b10001001,
+                         8: 0b100011101, 9: 0b1000010001, 10: 0b10000001001}
+
+
+# --- GF(2) matrix helpers ---
+def _gf2_rref(matrix):
+    """Reduced row echelon form over GF(2). Returns (rref, pivot columns)."""
+    rref = np.array(matrix, dtype=np.uint8) & 1
+    pivots = []
+    row = 0
+    for col in range(rref.shape[1]):
+        if row == rref.shape[0]:
+            break
+        candidates = np.flatnonzero(rref[row:, col])
+        if candidates.size == 0:
+            continue
+        pivot = row + candidates[0]
+        rref[[row, pivot]] = rref[[pivot, row]]
+        others = np.flatnonzero(rref[:, col])
+        others = others[others != row]
+        rref[others] ^= rref[row]
+        pivots.append(col)
+        row += 1
+    return rref[:row], np.array(pivots, dtype=np.intp)
+
+
+def _gf2_inverse(matrix):
+    size = len(matrix)
+    rref, pivots = _gf2_rref(np.concatenate((matrix, np.eye(size, dtype=np.uint8)), axis=1))
+    if len(pivots) < size or pivots[size - 1] != size - 1:
+        raise ValueError("Matrix is singular over GF(2)")
+    return rref[:, size:]
+
+
+def _xor_table(matrix):
+    """
+    Byte lookup table for multiplying packed bit vectors by `matrix` (m x w).
+
+    table[c, b] is the packed XOR of the rows 8c..8c+7 selected by the bits of
+    byte b (MSB first, as np.packbits), so x @ matrix is the XOR over c of
+    table[c, packed_x[c]].
+    """
+    matrix = np.asarray(matrix, dtype=np.uint8)
+    num_chunks = -(-matrix.shape[0] // 8)
+    padded = np.zeros((num_chunks * 8, matrix.shape[1]), dtype=np.uint8)
+    padded[:matrix.shape[0]] = matrix
+    rows = np.packbits(padded, axis=1).reshape(num_chunks, 8, -1)
+    byte_bits = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1)  # (256, 8)
+    return np.bitwise_xor.reduce(byte_bits[None, :, :, None] * rows[:, None], axis=2)
+
+
+def _xor_table_values(values):
+    """Like _xor_table for a column of integers: table[c, b] is the XOR of values[8c + i] for the bits i of b."""
+    num_chunks = -(-len(values) // 8)
+    padded = np.zeros(num_chunks * 8, dtype=values.dtype)
+    padded[:len(values)] = values
+    byte_bits = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).astype(values.dtype)
+    return np.bitwise_xor.reduce(byte_bits[None] * padded.reshape(num_chunks, 1, 8), axis=2)
+
+
+def _gather_xor(table, packed):
+    out = table[0, packed[:, 0]].copy()
+    for chunk in range(1, table.shape[0]):
+        out ^= table[chunk, packed[:, chunk]]
+    return out
+
+
+class LinearBlockCode:
+    """
+    Binary (n, k) linear block code defined by a generator and/or parity-check matrix.
+
+    G is k x n (codeword = data @ G mod 2) and H is (n - k) x n; a missing one
+    is derived from the other. With only H, the code is made systematic on the
+    non-pivot columns of H's row echelon form. The data bits of a codeword are
+    read from an information set and mapped back through G if G is not
+    systematic there.
+
+    Construction precomputes byte lookup tables for encoding and syndrome
+    computation and a syndrome -> error pattern table holding every error of
+    weight <= t, where t is the largest weight whose patterns all have
+    distinct syndromes (1 for Hamming codes, 2 for a t = 2 BCH code).
+    Syndromes outside the table are detected but not corrected, as with
+    SECDED double errors. Encoding and decoding work on packed bytes, so each
+    codeword costs one table gather per byte.
+
+    encode/decode take and return unpacked bit arrays like HammingCodec and
+    can be used wherever a HammingCodec is; encode_packed/decode_packed work
+    on np.packbits(..., axis=1) rows directly.
+    """
+
+    def __init__(self, G=None, H=None, name=None, max_weight=None):
+        if G is None and H is None:
+            raise ValueError("Need a generator or a parity-check matrix")
+        if H is not None:
+            H = np.asarray(H, dtype=np.uint8) & 1
+            rref, pivots = _gf2_rref(H)
+            if len(pivots) < len(H):
+                raise ValueError("Parity-check matrix rows are linearly dependent")
+        if G is None:
+            # Systematic on the non-pivot columns: c[pivot i] = sum rref[i, info] * c[info]
+            info = np.setdiff1d(np.arange(H.shape[1]), pivots)
+            G = np.zeros((len(info), H.shape[1]), dtype=np.uint8)
+            G[:, info] = np.eye(len(info), dtype=np.uint8)
+            G[:, pivots] = rref[:, info].T
+        else:
+            G = np.asarray(G, dtype=np.uint8) & 1
+            rref, info = _gf2_rref(G)
+            if len(info) < len(G):
+                raise ValueError("Generator matrix rows are linearly dependent")
+            if H is None:
+                parity = np.setdiff1d(np.arange(G.shape[1]), info)
+                H = np.zeros((len(parity), G.shape[1]), dtype=np.uint8)
+                H[:, parity] = np.eye(len(parity), dtype=np.uint8)
+                H[:, info] = rref[:, parity].T
+        if G.shape[1] != H.shape[1] or G.shape[0] + H.shape[0] != G.shape[1]:
+            raise ValueError(f"G {G.shape} and H {H.shape} do not describe an (n, k) code")
+        if np.any((G.astype(np.int64) @ H.T.astype(np.int64)) % 2):
+            raise ValueError("G and H are not orthogonal")
+
+        self.G = G
+        self.H = H
+        self.k, self.n = G.shape
+        self.r = self.n - self.k
+        self.name = name or f"({self.n},{self.k})"
+        if self.r > MAX_SYNDROME_BITS:
+            raise ValueError(f"n - k = {self.r} is too large for a syndrome table")
+
+        # Information set: data = codeword[info_index] @ info_inverse
+        self.info_index = info
+        info_inverse = _gf2_inverse(G[:, info])
+        self._info_table = None
+        if not np.array_equal(info_inverse, np.eye(self.k, dtype=np.uint8)):
+            self._info_table = _xor_table(info_inverse)
+
+        # Syndromes are integers with row 0 of H as the most significant bit
+        self._syndrome_dtype = np.uint8 if self.r <= 8 else np.uint16 if self.r <= 16 else np.uint32
+        column_values = (H.astype(np.int64) << np.arange(self.r - 1, -1, -1)[:, None]).sum(axis=0)
+        self._column_values = column_values.astype(self._syndrome_dtype)
+        self._syndrome_table = _xor_table_values(self._column_values)
+        self._encode_table = _xor_table(G)
+
+        self.t, self.error_table, self.correctable = self._build_error_table(max_weight)
+
+    def __repr__(self):
+        return f"LinearBlockCode({self.name}, n={self.n}, k={self.k}, t={self.t})"
+
+    @property
+    def rate(self):
+        return self.k / self.n
+
+    def _build_error_table(self, max_weight):
+        """Coset leaders of weight <= t; returns (t, packed error patterns per syndrome, correctable mask)."""
+        num_syndromes = 1 << self.r
+        leaders = np.full(num_syndromes, -1, dtype=np.int64)  # index into patterns, -1 = none
+        leaders[0] = 0
+        patterns = [np.zeros((1, 0), dtype=np.intp)]
+        t = 0
+        for weight in range(1, self.n + 1):
+            if max_weight is not None and weight > max_weight:
+                break
+            if comb(self.n, weight) >= num_syndromes:
+                break  # more patterns than free syndromes, some must collide
+            positions = np.array(list(combinations(range(self.n), weight)), dtype=np.intp)
+            syndromes = np.bitwise_xor.reduce(self._column_values[positions], axis=1).astype(np.int64)
+            if np.any(leaders[syndromes] >= 0) or np.unique(syndromes).size < syndromes.size:
+                break
+            offset = sum(len(p) for p in patterns)
+            leaders[syndromes] = offset + np.arange(len(positions))
+            patterns.append(positions)
+            t = weight
+
+        error_bits = np.zeros((num_syndromes, self.n), dtype=np.uint8)
+        offset = 0
+        for positions in patterns:
+            owners = np.flatnonzero((leaders >= offset) & (leaders < offset + len(positions)))
+            rows = positions[leaders[owners] - offset]
+            if rows.shape[1]:
+                error_bits[owners[:, None], rows] = 1
+            offset += len(positions)
+        return t, np.packbits(error_bits, axis=1), leaders >= 0
+
+    # --- Packed API ---
+    def encode_packed(self, packed_data):
+        """Encode (N, ceil(k/8)) packed data rows into (N, ceil(n/8)) packed codewords."""
+        return _gather_xor(self._encode_table, np.asarray(packed_data, dtype=np.uint8))
+
+    def syndrome_packed(self, packed_codewords):
+        return _gather_xor(self._syndrome_table, np.asarray(packed_codewords, dtype=np.uint8))
+
+    def decode_packed(self, packed_codewords):
+        """
+        Correct (N, ceil(n/8)) packed codewords.
+
+        Returns:
+            (corrected packed codewords, syndromes, valid mask). Rows with an
+            uncorrectable syndrome are returned unchanged.
+        """
+        packed_codewords = np.asarray(packed_codewords, dtype=np.uint8)
+        syndrome = self.syndrome_packed(packed_codewords)
+        return packed_codewords ^ self.error_table[syndrome], syndrome, self.correctable[syndrome]
+
+    def extract_data(self, codewords):
+        """Data bits (N, k) of unpacked (N, n) codewords."""
+        data = np.take(codewords, self.info_index, axis=1)
+        if self._info_table is not None:
+            data = np.unpackbits(_gather_xor(self._info_table, np.packbits(data, axis=1)), axis=1, count=self.k)
+        return data
+
+    # --- Bit array API (same as HammingCodec) ---
+    def encode(self, data):
+        """Encode an (N, k) (or (k,)) bit array into (N, n) codewords."""
+        data = np.asarray(data, dtype=np.uint8)
+        squeeze = data.ndim == 1
+        data = np.atleast_2d(data)
+        if data.shape[1] != self.k:
+            raise ValueError(f"Input must have {self.k} bits per row")
+        codewords = np.unpackbits(self.encode_packed(np.packbits(data, axis=1)), axis=1, count=self.n)
+        return codewords[0] if squeeze else codewords
+
+    def syndrome(self, codewords):
+        codewords = np.atleast_2d(np.asarray(codewords, dtype=np.uint8))
+        return self.syndrome_packed(np.packbits(codewords, axis=1))
+
+    def decode(self, codewords):
+        """
+        Correct up to t bit errors per row of an (N, n) (or (n,)) bit array.
+
+        Returns:
+            DecodeResult with the corrected data bits, the syndrome and a mask
+            of rows whose syndrome was correctable.
+        """
+        codewords = np.asarray(codewords, dtype=np.uint8)
+        squeeze = codewords.ndim == 1
+        codewords = np.atleast_2d(codewords)
+        if codewords.shape[1] != self.n:
+            raise ValueError(f"Input must have {self.n} bits per row")
+
+        corrected, syndrome, valid = self.decode_packed(np.packbits(codewords, axis=1))
+        data = self.extract_data(np.unpackbits(corrected, axis=1, count=self.n))
+        if squeeze:
+            return DecodeResult(data[0], syndrome[0], valid[0])
+        return DecodeResult(data, syndrome, valid)
+
+
+# --- Code constructions ---
+def shortened_hamming(k):
+    """
+    Hamming code for k data bits in the positional layout of hamming.HammingCodec:
+    column j of H is the binary representation of position j + 1, so the
+    syndrome is the 1-based error position.
+    """
+    r = 1
+    while (1 << r) < k + r + 1:
+        r += 1
+    positions = np.arange(1, k + r + 1)
+    H = ((positions[None, :] >> np.arange(r - 1, -1, -1)[:, None]) & 1).astype(np.uint8)
+    return LinearBlockCode(H=H, name=f"Hamming({k + r},{k})")
+
+
+def secded(k):
+    """Extended Hamming code (single error correction, double error detection): shortened Hamming plus overall parity."""
+    hamming = shortened_hamming(k)
+    n = hamming.n + 1
+    H = np.zeros((hamming.r + 1, n), dtype=np.uint8)
+    H[:-1, :-1] = hamming.H
+    H[-1] = 1
+    return LinearBlockCode(H=H, name=f"SECDED({n},{k})")
+
+
+def _gf_tables(m):
+    primitive = PRIMITIVE_POLYNOMIALS[m]
+    size = (1 << m) - 1
+    exp = np.zeros(2 * size, dtype=np.int64)
+    value = 1
+    for i in range(size):
+        exp[i] = exp[i + size] = value
+        value <<= 1
+        if value >> m:
+            value ^= primitive
+    return exp
+
+
+def _minimal_polynomial(m, exponent, exp):
+    """Minimal polynomial of alpha^exponent over GF(2), as a coefficient list (lowest degree first)."""
+    size = (1 << m) - 1
+    log = {int(v): i for i, v in enumerate(exp[:size])}
+    coset = []
+    e = exponent % size
+    while e not in coset:
+        coset.append(e)
+        e = (2 * e) % size
+
+    def mul(a, b):
+        return 0 if a == 0 or b == 0 else int(exp[log[a] + log[b]])
+
+    poly = [1]  # product of (x + alpha^e), coefficients in GF(2^m)
+    for e in coset:
+        root = int(exp[e])
+        shifted = [0] + poly
+        poly = [shifted[i] ^ (mul(poly[i], root) if i < len(poly) else 0) for i in range(len(shifted))]
+    return [int(c) for c in poly], tuple(sorted(coset))
+
+
+def bch(m, t, k=None):
+    """
+    Narrow-sense primitive binary BCH code of length 2^m - 1 correcting t errors,
+    optionally shortened to k data bits. The generator matrix is systematic with
+    the data bits first.
+    """
+    if m not in PRIMITIVE_POLYNOMIALS:
+        raise ValueError(f"No primitive polynomial for m={m}")
+    n = (1 << m) - 1
+    exp = _gf_tables(m)
+    generator = np.array([1], dtype=np.uint8)
+    seen = set()
+    for i in range(1, 2 * t + 1):
+        poly, coset = _minimal_polynomial(m, i, exp)
+        if coset in seen:
+            continue
+        seen.add(coset)
+        generator = np.convolve(generator, np.array(poly, dtype=np.uint8)) % 2
+    r = len(generator) - 1
+    full_k = n - r
+    if k is None:
+        k = full_k
+    if not 0 < k <= full_k:
+        raise ValueError(f"BCH({n},{full_k}) cannot be shortened to k={k}")
+
+    # Row i: data bit i at column i, parity = x^(r) * x^(k-1-i) mod g(x) in the last r columns
+    G = np.zeros((k, k + r), dtype=np.uint8)
+    G[:, :k] = np.eye(k, dtype=np.uint8)
+    g = generator[::-1].astype(np.int64)  # highest degree first
+    for i in range(k):
+        dividend = np.zeros(k - i + r, dtype=np.int64)
+        dividend[0] = 1
+        for j in range(k - i):
+            if dividend[j]:
+                dividend[j:j + r + 1] ^= g
+        G[i, k:] = dividend[-r:]
+    return LinearBlockCode(G=G, name=f"BCH({k + r},{k})")
+
+
+# --- Registry ---
+CODES = {
+    "Hamming(7,4)": lambda: shortened_hamming(4),
+    "Hamming(71,64)": lambda: shortened_hamming(64),
+    "SECDED(8,4)": lambda: secded(4),
+    "SECDED(72,64)": lambda: secded(64),
+    "BCH(15,7)": lambda: bch(4, 2),
+    "BCH(31,21)": lambda: bch(5, 2),
+    "BCH(63,51)": lambda: bch(6, 2),
+    "BCH(78,64)": lambda: bch(7, 2, k=64),
+    "BCH(31,16)": lambda: bch(5, 3),
+}
+
+
+def register_code(name, factory):
+    """Add a code to the registry; factory() must return a LinearBlockCode."""
+    CODES[name] = factory
+    get_code.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def get_code(name):
+    """Shared code instance per registry name, so the lookup tables are only built once."""
+    if name not in CODES:
+        raise KeyError(f"Unknown code {name!r}; known codes: {', '.join(CODES)}")
+    return CODES[name]()
+
+
+if __name__ == "__main__":
+    from hamming import HammingCodec
+
+    rng = np.random.default_rng(0)
+    # Cross-check the registry against the positional HammingCodec
+    for k in (4, 11, 26, 64):
+        code, reference = shortened_hamming(k), HammingCodec(k)
+        data = rng.integers(0, 2, (20_000, k), dtype=np.uint8)
+        codewords = code.encode(data)
+        assert np.array_equal(codewords, reference.encode(data)), k
+        errors = rng.integers(0, 2, codewords.shape, dtype=np.uint8) & (rng.random(codewords.shape) < 0.02)
+        ours, theirs = code.decode(codewords ^ errors), reference.decode(codewords ^ errors)
+        assert np.array_equal(ours.syndrome, theirs.syndrome), k
+        assert np.array_equal(ours.valid, theirs.valid), k
+        assert np.array_equal(ours.data[ours.valid], theirs.data[theirs.valid]), k
+
+    for name in CODES:
+        code = get_code(name)
+        data = rng.integers(0, 2, (5_000, code.k), dtype=np.uint8)
+        codewords = code.encode(data)
+        assert not code.syndrome(codewords).any(), name
+        # Every pattern of weight <= t is corrected
+        errors = np.zeros_like(codewords)
+        for row in range(len(errors)):
+            errors[row, rng.choice(code.n, size=row % (code.t + 1), replace=False)] = 1
+        result = code.decode(codewords ^ errors)
+        assert result.valid.all() and np.array_equal(result.data, data), name
+        print(f"{name:>15}: n={code.n:3d} k={code.k:3d} rate={code.rate:.3f} t={code.t} "
+              f"correctable syndromes={int(code.correctable.sum())}/{len(code.correctable)}")
+    print("All codes OK")
@@ -0,0 +1,141 @@
+import numpy as np
+from itertools import combinations
+
+# LLR convention: llr = log(P(bit = 0) / P(bit = 1)), so llr < 0 decides 1.
+
+# Redundancy version start offsets as fractions of the circular buffer and the
+# usual transmission order 0, 2, 3, 1 (as for 3GPP NR LDPC base graph 1).
+RV_OFFSETS = (0, 17 / 66, 33 / 66, 56 / 66)
+RV_SEQUENCE = (0, 2, 3, 1)
+INT8_SCALE = 4.0  # Default int8 SoftBuffer steps per unit LLR (saturates at +-31.75)
+
+
+def bsc_llr(bits, p):
+    """LLRs of hard bits received over a binary symmetric channel with crossover probability p."""
+    p = max(p, 1e-9)
+    magnitude = np.log((1 - p) / p)
+    return np.where(np.asarray(bits) != 0, -magnitude, magnitude).astype(np.float32)
+
+
+class SoftBuffer:
+    """
+    Preallocated per-HARQ-process LLR buffers.
+
+    Row i holds the accumulated LLRs of the packet on process i. float16 keeps
+    the values as they are; int8 stores round(llr * scale), saturating at +-127,
+    which bounds memory to n bytes per process. LLRs beyond +-127 / scale are
+    clipped, and once a bit is clipped further transmissions no longer add to
+    it, so pick the scale for the channel with scale_for().
+    """
+
+    def __init__(self, num_processes, n, dtype=np.float16, scale=INT8_SCALE):
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in (np.float16, np.float32, np.int8):
+            raise ValueError("SoftBuffer dtype must be float16, float32 or int8")
+        self.n = n
+        self.scale = scale
+        self.buffer = np.zeros((num_processes, n), dtype=self.dtype)
+
+    @staticmethod
+    def scale_for(llr_range, num_transmissions):
+        """int8 scale at which num_transmissions LLRs of magnitude llr_range add up without clipping."""
+        return 127 / (llr_range * num_transmissions)
+
+    def reset(self, processes):
+        self.buffer[processes] = 0
+
+    def combine(self, processes, llr, positions=None):
+        """
+        Add LLRs to the buffers of the given processes.
+
+        processes is an index or an index array matching the rows of llr.
+        positions, if given, are the codeword positions of the llr columns
+        (incremental redundancy); it may wrap around the buffer.
+        """
+        processes = np.atleast_1d(processes)
+        llr = np.asarray(llr, dtype=np.float32).reshape(len(processes), -1)
+        if positions is None:
+            positions = np.arange(self.n)
+        positions = np.asarray(positions)
+
+        # Columns are added in slices that cover each position at most once
+        for start in range(0, positions.size, self.n):
+            cols = positions[start:start + self.n]
+            current = self.buffer[processes[:, None], cols].astype(np.float32)
+            if self.dtype == np.int8:
+                updated = np.clip(current + np.rint(llr[:, start:start + self.n] * self.scale), -127, 127)
+            else:
+                updated = current + llr[:, start:start + self.n]
+            self.buffer[processes[:, None], cols] = updated
+
+    def llr(self, processes):
+        """Accumulated LLRs (float32) of the given processes."""
+        values = self.buffer[processes].astype(np.float32)
+        if self.dtype == np.int8:
+            values /= self.scale
+        return values
+
+
+class RateMatcher:
+    """
+    Circular-buffer rate matching for incremental redundancy.
+
+    Transmission with redundancy version rv sends num_tx_bits consecutive
+    codeword bits starting at RV_OFFSETS[rv] * n, wrapping around. With
+    num_tx_bits < n the first transmission is punctured and later redundancy
+    versions fill in the missing bits. num_tx_bits == n with rv always 0 is
+    Chase combining.
+    """
+
+    def __init__(self, n, num_tx_bits=None, rv_offsets=RV_OFFSETS):
+        self.n = n
+        self.num_tx_bits = num_tx_bits or n
+        self._positions = [(int(np.floor(offset * n)) + np.arange(self.num_tx_bits)) % n
+                           for offset in rv_offsets]
+
+    def positions(self, rv):
+        return self._positions[rv]
+
+    def select(self, codewords, rv):
+        return np.asarray(codewords)[..., self._positions[rv]]
+
+
+def soft_decode(llr, codec, crc, num_flips=1):
+    """
+    Chase-II style soft-decision decoding of Hamming + CRC packets.
+
+    llr is an (N, codec.n + crc.width) array: the Hamming codeword followed by
+    the CRC bits. Rows are first hard-decoded; rows whose CRC fails are retried
+    with every combination of up to num_flips of their least reliable bits
+    flipped. Every extra test pattern is another chance for a weak CRC to pass a
+    wrong packet, so keep num_flips small with short CRCs.
+
+    Returns:
+        (data, ok): (N, k) decoded data bits and the CRC-passed mask.
+    """
+    llr = np.atleast_2d(np.asarray(llr, dtype=np.float32))
+    hard = (llr < 0).astype(np.uint8)
+    n = codec.n
+
+    def decode(bits):
+        result = codec.decode(bits[:, :n])
+        ok = result.valid & crc.check_batch(np.concatenate((result.data, bits[:, n:]), axis=1))
+        return result.data, ok
+
+    data, ok = decode(hard)
+    if num_flips <= 0 or ok.all():
+        return data, ok
+
+    least_reliable = np.argsort(np.abs(llr), axis=1, kind='stable')[:, :num_flips]
+    for weight in range(1, num_flips + 1):
+        for pattern in combinations(range(num_flips), weight):
+            rows = np.flatnonzero(~ok)
+            if rows.size == 0:
+                return data, ok
+            trial = hard[rows]
+            for column in pattern:
+                trial[np.arange(rows.size), least_reliable[rows, column]] ^= 1
+            trial_data, trial_ok = decode(trial)
+            data[rows[trial_ok]] = trial_data[trial_ok]
+            ok[rows[trial_ok]] = True
+    return data, ok
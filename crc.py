@@ -0,0 +1,160 @@
+import numpy as np
+from functools import lru_cache
+
+# Generator polynomials, written MSB-first including the leading x^width term.
+# The 3GPP ones follow TS 38.212 section 5.1 (CRC24A/B/C, CRC16, CRC11, CRC6).
+POLYNOMIALS = {
+    "CRC3": "1101",  # x^3 + x^2 + 1, used by sender.py / receiver.py / run.py
+    "CRC6": 0x61,
+    "CRC8": 0x107,
+    "CRC11": 0xE21,
+    "CRC16": 0x11021,
+    "CRC24A": 0x1864CFB,
+    "CRC24B": 0x1800063,
+    "CRC24C": 0x1B2B117,
+    "CRC32": 0x104C11DB7,
+}
+
+
+def _polynomial_to_int(polynomial):
+    if isinstance(polynomial, str):
+        if polynomial in POLYNOMIALS:
+            return _polynomial_to_int(POLYNOMIALS[polynomial])
+        polynomial = polynomial.lstrip('0')
+        if not polynomial or set(polynomial) - {'0', '1'}:
+            raise ValueError(f"Invalid polynomial bitstring: {polynomial!r}")
+        return int(polynomial, 2)
+    polynomial = int(polynomial)
+    if polynomial < 2:
+        raise ValueError("Polynomial must have degree >= 1")
+    return polynomial
+
+
+class CRC:
+    """
+    Table-driven CRC over bit arrays.
+
+    The remainder is the plain polynomial division used throughout this project
+    (zero initial value, no reflection, no final XOR), which is also how 3GPP
+    defines its CRCs. Bits are processed a byte at a time through a 256-entry
+    lookup table; messages whose length is not a multiple of 8 are left-padded
+    with zeros, which does not change the remainder.
+
+    Args:
+        polynomial: bitstring ("1101"), integer (0x1864CFB) or a name from POLYNOMIALS.
+    """
+
+    def __init__(self, polynomial):
+        poly = _polynomial_to_int(polynomial)
+        self.polynomial = poly
+        self.width = poly.bit_length() - 1
+        if self.width > 56:
+            raise ValueError("CRC width above 56 bits is not supported")
+
+        # Polynomials narrower than a byte are shifted up so the register is
+        # always at least 8 bits wide; the result is shifted back at the end.
+        self._reg_width = max(self.width, 8)
+        self._shift = self._reg_width - self.width
+        self._mask = (1 << self._reg_width) - 1
+        self._top = self._reg_width - 8
+
+        reg_poly = (poly << self._shift) & self._mask
+        table = np.zeros(256, dtype=np.uint64)
+        for byte in range(256):
+            reg = byte << self._top
+            for _ in range(8):
+                if reg & (1 << (self._reg_width - 1)):
+                    reg = ((reg << 1) ^ reg_poly) & self._mask
+                else:
+                    reg = (reg << 1) & self._mask
+            table[byte] = reg
+        self.table = table
+        self._table_list = table.tolist()
+        self._bit_shifts = np.arange(self.width - 1, -1, -1, dtype=np.uint64)
+
+    def __repr__(self):
+        return f"CRC(polynomial={self.polynomial:#x}, width={self.width})"
+
+    # --- Scalar ---
+    def remainder_bytes(self, data):
+        """Remainder of a byte string (or uint8 array) as an integer."""
+        table = self._table_list
+        mask, top = self._mask, self._top
+        reg = 0
+        for byte in bytes(data):
+            reg = ((reg << 8) & mask) ^ table[((reg >> top) ^ byte) & 0xFF]
+        return reg >> self._shift
+
+    def remainder(self, bits):
+        """Remainder of a 1-D bit array as an integer."""
+        bits = np.asarray(bits, dtype=np.uint8)
+        pad = (-bits.size) % 8
+        if pad:
+            bits = np.concatenate((np.zeros(pad, dtype=np.uint8), bits))
+        return self.remainder_bytes(np.packbits(bits).tobytes())
+
+    def compute(self, bits):
+        """CRC bits (MSB first) of a 1-D bit array."""
+        return self._int_to_bits(np.uint64(self.remainder(bits)))
+
+    def append(self, bits):
+        bits = np.asarray(bits, dtype=np.uint8)
+        return np.concatenate((bits, self.compute(bits)))
+
+    def check(self, bits_with_crc):
+        return self.remainder(bits_with_crc) == 0
+
+    # --- Batch ---
+    def remainder_batch(self, bits):
+        """Remainders of every row of an (N, k) bit matrix, as uint64 of shape (N,)."""
+        bits = np.asarray(bits, dtype=np.uint8)
+        if bits.ndim != 2:
+            raise ValueError("Expected an (N, k) bit matrix")
+        pad = (-bits.shape[1]) % 8
+        if pad:
+            bits = np.concatenate((np.zeros((bits.shape[0], pad), dtype=np.uint8), bits), axis=1)
+        packed = np.packbits(bits, axis=1)
+
+        table = self.table
+        mask, top = np.uint64(self._mask), np.uint64(self._top)
+        eight, low = np.uint64(8), np.uint64(0xFF)
+        reg = np.zeros(packed.shape[0], dtype=np.uint64)
+        for column in packed.T:
+            reg = ((reg << eight) & mask) ^ table[((reg >> top) ^ column) & low]
+        return reg >> np.uint64(self._shift)
+
+    def compute_batch(self, bits):
+        """CRC bits of every row of an (N, k) bit matrix, shape (N, width)."""
+        return self._int_to_bits(self.remainder_batch(bits)[:, None])
+
+    def append_batch(self, bits):
+        bits = np.asarray(bits, dtype=np.uint8)
+        return np.concatenate((bits, self.compute_batch(bits)), axis=1)
+
+    def check_batch(self, bits_with_crc):
+        """Boolean mask of rows whose CRC is valid."""
+        return self.remainder_batch(bits_with_crc) == 0
+
+    def _int_to_bits(self, reg):
+        return ((reg >> self._bit_shifts) & np.uint64(1)).astype(np.uint8)
+
+
+@lru_cache(maxsize=None)
+def get_crc(polynomial="CRC3"):
+    """Shared CRC engine per polynomial, so tables are only built once."""
+    return CRC(polynomial)
+
+
+# --- Compatibility helpers (bitstring / bit list API) ---
+def crc_remainder(input_bitstring, polynomial_bitstring):
+    crc = get_crc(polynomial_bitstring)
+    bits = np.frombuffer(input_bitstring.encode(), dtype=np.uint8) - ord('0')
+    return format(crc.remainder(bits), f'0{crc.width}b')
+
+
+def append_crc(data, polynomial="CRC3"):
+    return get_crc(polynomial).append(data).astype(int)
+
+
+def validate_crc(data_with_crc, polynomial="CRC3"):
+    return get_crc(polynomial).check(data_with_crc)
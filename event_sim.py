@@ -0,0 +1,229 @@
+import heapq
+import itertools
+import numpy as np
+
+from frame import FLAG_ACK, HEADER, FrameHeader, decode_payload
+from receiver import HarqReceiver, error, loss_packet
+from sender import HarqSender, MAX_TRANSMISSION, NUM_PROCESSES
+
+# Default link timing (seconds of simulated time)
+PROPAGATION_DELAY = 0.005  # One-way propagation delay
+PROCESSING_DELAY = 0.001  # Receiver decode time per frame
+
+
+# --- Event queue ---
+class Event:
+    __slots__ = ("time", "callback", "args", "cancelled")
+
+    def __init__(self, time, callback, args):
+        self.time = time
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class EventQueue:
+    """
+    Discrete-event scheduler with a virtual clock.
+
+    Events are kept in a heap ordered by (time, insertion order), so events at
+    the same time run in the order they were scheduled. Running an event moves
+    `now` to its time; nothing ever sleeps.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self.processed = 0
+        self._heap = []
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def schedule_at(self, time, callback, *args):
+        if time < self.now:
+            raise ValueError(f"Cannot schedule an event in the past ({time} < {self.now})")
+        event = Event(time, callback, args)
+        heapq.heappush(self._heap, (time, next(self._counter), event))
+        return event
+
+    def schedule(self, delay, callback, *args):
+        """Run callback(*args) after `delay` simulated seconds. Returns the Event (see Event.cancel)."""
+        return self.schedule_at(self.now + delay, callback, *args)
+
+    def run(self, until=None):
+        """Process events in time order until the queue is empty or the clock would pass `until`."""
+        while self._heap:
+            time, _, event = self._heap[0]
+            if until is not None and time > until:
+                self.now = until
+                break
+            heapq.heappop(self._heap)
+            if event.cancelled:
+                continue
+            self.now = time
+            self.processed += 1
+            event.callback(*event.args)
+        return self.now
+
+
+# --- HARQ link ---
+class _DeliveryRecorder:
+    """Stands in for a ResultWriter on the HarqReceiver to timestamp in-order deliveries."""
+
+    def __init__(self, events, packets):
+        self.events = events
+        self.packets = packets
+        self.delivered_at = np.full(len(packets), np.nan)
+        self.wrong = 0
+
+    def append(self, seq, data, attempts=1, crc_ok=True, timestamp=None):
+        self.delivered_at[seq] = self.events.now
+        if not np.array_equal(data, self.packets[seq]):
+            self.wrong += 1
+
+
+def latency_stats(latencies):
+    """Mean, percentiles and max of an array of latencies (NaNs are ignored)."""
+    latencies = np.asarray(latencies, dtype=np.float64)
+    latencies = latencies[~np.isnan(latencies)]
+    if latencies.size == 0:
+        return dict.fromkeys(("mean", "p50", "p90", "p99", "max"), float("nan"))
+    p50, p90, p99 = np.percentile(latencies, (50, 90, 99))
+    return {"mean": float(latencies.mean()), "p50": float(p50), "p90": float(p90),
+            "p99": float(p99), "max": float(latencies.max())}
+
+
+def simulate_link(packets, channel=None, SNR_dB=None, loss_packet=loss_packet, error=error,
+                  propagation_delay=PROPAGATION_DELAY, processing_delay=PROCESSING_DELAY,
+                  bit_rate=None, feedback_loss=0.0, timeout=None, num_processes=NUM_PROCESSES,
+                  window=None, max_transmission=MAX_TRANSMISSION, policy=None, rng=None):
+    """
+    Run the HarqSender / HarqReceiver pair of sender.py and receiver.py over a
+    simulated link on an EventQueue instead of a socket.
+
+    A frame sent at time t reaches the other side at t + transmission time +
+    propagation_delay, where the transmission time is len(frame) * 8 / bit_rate
+    (0 if bit_rate is None) and frames queue up behind each other on each
+    direction of the link. The receiver answers processing_delay after a data
+    frame arrives. Feedback frames are lost with probability feedback_loss.
+    ACK timers are the sender's own deadlines; timeout defaults to three
+    round-trip times. The receiver simulates `channel` (default: BSC with
+    `error` and Bernoulli loss `loss_packet`) at SNR_dB. policy is an optional
+    adaptation.py link adaptation policy for the sender.
+
+    Per-event messages go to the sender/receiver loggers at DEBUG level.
+
+    Returns:
+        dict with "simulated_time", "events", the sender/receiver counters,
+        "wrong" (delivered packets that differ from the original),
+        "delivery_latency" / "ack_latency" (per packet, first transmission to
+        in-order delivery / to the ACK at the sender; NaN if never) and their
+        latency_stats() as "delivery" / "ack".
+    """
+    rng = np.random.default_rng(rng)
+    window = window or num_processes
+    if timeout is None:
+        frame_time = 0.0 if bit_rate is None else 8 * (HEADER.size + 16) / bit_rate
+        timeout = 3 * (2 * (propagation_delay + frame_time) + processing_delay)
+
+    events = EventQueue()
+    sender = HarqSender(packets, num_processes=num_processes, window=window,
+                        max_transmission=max_transmission, timeout=timeout, policy=policy)
+    recorder = _DeliveryRecorder(events, packets)
+    receiver = HarqReceiver(loss_packet, error, window=window, max_transmission=max_transmission,
+                            channel=channel, SNR_dB=SNR_dB, rng=rng, writer=recorder, keep_packets=False)
+
+    first_sent = np.full(len(packets), np.nan)
+    acked_at = np.full(len(packets), np.nan)
+    link_free = {"forward": 0.0, "feedback": 0.0}
+    armed_timers = set()
+    feedback_lost = 0
+
+    def transmit(direction, frame, callback):
+        departure = max(events.now, link_free[direction])
+        if bit_rate is not None:
+            departure += len(frame) * 8 / bit_rate
+        link_free[direction] = departure
+        events.schedule_at(departure + propagation_delay, callback, frame)
+
+    def send_frames(frames):
+        for frame in frames:
+            seq = FrameHeader(*HEADER.unpack_from(frame)).seq
+            if np.isnan(first_sent[seq]):
+                first_sent[seq] = events.now
+            transmit("forward", frame, on_data_arrival)
+        # Wake up at the earliest ACK deadline (stale wake-ups are harmless)
+        deadline = sender.next_deadline()
+        if deadline is not None and deadline not in armed_timers:
+            armed_timers.add(deadline)
+            events.schedule_at(max(deadline, events.now), on_timer, deadline)
+
+    def on_timer(deadline):
+        armed_timers.discard(deadline)
+        send_frames(sender.poll(events.now))
+
+    def on_data_arrival(frame):
+        events.schedule(processing_delay, on_data_decoded, frame)
+
+    def on_data_decoded(frame):
+        nonlocal feedback_lost
+        header = FrameHeader(*HEADER.unpack_from(frame))
+        feedback = receiver.on_frame(header, decode_payload(memoryview(frame)[HEADER.size:], header.nbits))
+        if feedback is None:
+            return
+        if feedback_loss and rng.random() < feedback_loss:
+            feedback_lost += 1
+            return
+        transmit("feedback", feedback, on_feedback)
+
+    def on_feedback(frame):
+        header = FrameHeader(*HEADER.unpack_from(frame))
+        state = sender.processes.get(header.process)
+        if header.flags & FLAG_ACK and state is not None and state["seq"] == header.seq:
+            acked_at[header.seq] = events.now
+        send_frames(sender.on_feedback(header, events.now))
+
+    send_frames(sender.poll(events.now))
+    events.run()
+    receiver.flush()
+
+    delivery_latency = recorder.delivered_at - first_sent
+    ack_latency = acked_at - first_sent
+    return {
+        "simulated_time": events.now,
+        "events": events.processed,
+        "acked": sender.acked,
+        "failed": sender.failed,
+        "transmissions": sender.transmissions,
+        "timeouts": sender.timeouts,
+        "delivered": receiver.delivered,
+        "wrong": recorder.wrong,
+        "lost_packets": receiver.lost_packets,
+        "feedback_lost": feedback_lost,
+        "retransmissions": receiver.retransmissions,
+        "delivery_latency": delivery_latency,
+        "ack_latency": ack_latency,
+        "delivery": latency_stats(delivery_latency),
+        "ack": latency_stats(ack_latency),
+    }
+
+
+if __name__ == "__main__":
+    import time
+
+    data = np.random.default_rng(0).integers(0, 2, (10_000, 64), dtype=np.uint8)
+    start = time.perf_counter()
+    result = simulate_link(data, rng=1)
+    elapsed = time.perf_counter() - start
+    print(f"Simulated {result['simulated_time']:.2f} s of link time in {elapsed:.2f} s "
+          f"({result['events']} events)")
+    print(f"Delivered {result['delivered']} packets ({result['wrong']} wrong), acked {result['acked']}, "
+          f"dropped {result['failed']}, transmissions {result['transmissions']}, timeouts {result['timeouts']}")
+    for key in ("delivery", "ack"):
+        stats = result[key]
+        print(f"{key.capitalize()} latency: mean {stats['mean'] * 1e3:.2f} ms, p50 {stats['p50'] * 1e3:.2f} ms, "
+              f"p90 {stats['p90'] * 1e3:.2f} ms, p99 {stats['p99'] * 1e3:.2f} ms, max {stats['max'] * 1e3:.2f} ms")
@@ -0,0 +1,179 @@
+import struct
+import numpy as np
+from collections import namedtuple
+from functools import lru_cache
+
+# Frame layout (network byte order):
+#   version (u8) | HARQ process id (u8) | redundancy version (u8) | flags (u8) |
+#   MCS index (u8) | corrected bits (u8) | sequence number (u32) |
+#   payload length in bits (u16) | payload
+# The payload is the codeword packed 8 bits per byte (np.packbits). Data frames
+# carry the adaptation.MCS_TABLE index they were encoded with. Feedback frames
+# have no payload, carry FLAG_ACK or FLAG_NACK and report the number of bits
+# the receiver's decoder corrected (saturating at 255) for link adaptation.
+FRAME_VERSION = 2
+HEADER = struct.Struct('!BBBBBBIH')
+MAX_PAYLOAD_BITS = 0xFFFF
+MAX_FRAME_SIZE = HEADER.size + (MAX_PAYLOAD_BITS + 7) // 8
+
+FLAG_ACK = 0x01
+FLAG_NACK = 0x02
+
+FrameHeader = namedtuple("FrameHeader", ["version", "process", "rv", "flags", "mcs", "corrections", "seq", "nbits"])
+
+# The same header as a NumPy record, so runs of frames can be viewed in place
+HEADER_DTYPE = np.dtype([("version", "u1"), ("process", "u1"), ("rv", "u1"), ("flags", "u1"), ("mcs", "u1"),
+                         ("corrections", "u1"), ("seq", ">u4"), ("nbits", ">u2")])
+assert HEADER_DTYPE.itemsize == HEADER.size
+
+# Row b holds the 8 bits of byte value b, MSB first (as np.unpackbits)
+_BYTE_BITS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1)
+
+
+class FrameError(ValueError):
+    pass
+
+
+def payload_size(nbits):
+    return (nbits + 7) // 8
+
+
+def encode_frame(seq, bits, process=0, rv=0, *, mcs):
+    """
+    Build a frame carrying a 0/1 bit array encoded with adaptation.MCS_TABLE
+    level mcs. There is no default: the receiver decodes the payload with the
+    level named here, so a wrong one fails every frame.
+    """
+    bits = np.asarray(bits, dtype=np.uint8)
+    if bits.size > MAX_PAYLOAD_BITS:
+        raise FrameError(f"Payload of {bits.size} bits exceeds {MAX_PAYLOAD_BITS} bits")
+    header = HEADER.pack(FRAME_VERSION, process, rv, 0, mcs, 0, seq & 0xFFFFFFFF, bits.size)
+    return header + np.packbits(bits).tobytes()
+
+
+def encode_feedback(seq, process, ack, corrections=0):
+    """Build an ACK/NACK frame for one HARQ process."""
+    flags = FLAG_ACK if ack else FLAG_NACK
+    return HEADER.pack(FRAME_VERSION, process, 0, flags, 0, min(int(corrections), 0xFF), seq & 0xFFFFFFFF, 0)
+
+
+def decode_payload(payload, nbits):
+    """Unpack a frame payload (bytes or memoryview) into a uint8 bit array."""
+    return np.unpackbits(np.frombuffer(payload, dtype=np.uint8), count=nbits)
+
+
+@lru_cache(maxsize=None)
+def frame_dtype(nbits):
+    """Record type of a whole frame with an nbits payload: the HEADER_DTYPE fields plus "payload" bytes."""
+    return np.dtype(HEADER_DTYPE.descr + [("payload", "u1", (payload_size(nbits),))])
+
+
+def decode_payloads(payloads, nbits, out=None):
+    """
+    Unpack (N, payload bytes) packed payloads, e.g. the "payload" field of a
+    FrameReader.batches() run, into an (N, nbits) bit array. The bytes are
+    expanded with one lookup-table gather; with a contiguous uint8 `out` of at
+    least N * payload bytes * 8 elements nothing is allocated and the result
+    is a view into out.
+    """
+    num_frames, size = payloads.shape
+    if out is None:
+        out = np.empty(num_frames * size * 8, dtype=np.uint8)
+    bits = out.reshape(-1)[:num_frames * size * 8].reshape(num_frames, size, 8)
+    np.take(_BYTE_BITS, payloads, axis=0, out=bits)
+    return bits.reshape(num_frames, size * 8)[:, :nbits]
+
+
+class FrameReader:
+    """
+    Streaming frame parser for a TCP connection.
+
+    Bytes are received straight into a preallocated buffer (socket.recv_into)
+    and frames are returned as memoryviews into that buffer, so frames split or
+    coalesced by TCP are reassembled without intermediate copies. A payload view
+    is only valid until the next call to recv_from()/feed().
+
+    batches() hands out the buffered frames as structured arrays (frame_dtype)
+    viewing the buffer instead, one per run of consecutive frames of equal
+    length, so a whole run can be decoded with array operations and no
+    per-frame objects.
+    """
+
+    def __init__(self, capacity=1 << 16):
+        if capacity < MAX_FRAME_SIZE:
+            raise ValueError(f"Capacity must be at least {MAX_FRAME_SIZE} bytes")
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self._start = 0
+        self._end = 0
+
+    def _make_room(self):
+        # Move the partial frame at the tail to the front of the buffer
+        if self._start:
+            pending = self._end - self._start
+            self._view[:pending] = self._view[self._start:self._end]
+            self._start, self._end = 0, pending
+
+    def recv_from(self, sock):
+        """Receive once from sock into the buffer. Returns the byte count (0 on EOF)."""
+        if len(self._buffer) - self._end < MAX_FRAME_SIZE:
+            self._make_room()
+        if self._end == len(self._buffer):
+            raise FrameError("Reader buffer full; consume frames() before receiving")
+        received = sock.recv_into(self._view[self._end:])
+        self._end += received
+        return received
+
+    def feed(self, data):
+        """Append bytes obtained elsewhere (e.g. from an asyncio stream)."""
+        data = memoryview(data)
+        while len(data):
+            if self._end == len(self._buffer):
+                if not self._start:
+                    raise FrameError("Frame larger than reader buffer")
+                self._make_room()
+            count = min(len(data), len(self._buffer) - self._end)
+            self._view[self._end:self._end + count] = data[:count]
+            self._end += count
+            data = data[count:]
+
+    def frames(self):
+        """Yield (FrameHeader, payload memoryview) for every complete frame buffered."""
+        while self._end - self._start >= HEADER.size:
+            header = FrameHeader(*HEADER.unpack_from(self._buffer, self._start))
+            if header.version != FRAME_VERSION:
+                raise FrameError(f"Unsupported frame version {header.version}")
+            frame_end = self._start + HEADER.size + payload_size(header.nbits)
+            if frame_end > self._end:
+                break
+            payload = self._view[self._start + HEADER.size:frame_end]
+            self._start = frame_end
+            yield header, payload
+        if self._start == self._end:
+            self._start = self._end = 0
+
+    def batches(self):
+        """
+        Yield every complete frame buffered as runs of equal-length frames,
+        each a (num_frames,) frame_dtype array viewing the buffer. Like
+        frames(), a run is only valid until the next recv_from()/feed().
+        """
+        while self._end - self._start >= HEADER.size:
+            header = FrameHeader(*HEADER.unpack_from(self._buffer, self._start))
+            if header.version != FRAME_VERSION:
+                raise FrameError(f"Unsupported frame version {header.version}")
+            nbits = header.nbits
+            dtype = frame_dtype(nbits)
+            count = (self._end - self._start) // dtype.itemsize
+            if count == 0:
+                break
+            run = np.frombuffer(self._buffer, dtype=dtype, count=count, offset=self._start)
+            # Cut at the first frame of another length; its header starts on a record boundary
+            same = (run["nbits"] == nbits) & (run["version"] == FRAME_VERSION)
+            if not same.all():
+                count = int(np.argmin(same))
+                run = run[:count]
+            self._start += count * dtype.itemsize
+            yield run
+        if self._start == self._end:
+            self._start = self._end = 0
@@ -0,0 +1,118 @@
+import numpy as np
+from collections import namedtuple
+
+DecodeResult = namedtuple("DecodeResult", ["data", "syndrome", "valid"])
+DecodeResult.__doc__ = """
+Result of HammingCodec.decode.
+
+    data: (N, k) corrected data bits.
+    syndrome: (N,) syndrome, i.e. the 1-based position of a single error (0 = no error).
+    valid: (N,) False where the syndrome points outside the (shortened) codeword.
+"""
+
+
+class HammingCodec:
+    """
+    Positional Hamming code with parity bits at positions 1, 2, 4, ..., 2^(r-1).
+
+    k data bits need the smallest r with 2^r >= k + r + 1, giving n = k + r; for
+    k = 64 this is the Hamming(71, 64) code used by sender.py / receiver.py, and
+    for k = 4 the classic Hamming(7, 4). Codewords shorter than 2^r - 1 are
+    shortened codes, so some syndromes do not map to a position.
+
+    The syndrome of a codeword is the XOR of the (1-based) positions of its set
+    bits, so encoding and decoding are a multiply and an XOR reduction over the
+    whole (N, n) batch.
+    """
+
+    def __init__(self, k=64):
+        r = 1
+        while (1 << r) < k + r + 1:
+            r += 1
+        self.k = k
+        self.r = r
+        self.n = k + r
+
+        positions = np.arange(1, self.n + 1)
+        is_parity = (positions & (positions - 1)) == 0
+        self.data_index = np.flatnonzero(~is_parity)
+        self.parity_index = np.flatnonzero(is_parity)  # parity_index[j] == 2**j - 1
+
+        pos_dtype = np.uint8 if self.n < 256 else np.uint16 if self.n < 65536 else np.uint32
+        self._positions = positions.astype(pos_dtype)
+        self._data_positions = self._positions[self.data_index]
+        self._parity_shifts = np.arange(r, dtype=pos_dtype)
+
+        # Data positions form contiguous runs between parity positions; copying
+        # runs as slices is much faster than a fancy-indexed column gather.
+        bounds = np.concatenate(([-1], self.parity_index, [self.n]))
+        self._data_runs = []
+        offset = 0
+        for start, stop in zip(bounds[:-1] + 1, bounds[1:]):
+            if stop > start:
+                self._data_runs.append((offset, offset + stop - start, start, stop))
+                offset += stop - start
+
+        # Parity-check matrix, row 0 is the MSB of the position (as in receiver.py)
+        self.H = ((positions[None, :] >> np.arange(r - 1, -1, -1)[:, None]) & 1).astype(np.uint8)
+        # Systematic generator over the positional layout: codeword = data @ G % 2
+        self.G = self.encode(np.eye(k, dtype=np.uint8))
+
+    def __repr__(self):
+        return f"HammingCodec(n={self.n}, k={self.k})"
+
+    def encode(self, data):
+        """Encode an (N, k) (or (k,)) bit array into (N, n) codewords."""
+        data = np.asarray(data, dtype=np.uint8)
+        squeeze = data.ndim == 1
+        data = np.atleast_2d(data)
+        if data.shape[1] != self.k:
+            raise ValueError(f"Input must have {self.k} bits per row")
+
+        codewords = np.empty((data.shape[0], self.n), dtype=np.uint8)
+        for d_start, d_stop, c_start, c_stop in self._data_runs:
+            codewords[:, c_start:c_stop] = data[:, d_start:d_stop]
+        parity = np.bitwise_xor.reduce(data * self._data_positions, axis=1)
+        for shift, index in zip(self._parity_shifts, self.parity_index):
+            codewords[:, index] = (parity >> shift) & 1
+        return codewords[0] if squeeze else codewords
+
+    def syndrome(self, codewords):
+        codewords = np.atleast_2d(np.asarray(codewords, dtype=np.uint8))
+        return np.bitwise_xor.reduce(codewords * self._positions, axis=1)
+
+    def decode(self, codewords):
+        """
+        Correct single-bit errors in an (N, n) (or (n,)) bit array.
+
+        Returns:
+            DecodeResult with the corrected data bits, the syndrome and a validity
+            mask. Rows with an out-of-range syndrome are left uncorrected.
+        """
+        codewords = np.asarray(codewords, dtype=np.uint8)
+        squeeze = codewords.ndim == 1
+        codewords = np.atleast_2d(codewords)
+        if codewords.shape[1] != self.n:
+            raise ValueError(f"Input must have {self.n} bits per row")
+
+        syndrome = self.syndrome(codewords)
+        valid = syndrome <= self.n
+        data = np.empty((codewords.shape[0], self.k), dtype=np.uint8)
+        for d_start, d_stop, c_start, c_stop in self._data_runs:
+            data[:, d_start:d_stop] = codewords[:, c_start:c_stop]
+
+        # Only errors on data positions change the decoded data
+        rows = np.flatnonzero(valid & (syndrome != 0))
+        error_pos = syndrome[rows].astype(np.intp) - 1
+        data_col = np.searchsorted(self.data_index, error_pos)
+        hit = data_col < self.k
+        hit[hit] = self.data_index[data_col[hit]] == error_pos[hit]
+        data[rows[hit], data_col[hit]] ^= 1
+
+        if squeeze:
+            return DecodeResult(data[0], syndrome[0], valid[0])
+        return DecodeResult(data, syndrome, valid)
+
+
+# Codec used on the sender/receiver link
+hamming_71_64 = HammingCodec(64)
@@ -0,0 +1,251 @@
+import numpy as np
+from scipy.optimize import brentq
+from scipy.special import erfc
+from scipy.stats import binom
+
+from codes import get_code
+from crc import get_crc
+from simulation import BATCH_SIZE, MAX_TRANSMISSIONS, NUM_BITS, get_codec
+
+MIXTURE = 0.9  # Share of the forced-weight proposal in ErrorPatterns (the rest is the true weight distribution)
+MAX_LR_MOMENT = 100.0  # Bound on E[weight^2] per transmission that picks NoiseScaling's default scale
+
+# Weighted indicators per packet; every key is summed as weight * value and (weight * value)^2
+ESTIMATE_KEYS = ("bler", "undetected", "residual_bler", "ber", "transmissions")
+
+
+# --- Proposal distributions ---
+# A sampler turns the (N, n) transmitted bits of one round into received hard
+# bits under a biased channel, together with the log likelihood ratio
+# log(p(rx) / q(rx)) of the true run.channel over the biased one per row; t is
+# the number of errors the block code corrects.
+def _noise_sigma(SNR):
+    """Noise standard deviation of run.channel, which sends levels 0/1 and slices at 1/2."""
+    return np.sqrt(1 / (2 * SNR))
+
+
+class NoiseScaling:
+    """
+    Gaussian noise of run.channel with its standard deviation multiplied by
+    scale. The likelihood ratio of one bit with noise sample x is
+    (scale * exp(-x^2 / (2 sigma^2))) / exp(-x^2 / (2 scale^2 sigma^2)).
+
+    E[weight^2] grows like (scale^2 / sqrt(2 scale^2 - 1))^n with the
+    codeword length n, so by default the scale is the largest one keeping it
+    below MAX_LR_MOMENT; the gain is moderate for long packets, where
+    ErrorPatterns does much better.
+    """
+
+    def __init__(self, scale=None):
+        self.scale = scale
+
+    def default_scale(self, n):
+        # Per-bit second moment s^2 / sqrt(2 s^2 - 1) raised to the n-th power
+        target = np.log(MAX_LR_MOMENT) / n
+        return brentq(lambda s: 2 * np.log(s) - 0.5 * np.log(2 * s * s - 1) - target, 1.0, 10.0)
+
+    def sample(self, tx, SNR, rng, t=1):
+        n = tx.shape[1]
+        scale = self.scale or self.default_scale(n)
+        z = rng.standard_normal(tx.shape)
+        rx = (tx + scale * _noise_sigma(SNR) * z > 0.5).astype(np.uint8)
+        log_weight = n * np.log(scale) - 0.5 * (scale * scale - 1) * (z * z).sum(axis=1)
+        return rx, log_weight
+
+
+class ErrorPatterns:
+    """
+    Forced error patterns. With hard decisions run.channel flips every bit
+    independently with p = Q(sqrt(SNR / 2)), so a received word is its number
+    of errors w (binomial) plus a uniformly random set of w positions. Only
+    the distribution of w is biased: it is drawn from
+        q(w) = mixture * uniform(1..max_weight) + (1 - mixture) * P(w)
+    and the positions uniformly, so the weight is P(w) / q(w). Mixing in P
+    keeps q > 0 wherever P > 0 (so the estimate is unbiased) and bounds every
+    weight by 1 / (1 - mixture). max_weight defaults to 2 (t + 2) for a code
+    correcting t errors.
+    """
+
+    def __init__(self, max_weight=None, mixture=MIXTURE):
+        self.max_weight = max_weight
+        self.mixture = mixture
+
+    def sample(self, tx, SNR, rng, t=1):
+        num_rows, n = tx.shape
+        p = 0.5 * erfc(np.sqrt(SNR) / 2)
+        weights = np.arange(n + 1)
+        true = binom.pmf(weights, n, p)
+        max_weight = min(self.max_weight or 2 * (t + 2), n)
+        forced = ((weights >= 1) & (weights <= max_weight)) / max_weight
+        proposal = self.mixture * forced + (1 - self.mixture) * true
+
+        w = rng.choice(weights, size=num_rows, p=proposal / proposal.sum())
+        # Rank of every position in a random order per row; the w lowest are flipped
+        ranks = rng.random(tx.shape).argsort(axis=1).argsort(axis=1)
+        rx = tx ^ (ranks < w[:, None]).astype(np.uint8)
+        with np.errstate(divide="ignore"):
+            log_weight = np.log(true[w]) - np.log(proposal[w])
+        return rx, log_weight
+
+
+SAMPLERS = {
+    "patterns": ErrorPatterns,
+    "variance": NoiseScaling,
+}
+
+
+# --- Simulation ---
+def empty_sums():
+    sums = {"packets": 0, "weight": 0.0, "weight_squared": 0.0}
+    for key in ESTIMATE_KEYS:
+        sums[key] = 0.0
+        sums[f"{key}_squared"] = 0.0
+    return sums
+
+
+def merge_sums(total, sums):
+    for key in total:
+        total[key] += sums[key]
+    return total
+
+
+def simulate_batch(SNR_dB, num_packets, sampler="patterns", num_bits=NUM_BITS,
+                   max_transmissions=MAX_TRANSMISSIONS, polynomial="CRC3", code=None, rng=None):
+    """
+    Importance-sampled counterpart of simulation.simulate_batch() for the
+    hard-decision chain CRC -> block code -> run.channel -> decode -> CRC
+    check with up to max_transmissions independent transmissions.
+
+    Every round of every packet is drawn from the biased channel of sampler
+    (a SAMPLERS name or sampler object) and the packet carries the product of
+    its rounds' likelihood ratios, so weight * indicator is an unbiased
+    sample of each quantity of ESTIMATE_KEYS:
+        bler: the first transmission fails (decoder or CRC).
+        undetected: the first transmission passes the CRC with wrong data.
+        residual_bler: the data handed over after the last round is wrong.
+        ber: fraction of wrong bits in that data.
+        transmissions: transmissions used.
+
+    Returns:
+        dict of weighted sums (see empty_sums()), which can be merged with merge_sums().
+    """
+    rng = np.random.default_rng(rng)
+    if isinstance(sampler, str):
+        sampler = SAMPLERS[sampler]()
+    crc = get_crc(polynomial)
+    codec = get_codec(num_bits) if code is None else get_code(code) if isinstance(code, str) else code
+    if codec.k != num_bits:
+        raise ValueError(f"Code {codec!r} carries {codec.k} data bits, not num_bits={num_bits}")
+    SNR = 10 ** (SNR_dB / 10)
+
+    data = rng.integers(0, 2, (num_packets, num_bits), dtype=np.uint8)
+    tx = np.concatenate((codec.encode(data), crc.compute_batch(data)), axis=1)
+
+    decoded = np.empty_like(data)
+    log_weight = np.zeros(num_packets)
+    attempts = np.zeros(num_packets, dtype=np.int64)
+    active = np.arange(num_packets)
+    for round_index in range(max_transmissions):
+        rx, round_log_weight = sampler.sample(tx[active], SNR, rng, t=getattr(codec, "t", 1))
+        log_weight[active] += round_log_weight
+        result = codec.decode(rx[:, :codec.n])
+        ok = result.valid & crc.check_batch(np.concatenate((result.data, rx[:, codec.n:]), axis=1))
+        decoded[active] = result.data
+        attempts[active] += 1
+        if round_index == 0:
+            first_weight = np.exp(round_log_weight)
+            first_failed = ~ok
+            first_undetected = ok & (result.data != data).any(axis=1)
+        active = active[~ok]
+        if active.size == 0:
+            break
+
+    weight = np.exp(log_weight)
+    wrong_bits = np.count_nonzero(decoded != data, axis=1)
+    values = {
+        "bler": first_weight * first_failed,
+        "undetected": first_weight * first_undetected,
+        "residual_bler": weight * (wrong_bits > 0),
+        "ber": weight * wrong_bits / num_bits,
+        "transmissions": weight * attempts,
+    }
+    sums = empty_sums()
+    sums.update(packets=num_packets, weight=float(weight.sum()), weight_squared=float((weight * weight).sum()))
+    for key, value in values.items():
+        sums[key] = float(value.sum())
+        sums[f"{key}_squared"] = float((value * value).sum())
+    return sums
+
+
+def simulate_importance(SNR_dB, num_packets, batch_size=BATCH_SIZE, rng=None, **kwargs):
+    """Run simulate_batch in batches of batch_size packets and return the merged sums."""
+    rng = np.random.default_rng(rng)
+    total = empty_sums()
+    for start in range(0, num_packets, batch_size):
+        merge_sums(total, simulate_batch(SNR_dB, min(batch_size, num_packets - start), rng=rng, **kwargs))
+    return total
+
+
+def estimate(sums, z=1.96):
+    """
+    Turn weighted sums into estimates. Per ESTIMATE_KEYS entry: the unbiased
+    mean "estimate", its "variance" and "std_error", "relative_error"
+    (std_error / estimate), a normal "ci" (default 95%) and "mc_packets", the
+    number of plain Monte Carlo packets with the same variance,
+    estimate (1 - estimate) / variance. "weight_mean" should be close to 1
+    and "effective_packets" is the Kish effective sample size of the weights.
+    """
+    packets = max(sums["packets"], 1)
+    result = {
+        "packets": sums["packets"],
+        "weight_mean": sums["weight"] / packets,
+        "effective_packets": sums["weight"] ** 2 / max(sums["weight_squared"], 1e-300),
+    }
+    for key in ESTIMATE_KEYS:
+        mean = sums[key] / packets
+        variance = max(sums[f"{key}_squared"] / packets - mean * mean, 0.0) / max(packets - 1, 1)
+        std_error = np.sqrt(variance)
+        result[key] = {
+            "estimate": mean,
+            "variance": variance,
+            "std_error": std_error,
+            "relative_error": std_error / mean if mean > 0 else float("inf"),
+            "ci": (max(0.0, mean - z * std_error), mean + z * std_error),
+            "mc_packets": mean * (1 - mean) / variance if variance > 0 and key != "transmissions" else float("nan"),
+        }
+    return result
+
+
+def importance_sweep(SNR_dB_values, num_packets, rng=None, **kwargs):
+    """Estimate every SNR point. Returns a list of estimate() dicts with an added "SNR_dB" key."""
+    rng = np.random.default_rng(rng)
+    results = []
+    for SNR_dB in SNR_dB_values:
+        result = estimate(simulate_importance(SNR_dB, num_packets, rng=rng, **kwargs))
+        result["SNR_dB"] = SNR_dB
+        results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    from analytic import harq_model
+    from simulation import simulate_harq, summarize
+
+    # Where plain Monte Carlo still sees errors, all three must agree
+    for SNR_dB in (10, 12):
+        plain = summarize(simulate_harq(SNR_dB, 1_000_000, rng=1))
+        for sampler in SAMPLERS:
+            r = estimate(simulate_importance(SNR_dB, 100_000, rng=2, sampler=sampler))
+            tolerance = 4 * np.sqrt(r["bler"]["variance"] + plain["bler"] * (1 - plain["bler"]) / 1_000_000)
+            assert abs(r["bler"]["estimate"] - plain["bler"]) < tolerance, (SNR_dB, sampler, r["bler"], plain["bler"])
+            print(f"SNR {SNR_dB} dB {sampler:>8}: BLER {r['bler']['estimate']:.3e} +- {r['bler']['std_error']:.1e} "
+                  f"(plain MC over 1e6 packets: {plain['bler']:.3e}), weight mean {r['weight_mean']:.3f}")
+
+    print("High SNR, 100k packets each:")
+    for r in importance_sweep(range(14, 24, 2), 100_000, rng=3):
+        bler, undetected = r["bler"], r["undetected"]
+        model = harq_model(r["SNR_dB"])
+        print(f"SNR {r['SNR_dB']:2d} dB: BLER {bler['estimate']:.3e} (rel. err {bler['relative_error']:.1%}, "
+              f"model {float(model['bler']):.3e}, plain MC needs {bler['mc_packets']:.1e} packets), "
+              f"undetected {undetected['estimate']:.3e} (rel. err {undetected['relative_error']:.1%}), "
+              f"residual {r['residual_bler']['estimate']:.3e}")
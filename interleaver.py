@@ -0,0 +1,123 @@
+import numpy as np
+from functools import lru_cache
+
+# Inter-column permutation of the 3GPP LTE sub-block interleaver (TS 36.212, table 5.1.4-1)
+SUBBLOCK_COLUMNS = 32
+SUBBLOCK_PERMUTATION = (0, 16, 8, 24, 4, 20, 12, 28, 2, 18, 10, 26, 6, 22, 14, 30,
+                        1, 17, 9, 25, 5, 21, 13, 29, 3, 19, 11, 27, 7, 23, 15, 31)
+
+
+class Interleaver:
+    """
+    Fixed permutation of the last axis: interleave(x)[..., i] = x[..., perm[i]].
+
+    The permutation and its inverse are computed once; interleave() and
+    deinterleave() are then a single gather over a whole (N, n) batch (or any
+    array whose last axis has length n). The constructor checks that perm is
+    a permutation of 0..n-1 and that the inverse undoes it.
+    """
+
+    def __init__(self, perm):
+        perm = np.asarray(perm, dtype=np.intp)
+        n = perm.size
+        if perm.ndim != 1 or not np.array_equal(np.sort(perm), np.arange(n)):
+            raise ValueError("perm must be a permutation of 0..n-1")
+        self.n = n
+        self.perm = perm
+        self.inverse = np.empty_like(perm)
+        self.inverse[perm] = np.arange(n)
+        if not np.array_equal(perm[self.inverse], np.arange(n)):
+            raise ValueError("Inverse permutation does not round-trip")
+
+    def __repr__(self):
+        return f"{type(self).__name__}(n={self.n})"
+
+    def _check(self, x):
+        x = np.asarray(x)
+        if x.shape[-1] != self.n:
+            raise ValueError(f"Expected {self.n} values on the last axis, got {x.shape[-1]}")
+        return x
+
+    def interleave(self, x):
+        return np.take(self._check(x), self.perm, axis=-1)
+
+    def deinterleave(self, x):
+        return np.take(self._check(x), self.inverse, axis=-1)
+
+
+class BlockInterleaver(Interleaver):
+    """
+    Row/column block interleaver: bits are written row by row into a
+    rows x ceil(n / rows) matrix and read column by column. Positions past n
+    in the last row are skipped (pruned), so any n works. rows defaults to
+    ceil(sqrt(n)).
+    """
+
+    def __init__(self, n, rows=None):
+        self.rows = rows or int(np.ceil(np.sqrt(n)))
+        self.cols = -(-n // self.rows)
+        order = np.arange(self.rows * self.cols).reshape(self.rows, self.cols).T.ravel()
+        super().__init__(order[order < n])
+
+
+class RandomInterleaver(Interleaver):
+    """Pseudo-random permutation drawn from np.random.default_rng(seed); both ends must use the same seed."""
+
+    def __init__(self, n, seed=0):
+        self.seed = seed
+        super().__init__(np.random.default_rng(seed).permutation(n))
+
+
+class SubBlockInterleaver(Interleaver):
+    """
+    3GPP LTE sub-block interleaver (TS 36.212 section 5.1.4.1.1): bits are
+    written row by row into a 32-column matrix that is padded with dummy bits
+    at the front, the columns are permuted by SUBBLOCK_PERMUTATION and the
+    matrix is read column by column with the dummy bits pruned.
+    """
+
+    def __init__(self, n):
+        rows = -(-n // SUBBLOCK_COLUMNS)
+        num_dummy = rows * SUBBLOCK_COLUMNS - n
+        matrix = np.arange(rows * SUBBLOCK_COLUMNS).reshape(rows, SUBBLOCK_COLUMNS) - num_dummy
+        order = matrix[:, SUBBLOCK_PERMUTATION].T.ravel()
+        super().__init__(order[order >= 0])
+
+
+INTERLEAVERS = {
+    "block": BlockInterleaver,
+    "random": RandomInterleaver,
+    "subblock": SubBlockInterleaver,
+}
+
+
+@lru_cache(maxsize=None)
+def get_interleaver(kind, n, **kwargs):
+    """Shared interleaver per (kind, n, parameters), so permutations are only built once."""
+    if kind not in INTERLEAVERS:
+        raise KeyError(f"Unknown interleaver {kind!r}; known: {', '.join(INTERLEAVERS)}")
+    return INTERLEAVERS[kind](n, **kwargs)
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    for n in (1, 7, 10, 32, 74, 75, 1000):
+        for kind in INTERLEAVERS:
+            interleaver = get_interleaver(kind, n)
+            x = rng.integers(0, 2, (1000, n), dtype=np.uint8)
+            assert np.array_equal(interleaver.deinterleave(interleaver.interleave(x)), x), (kind, n)
+            assert np.array_equal(interleaver.interleave(interleaver.deinterleave(x)), x), (kind, n)
+
+    # Row/column interleaving of a group of codewords is a transpose
+    codewords = rng.integers(0, 2, (4, 10))
+    assert np.array_equal(BlockInterleaver(40, rows=4).interleave(codewords.ravel()), codewords.T.ravel())
+
+    x = rng.integers(0, 2, (1_000_000, 74), dtype=np.uint8)
+    for kind in INTERLEAVERS:
+        interleaver = get_interleaver(kind, 74)
+        start = time.perf_counter()
+        interleaver.deinterleave(interleaver.interleave(x))
+        print(f"{kind:>8}: round trip of {x.shape} in {time.perf_counter() - start:.3f} s")
+    print("All interleavers OK")
@@ -0,0 +1,226 @@
+import json
+import os
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram bucket upper bounds
+DECODE_SECONDS_BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 1e-2)
+RTT_SECONDS_BUCKETS = (1e-4, 5e-4, 1e-3, 5e-3, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+CORRECTIONS_BUCKETS = (0, 1, 2, 4, 8)
+ATTEMPTS_BUCKETS = (1, 2, 3, 4, 6, 8)
+SNAPSHOT_INTERVAL = 5.0  # Seconds between snapshot file writes
+
+
+# --- Metric types ---
+# Updates are plain attribute arithmetic so they are cheap enough for the
+# per-frame path; readers on other threads may see a value that is one update
+# behind, which is fine for monitoring.
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help=""):
+        self.name = name
+        self.help = help
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def samples(self):
+        return [(self.name, "", self.value)]
+
+    def snapshot(self):
+        return self.value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value):
+        self.value = value
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+
+class Histogram:
+    """Fixed-bucket histogram; buckets are the (inclusive) upper bounds, +Inf is implied."""
+    kind = "histogram"
+
+    def __init__(self, name, help="", buckets=DECODE_SECONDS_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self):
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            samples.append((f"{self.name}_bucket", f'{{le="{le}"}}', cumulative))
+        samples.append((f"{self.name}_sum", "", self.sum))
+        samples.append((f"{self.name}_count", "", self.count))
+        return samples
+
+    def snapshot(self):
+        return {"buckets": dict(zip(map(str, self.buckets + ("+Inf",)), self.counts)),
+                "sum": self.sum, "count": self.count}
+
+
+class Registry:
+    """Named metrics; asking for an existing name returns the same object, so several links can share them."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name!r} already exists as a {metric.kind}")
+            return metric
+
+    def counter(self, name, help=""):
+        return self._get(Counter, name, help)
+
+    def gauge(self, name, help=""):
+        return self._get(Gauge, name, help)
+
+    def histogram(self, name, help="", buckets=DECODE_SECONDS_BUCKETS):
+        return self._get(Histogram, name, help, buckets=buckets)
+
+    def render(self):
+        """Prometheus text exposition format."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{name}{labels} {value}" for name, labels, value in metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        return {name: metric.snapshot() for name, metric in list(self._metrics.items())}
+
+    def write_snapshot(self, path):
+        """Write snapshot() as JSON, replacing the file atomically so readers never see a partial write."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.snapshot(), f, indent=1)
+        os.replace(tmp_path, path)
+
+
+REGISTRY = Registry()
+
+
+# --- Exporters ---
+def serve_metrics(port, host="127.0.0.1", registry=REGISTRY):
+    """
+    Serve registry.render() at http://host:port/metrics from a daemon thread.
+    Returns the server; call server.shutdown() to stop it.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # keep scrapes out of the program's output
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class SnapshotWriter:
+    """Write registry snapshots to a JSON file every `interval` seconds (and once more on stop())."""
+
+    def __init__(self, path, interval=SNAPSHOT_INTERVAL, registry=REGISTRY):
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.registry.write_snapshot(self.path)
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.registry.write_snapshot(self.path)
+
+
+def start_exporters(metrics_port=None, snapshot_path=None, snapshot_interval=SNAPSHOT_INTERVAL, registry=REGISTRY):
+    """Start the HTTP endpoint and/or snapshot writer that are configured. Returns a function that stops them."""
+    server = serve_metrics(metrics_port, registry=registry) if metrics_port is not None else None
+    writer = SnapshotWriter(snapshot_path, snapshot_interval, registry) if snapshot_path else None
+
+    def stop():
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+        if writer is not None:
+            writer.stop()
+    return stop
+
+
+# --- HARQ link metrics ---
+class ReceiverMetrics:
+    def __init__(self, registry=REGISTRY, prefix="harq_receiver"):
+        counter, gauge, histogram = registry.counter, registry.gauge, registry.histogram
+        self.frames = counter(f"{prefix}_frames_total", "Data frames received")
+        self.lost = counter(f"{prefix}_lost_frames_total", "Data frames dropped by the simulated loss model")
+        self.retransmissions = counter(f"{prefix}_retransmissions_total", "Frames that were retransmissions")
+        self.crc_pass = counter(f"{prefix}_crc_pass_total", "Decodes whose CRC passed")
+        self.crc_fail = counter(f"{prefix}_crc_fail_total", "Decodes whose CRC failed")
+        self.uncorrectable = counter(f"{prefix}_uncorrectable_total", "Decodes with an out-of-range syndrome")
+        self.delivered = counter(f"{prefix}_delivered_total", "Packets delivered in sequence order")
+        self.given_up = counter(f"{prefix}_given_up_total", "Packets delivered without passing CRC")
+        self.decode_seconds = histogram(f"{prefix}_decode_seconds", "Soft combining + decode + CRC time per frame",
+                                        DECODE_SECONDS_BUCKETS)
+        self.corrections = histogram(f"{prefix}_corrections_per_packet",
+                                     "Bits corrected by the block decoder per packet (all its codewords)",
+                                     CORRECTIONS_BUCKETS)
+        self.attempts = histogram(f"{prefix}_attempts_per_packet", "Transmissions received per finished packet",
+                                  ATTEMPTS_BUCKETS)
+        self.reorder_depth = gauge(f"{prefix}_reorder_queue_depth", "Packets waiting for in-order delivery")
+        self.active_processes = gauge(f"{prefix}_active_processes", "HARQ processes with a packet in progress")
+        self.heap_blocks = gauge(f"{prefix}_heap_blocks", "Python heap blocks in use (sys.getallocatedblocks) after a batch")
+
+
+class SenderMetrics:
+    def __init__(self, registry=REGISTRY, prefix="harq_sender"):
+        counter, gauge, histogram = registry.counter, registry.gauge, registry.histogram
+        self.transmissions = counter(f"{prefix}_transmissions_total", "Data frames sent, including retransmissions")
+        self.timeouts = counter(f"{prefix}_timeouts_total", "ACK timers that expired")
+        self.acks = counter(f"{prefix}_acks_total", "ACKs received")
+        self.nacks = counter(f"{prefix}_nacks_total", "NACKs received")
+        self.dropped = counter(f"{prefix}_dropped_total", "Packets dropped after the maximum number of attempts")
+        self.rtt_seconds = histogram(f"{prefix}_rtt_seconds", "Time from a transmission to its ACK/NACK",
+                                     RTT_SECONDS_BUCKETS)
+        self.attempts = histogram(f"{prefix}_attempts_per_packet", "Transmissions per finished packet",
+                                  ATTEMPTS_BUCKETS)
+        self.in_flight = gauge(f"{prefix}_in_flight", "HARQ processes waiting for feedback")
+        self.mcs = gauge(f"{prefix}_mcs", "MCS level of the last packet started by link adaptation")
@@ -1,152 +1,425 @@
+import logging
+import os
 import socket
+import sys
+import time
 import numpy as np
-import random
+
+from adaptation import MCS_TABLE, get_mcs
+from channels import BernoulliLoss, BscChannel
+from combining import INT8_SCALE, SoftBuffer
+from crc import get_crc
+from frame import (FLAG_ACK, FLAG_NACK, FRAME_VERSION, HEADER_DTYPE, FrameReader, decode_payloads,
+                   encode_feedback)
+from hamming import hamming_71_64
+from metrics import ReceiverMetrics, start_exporters
+from results import ResultWriter
+
+logger = logging.getLogger(__name__)
 
 # Max transmission attempts
 MAX_TRANSMISSION = 4
+NUM_PROCESSES = 8  # Parallel HARQ processes (must match the sender's window)
+MAX_PROCESSES = 256  # HARQ process ids that fit in the frame header
 polynomial = "1101"
 loss_packet = 0.05
 error = 0.02
-
-# CRC calculation
-def crc_remainder(input_bitstring, polynomial_bitstring):
-    polynomial_bitstring = polynomial_bitstring.lstrip('0')
-    len_input = len(input_bitstring)
-    input_padded_array = list(input_bitstring + '0' * (len(polynomial_bitstring) - 1))
-    while '1' in input_padded_array[:len_input]:
-        cur_shift = input_padded_array.index('1')
-        for i in range(len(polynomial_bitstring)):
-            input_padded_array[cur_shift + i] = str(int(polynomial_bitstring[i] != input_padded_array[cur_shift + i]))
-    remainder = ''.join(input_padded_array)[len_input:]
-    return remainder
-
-def validate_crc(data_with_crc, polynomial=polynomial):
-    data_with_crc_bitstring = ''.join(map(str, data_with_crc))
-    remainder = crc_remainder(data_with_crc_bitstring, polynomial)
-    return int(remainder) == 0
+METRICS_PORT = 9105  # Prometheus text endpoint of `python receiver.py`
 
 # Hamming encode/decoder
 def hamming_decode(encoded_data_with_crc):
-    encoded_data = np.array(encoded_data_with_crc[:71], copy=True)  # Tạo bản sao có thể chỉnh sửa
-    crc_bits = encoded_data_with_crc[71:]  # CRC bits
+    encoded_data = np.asarray(encoded_data_with_crc[:71])
+    crc_bits = np.asarray(encoded_data_with_crc[71:])  # CRC bits
 
     if len(encoded_data) != 71:
         raise ValueError("Dữ liệu đầu vào phải có 71 bit")
-    
-    # Ma trận kiểm tra H (7 x 71)
-    H = np.array([[int(bit) for bit in format(i + 1, '07b')] for i in range(71)]).T
 
-    # Tính hội chứng (syndrome)
-    syndrome = np.dot(H, encoded_data) % 2
-    error_position = int(''.join(map(str, syndrome)), 2)  # Chuyển hội chứng sang vị trí lỗi
+    data_bits, syndrome, valid = hamming_71_64.decode(encoded_data)
+    if not valid:
+        logger.debug("Error position %d is out of bounds, skipping correction.", syndrome)
+        return None  # Trả về None nếu vị trí lỗi không hợp lệ
 
-    # Nếu có lỗi (error_position != 0), sửa lỗi
-    corrected_bits = encoded_data.copy()
+    decoded_data = np.concatenate([data_bits, crc_bits])
+    return decoded_data
 
-    if error_position != 0:
-        if error_position <= len(corrected_bits):  # Kiểm tra vị trí lỗi có hợp lệ không
-            corrected_bits[error_position - 1] ^= 1  # Lật bit tại vị trí lỗi
-        else:
-            print(f"[Receiver] Error position {error_position} is out of bounds, skipping correction.")
-            return None  # Trả về None nếu vị trí lỗi không hợp lệ
 
-    # Loại bỏ các bit kiểm tra (chỉ lấy 64 bit dữ liệu)
-    decoded_bits = []
-    for i in range(71):
-        if (i + 1) & i != 0:  # Loại bỏ các vị trí 2^i
-            decoded_bits.append(corrected_bits[i])
+class HarqReceiver:
+    """
+    Receiver side of N parallel stop-and-wait HARQ processes.
 
-    # Extract data bits after correction
-    data_bits = np.array(decoded_bits)
-    decoded_data = np.concatenate([data_bits, crc_bits])
+    Each HARQ process keeps the state of the packet it is currently receiving:
+    attempt counter, soft buffer and the last (failed) decode. Every attempt's
+    LLRs are added to the process's row of a preallocated SoftBuffer (Chase
+    combining) and the packet is decoded from the combined LLRs with the
+    adaptation.MCS_TABLE level named in the frame header; the feedback reports
+    how many bits the decoder corrected. Packets are
+    delivered in sequence-number order to `received_packets` (if keep_packets)
+    and to `writer` (a results.ResultWriter), if given. A packet that
+    never passes CRC is delivered with its last decode once the sender has moved
+    on, i.e. when its process starts a new packet, after MAX_TRANSMISSION
+    attempts, or when it falls out of the sender's window. Counters and
+    histograms go to `metrics` (a metrics.ReceiverMetrics, by default on the
+    shared metrics.REGISTRY).
 
-    return decoded_data
+    With the default int8 soft buffer, buffer_scale (buffer steps per unit
+    LLR) defaults to SoftBuffer.scale_for() the channel's llr_range(), so
+    max_transmission attempts add up without clipping; channels without an
+    llr_range() use combining.INT8_SCALE.
+    """
 
+    def __init__(self, loss_packet=loss_packet, error=error, window=NUM_PROCESSES,
+                 max_transmission=MAX_TRANSMISSION, buffer_dtype=np.int8, buffer_scale=None,
+                 channel=None, SNR_dB=None, rng=None, writer=None, keep_packets=True, metrics=None):
+        self.buffer_dtype = buffer_dtype
+        # Simulated link: by default a BSC with crossover probability `error`
+        # and independent packet loss with probability `loss_packet`
+        if channel is None:
+            channel = BscChannel(error, loss=BernoulliLoss(loss_packet))
+        self.channel = channel
+        self.SNR = None if SNR_dB is None else 10 ** (SNR_dB / 10)
+        self.rng = np.random.default_rng(rng)
+        self.window = window
+        self.max_transmission = max_transmission
+        if buffer_scale is None:
+            llr_range = getattr(self.channel, "llr_range", lambda SNR: None)(self.SNR)
+            buffer_scale = SoftBuffer.scale_for(llr_range, max_transmission) if llr_range else INT8_SCALE
+        self.buffer_scale = buffer_scale
+        self.metrics = metrics or ReceiverMetrics()
 
-# Receiver function with packet loss and bit error simulation
-def receiver(host_ip, host_port, loss_packet=loss_packet, error=error):
-    receiver_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    receiver_socket.bind((host_ip, host_port))
-    receiver_socket.listen(1)
+        self.processes = {}  # process id -> {"seq", "attempts", "decoded"}
+        self.soft_buffer = None  # LLRs per process id, allocated on the first frame
+        self._bit_buffer = np.empty(0, dtype=np.uint8)  # on_batch() input bits, reused
+        self._feedback_bytes = bytearray()  # on_batch() feedback frames, reused
+        self._feedback = np.frombuffer(self._feedback_bytes, dtype=HEADER_DTYPE)
+        self.ready = {}  # seq -> (decoded data or None, attempts, crc_ok) awaiting in-order delivery
+        self.next_seq = 0
+        self.writer = writer
+        self.keep_packets = keep_packets
+        self.received_packets = []  # Delivered packets, in sequence order
+        self.delivered = 0
 
-    print(f"[Receiver] Listening on {host_ip}:{host_port}...")
-    conn, addr = receiver_socket.accept()
-    print(f"[Receiver] Connected by {addr}")
+        self.total_packets = 0
+        self.lost_packets = 0
+        self.retransmissions = 0
 
-    total_packets = 0
-    lost_packets = 0
-    retransmission = 0  # Initialize retransmission counter
-    combined_signal = None  # Initialize combined_signal variable
-    received_packets = []  # List to store the received packets
+    def _evict(self, process):
+        state = self.processes.pop(process)
+        if state["seq"] >= self.next_seq and state["seq"] not in self.ready:
+            if state["decoded"] is not None:
+                logger.debug("Giving up on packet %d. Storing corrupted packet...", state["seq"])
+            self.metrics.given_up.inc()
+            self.metrics.attempts.observe(state["attempts"])
+            self.ready[state["seq"]] = (state["decoded"], state["attempts"], False)
 
-    while True:
-        received_data = conn.recv(512)
-        if not received_data:
-            break
+    def _expire(self, last_finished_seq):
+        # The sender only starts packet s once every packet <= s - window is finished
+        for process in [p for p, state in self.processes.items() if state["seq"] <= last_finished_seq]:
+            self._evict(process)
+        for seq in range(self.next_seq, last_finished_seq + 1):
+            self.ready.setdefault(seq, (None, 0, False))
 
-        # Simulate packet loss
-        if random.random() < loss_packet:
-            lost_packets += 1
-            total_packets += 1
-            retransmission += 1
-            print("[Receiver] Packet lost")
-            continue  # Do not process lost packet
-        
-        encoded_data = np.frombuffer(received_data, dtype=np.uint8)
-        print(f"---[Receiver] Received data from sender---")
-        print(f"[Receiver] Data length: {len(encoded_data)}")
-
-        encoded_data = encoded_data.tolist()[::4]
-        
-        # Simulate bit errors
-        corrupted_data = []
-        for bit in encoded_data:
-            corrupted_bit = bit
-            if random.random() < error:
-                corrupted_bit = 1 - bit  # Flip bit if error occurs
-            corrupted_data.append(corrupted_bit)
-
-        # Combine the corrupted data if there's already data stored in combined_signal
-        if combined_signal is None:
-            combined_signal = corrupted_data
+    def _deliver(self):
+        while self.next_seq in self.ready:
+            data, attempts, crc_ok = self.ready.pop(self.next_seq)
+            if data is not None:
+                self.delivered += 1
+                self.metrics.delivered.inc()
+                if self.keep_packets:
+                    self.received_packets.append(data)
+                if self.writer is not None:
+                    self.writer.append(self.next_seq, data, attempts, crc_ok)
+            self.next_seq += 1
+
+    def flush(self):
+        """Deliver everything still buffered, e.g. when the connection closes."""
+        for process in list(self.processes):
+            self._evict(process)
+        for seq in sorted(self.ready):
+            self.next_seq = max(self.next_seq, seq)
+            self._deliver()
+
+    def _start_attempt(self, seq, process):
+        """
+        Bookkeeping before a data frame is decoded. Returns the process state
+        with the attempt counted, or None for a retransmission of a packet that
+        is already delivered (e.g. after a sender timeout), which is just ACKed.
+        """
+        self._expire(seq - self.window)
+
+        state = self.processes.get(process)
+        if state is not None and state["seq"] != seq:
+            self._evict(process)  # the sender has moved this process to a new packet
+            state = None
+        if state is None:
+            if seq < self.next_seq or seq in self.ready:
+                return None
+            state = self.processes[process] = {"seq": seq, "attempts": 0, "decoded": None}
         else:
-            combined_signal = np.maximum(combined_signal, corrupted_data)  # Combine using bitwise OR
+            self.retransmissions += 1
+            self.metrics.retransmissions.inc()
+        state["attempts"] += 1
+        return state
 
-        try:
-            decoded_data_with_crc = hamming_decode(corrupted_data)
-            if decoded_data_with_crc is None:
-                print("[Receiver] Skipping corrupted data due to invalid error position.")
-                retransmission += 1
-                continue
+    def _combine(self, processes, llr, first):
+        """
+        Chase combining: add the LLRs of this attempt to the soft buffer rows of
+        `processes` (rows with `first` set are cleared first) and return the
+        hard decisions of the combined LLRs. The buffer is sized for the
+        longest MCS level, so packets of any level fit.
+        """
+        n = llr.shape[-1]
+        if self.soft_buffer is None or self.soft_buffer.n < n:
+            longest = max(mcs.tx_bits for mcs in MCS_TABLE)
+            self.soft_buffer = SoftBuffer(MAX_PROCESSES, max(n, longest), dtype=self.buffer_dtype,
+                                          scale=self.buffer_scale)
+        self.soft_buffer.reset(processes[first])
+        self.soft_buffer.combine(processes, llr, np.arange(n))
+        return (self.soft_buffer.llr(processes)[:, :n] < 0).astype(np.uint8)
 
-            # Attempt to validate CRC and determine the outcome
-            if validate_crc(decoded_data_with_crc):
-                print("[Receiver] CRC validation passed. Sending ACK...")
-                received_packets.append(decoded_data_with_crc[:64])  # Save the packet in the list
-                combined_signal = None
-                conn.sendall("ACK".encode())
+    def _finish_attempt(self, seq, process, state, decoded, valid, corrections, crc_ok):
+        """Bookkeeping after a data frame is decoded. Returns True to ACK."""
+        metrics = self.metrics
+        ack = False
+        if not valid:
+            metrics.uncorrectable.inc()
+            logger.debug("Skipping corrupted packet %d: uncorrectable syndrome.", seq)
+        else:
+            metrics.corrections.observe(corrections)
+            if crc_ok:
+                logger.debug("CRC validation passed for packet %d (process %d). Sending ACK...", seq, process)
+                metrics.crc_pass.inc()
+                metrics.attempts.observe(state["attempts"])
+                self.processes.pop(process)
+                self.ready[seq] = (decoded[:64], state["attempts"], True)  # Save the packet
+                ack = True
             else:
-                print("[Receiver] CRC validation failed. Sending NACK...")
-                conn.sendall("NACK".encode())
-                # Check if the maximum transmission attempts have been reached
-                if retransmission == MAX_TRANSMISSION:
-                    print(f"[Receiver] Max transmission attempts reached for packet {total_packets}. Storing packet...")
-                    received_packets.append(decoded_data_with_crc[:64])  # Save the corrupted packet after max attempts
-                    combined_signal = None
-                retransmission += 1
+                logger.debug("CRC validation failed for packet %d (process %d). Sending NACK...", seq, process)
+                metrics.crc_fail.inc()
+                state["decoded"] = decoded[:64]
 
+        # Check if the maximum transmission attempts have been reached
+        if not ack and state["attempts"] >= self.max_transmission:
+            self._evict(process)
+        return ack
+
+    def _decode(self, mcs, combined, seqs):
+        """Decode rows of hard bits sent at MCS level `mcs`. Returns (data with CRC, valid, corrections, crc_ok)."""
+        try:
+            decoded, valid, corrections = get_mcs(mcs).decode(combined)
         except ValueError as e:
-            print(f"[Receiver] Decoding error: {e}. Sending NACK...")
-            conn.sendall("NACK".encode())
-            retransmission += 1
+            logger.warning("Decoding error on packet(s) %s: %s. Sending NACK...", seqs, e)
+            failed = np.zeros(len(combined), dtype=bool)
+            return None, failed, np.zeros(len(combined), dtype=np.int64), failed
+        crc = get_crc(polynomial)
+        # The table-driven scalar check is much cheaper than the batch setup for a single frame
+        crc_ok = crc.check_batch(decoded) if len(decoded) > 1 else np.array([crc.check(decoded[0])])
+        return decoded, valid, corrections, valid & crc_ok
+
+    def on_frame(self, header, encoded_data):
+        """Process one data frame. Returns the feedback frame to send, or None if the frame was lost."""
+        metrics = self.metrics
+        self.total_packets += 1
+        metrics.frames.inc()
+
+        # Simulate packet loss
+        if self.channel.lost(1, self.rng)[0]:
+            self.lost_packets += 1
+            metrics.lost.inc()
+            logger.debug("Packet %d lost", header.seq)
+            return None  # Do not process lost packet
+
+        seq, process = header.seq, header.process
+        state = self._start_attempt(seq, process)
+        if state is None:
+            self._deliver()
+            return encode_feedback(seq, process, ack=True)
+        start = time.perf_counter()
+
+        # Simulate the channel (bit errors / noise) for the whole codeword at once
+        llr = self.channel(encoded_data, self.SNR, rng=self.rng, soft=True)
+        combined = self._combine(np.array([process]), llr[None], np.array([state["attempts"] == 1]))
+        decoded, valid, corrections, crc_ok = self._decode(header.mcs, combined, seq)
+        metrics.decode_seconds.observe(time.perf_counter() - start)
+
+        corrections = int(corrections[0])
+        ack = self._finish_attempt(seq, process, state, None if decoded is None else decoded[0],
+                                   valid[0], corrections, crc_ok[0])
+        self._deliver()
+        metrics.reorder_depth.set(len(self.ready))
+        metrics.active_processes.set(len(self.processes))
+        return encode_feedback(seq, process, ack, corrections)
+
+    def on_batch(self, frames):
+        """
+        Process a run of data frames of equal length: a (num_frames,)
+        frame.frame_dtype array such as FrameReader.batches() yields.
+
+        Payloads are unpacked into a reusable bit buffer, and the channel,
+        Chase combining, decoding and CRC check run once over all frames of
+        the run (per MCS level). Frames are bookkept in order exactly as by
+        on_frame(); the run is split where a frame depends on the decode of
+        an earlier one (same HARQ process, or far enough ahead to expire it).
+        That bookkeeping is still a Python loop over the frames (process
+        states, sequence numbers and the rows of each part of the run), but
+        the feedback records are filled from per-frame arrays in one step.
+
+        Returns:
+            the feedback frames in frame order, concatenated, as a memoryview
+            into a buffer that is reused by the next call.
+        """
+        metrics = self.metrics
+        num_frames = len(frames)
+        self.total_packets += num_frames
+        metrics.frames.inc(num_frames)
+        if num_frames == 0:
+            return memoryview(b"")
+
+        # Reusable input bit and feedback buffers, grown to the largest run seen
+        nbits = int(frames["nbits"][0])
+        payload_bytes = frames.dtype["payload"].shape[0]
+        if self._bit_buffer.size < num_frames * payload_bytes * 8:
+            self._bit_buffer = np.empty(num_frames * payload_bytes * 8, dtype=np.uint8)
+        if len(self._feedback) < num_frames:
+            self._feedback_bytes = bytearray(num_frames * HEADER_DTYPE.itemsize)
+            self._feedback = np.frombuffer(self._feedback_bytes, dtype=HEADER_DTYPE)
+        bits = decode_payloads(frames["payload"], nbits, out=self._bit_buffer)
+
+        lost = self.channel.lost(num_frames, self.rng)
+        seqs, processes = frames["seq"].tolist(), frames["process"].tolist()
+        # Per frame: whether it gets feedback (every frame that is not lost), ACK and corrected bits
+        answered = ~lost
+        acked = np.zeros(num_frames, dtype=bool)
+        corrected = np.zeros(num_frames, dtype=np.int64)
+        first = np.zeros(num_frames, dtype=bool)
+
+        index = 0
+        while index < num_frames:
+            rows, states, busy = [], [], set()
+            oldest = None
+            while index < num_frames:
+                seq, process = seqs[index], processes[index]
+                if lost[index]:
+                    self.lost_packets += 1
+                    metrics.lost.inc()
+                    logger.debug("Packet %d lost", seq)
+                    index += 1
+                    continue
+                if process in busy or (oldest is not None and seq - self.window >= oldest):
+                    break  # needs the decode results of this part of the run first
+                state = self._start_attempt(seq, process)
+                if state is None:
+                    acked[index] = True
+                else:
+                    busy.add(process)
+                    rows.append(index)
+                    states.append(state)
+                    first[index] = state["attempts"] == 1
+                    oldest = seq if oldest is None else min(oldest, seq)
+                index += 1
+            if not rows:
+                continue
+
+            start = time.perf_counter()
+            rows = np.array(rows)
+            llr = self.channel(bits[rows], self.SNR, rng=self.rng, soft=True)
+            combined = self._combine(frames["process"][rows].astype(np.intp), llr, first[rows])
+
+            crc_width = get_crc(polynomial).width
+            decoded = np.zeros((len(rows), 64 + crc_width), dtype=np.uint8)
+            valid = np.zeros(len(rows), dtype=bool)
+            crc_ok = np.zeros(len(rows), dtype=bool)
+            corrections = np.zeros(len(rows), dtype=np.int64)
+            row_levels = frames["mcs"][rows]
+            for level in np.unique(row_levels).tolist():
+                group = np.flatnonzero(row_levels == level)
+                group_decoded, valid[group], corrections[group], crc_ok[group] = self._decode(
+                    level, combined[group], frames["seq"][rows[group]])
+                if group_decoded is not None:
+                    decoded[group] = group_decoded
+            elapsed = (time.perf_counter() - start) / len(rows)
+            corrected[rows] = corrections
+
+            for i, (row, state, row_valid, row_corrections, row_crc_ok) in enumerate(
+                    zip(rows.tolist(), states, valid.tolist(), corrections.tolist(), crc_ok.tolist())):
+                metrics.decode_seconds.observe(elapsed)
+                acked[row] = self._finish_attempt(seqs[row], processes[row], state, decoded[i], row_valid,
+                                                  row_corrections, row_crc_ok)
+            self._deliver()
+
+        self._deliver()
+        metrics.reorder_depth.set(len(self.ready))
+        metrics.active_processes.set(len(self.processes))
+        metrics.heap_blocks.set(sys.getallocatedblocks())
+
+        answered = np.flatnonzero(answered)
+        count = len(answered)
+        feedback = self._feedback[:count]
+        feedback["version"] = FRAME_VERSION
+        feedback["process"] = frames["process"][answered]
+        feedback["rv"] = 0
+        feedback["flags"] = np.where(acked[answered], FLAG_ACK, FLAG_NACK)
+        feedback["mcs"] = 0
+        feedback["corrections"] = np.minimum(corrected[answered], 0xFF)
+        feedback["seq"] = frames["seq"][answered]
+        feedback["nbits"] = 0
+        return memoryview(self._feedback_bytes)[:count * HEADER_DTYPE.itemsize]
+
+
+# Receiver function with packet loss and bit error simulation
+def receiver(host_ip, host_port, loss_packet=loss_packet, error=error, window=NUM_PROCESSES,
+             channel=None, SNR_dB=None, results_path='data_receiver.harq', ready=None,
+             metrics_port=None, snapshot_path=None):
+    """
+    Receive one sender connection on host_ip:host_port and stream the delivered
+    packets to results_path. If given, metrics are served in Prometheus text
+    format at http://127.0.0.1:metrics_port/metrics and/or written to
+    snapshot_path as JSON every few seconds.
+
+    Bytes are received into the FrameReader's preallocated buffer and every
+    run of frames is decoded in place with HarqReceiver.on_batch(), whose
+    feedback goes back in one send. The growth of Python heap blocks per frame
+    is logged at the end (it should stay near zero however long the run).
+    """
+    receiver_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    receiver_socket.bind((host_ip, host_port))
+    receiver_socket.listen(1)
+    if ready is not None:
+        ready.set()  # e.g. a threading.Event the sender waits on before connecting
+
+    stop_exporters = start_exporters(metrics_port, snapshot_path)
+    logger.info("Listening on %s:%d...", host_ip, host_port)
+    conn, addr = receiver_socket.accept()
+    logger.info("Connected by %s", addr)
+
+    # Delivered packets are streamed to disk as they arrive, so nothing is kept in memory
+    writer = ResultWriter(results_path, 64, append=False)
+    harq = HarqReceiver(loss_packet, error, window=window, channel=channel, SNR_dB=SNR_dB,
+                        writer=writer, keep_packets=False)
+    reader = FrameReader()
+    start_blocks = sys.getallocatedblocks()
+
+    try:
+        while True:
+            if not reader.recv_from(conn):
+                break
+
+            for frames in reader.batches():
+                logger.debug("Received %d frames", len(frames))
+                feedback = harq.on_batch(frames)
+                if feedback:
+                    conn.sendall(feedback)
 
-        total_packets += 1
+        harq.flush()
+    finally:
+        writer.close()
+        stop_exporters()
 
-    print("------------@@[Receiver] Closing connection@@------------")
-    print(f"[Receiver] Total packets received: {total_packets}")
-    print(f"[Receiver] Lost packets: {lost_packets}")
-    print(f"[Receiver] Data packets list: {len(received_packets)}")
-    np.save('data_receiver.npy', received_packets)
+    logger.info("Closing connection. Total packets received: %d, lost: %d, retransmissions: %d, "
+                "delivered: %d (saved to %s)", harq.total_packets, harq.lost_packets,
+                harq.retransmissions, harq.delivered, results_path)
+    heap_growth = sys.getallocatedblocks() - start_blocks
+    logger.info("Heap blocks: %+d over the connection (%+.3f per frame)",
+                heap_growth, heap_growth / max(harq.total_packets, 1))
 
     receiver_socket.close()
 
@@ -155,4 +428,5 @@ def receiver(host_ip, host_port, loss_packet=loss_packet, error=error):
 if __name__ == "__main__":
     host_ip = "127.0.0.1"
     host_port = 5055
-    receiver(host_ip, host_port, loss_packet, error)
+    logging.basicConfig(level=os.environ.get("HARQ_LOG_LEVEL", "INFO"), format="[Receiver] %(message)s")
+    receiver(host_ip, host_port, loss_packet, error, metrics_port=METRICS_PORT)
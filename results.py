@@ -0,0 +1,146 @@
+import os
+import struct
+import time
+import numpy as np
+
+# Result file layout: a 64-byte header followed by fixed-size records, so a file
+# can be memory-mapped as one structured array and appended to in place. A
+# record that was only partly written (e.g. the receiver crashed) is ignored
+# by the reader.
+MAGIC = b'HARQRES1'
+FILE_VERSION = 1
+FILE_HEADER = struct.Struct('<8sHI50x')  # magic, version, payload bits
+CHUNK_SIZE = 4096  # Records buffered before each write
+
+
+def record_dtype(payload_bits):
+    return np.dtype([
+        ('seq', '<u8'),
+        ('attempts', 'u1'),
+        ('crc_ok', 'u1'),
+        ('timestamp', '<f8'),
+        ('payload', 'u1', ((payload_bits + 7) // 8,)),
+    ])
+
+
+class ResultWriter:
+    """
+    Append-only writer of bit-packed packets plus metadata.
+
+    Records are collected in a preallocated chunk and written out every
+    chunk_size records (and on flush()/close()), so memory stays constant and
+    at most one chunk is lost if the process dies. With append=True an
+    existing file is continued, otherwise it is overwritten.
+    """
+
+    def __init__(self, path, payload_bits, chunk_size=CHUNK_SIZE, fsync=False, append=True):
+        self.path = path
+        self.payload_bits = payload_bits
+        self.dtype = record_dtype(payload_bits)
+        self.fsync = fsync
+        self._chunk = np.zeros(chunk_size, dtype=self.dtype)
+        self._count = 0
+
+        exists = append and os.path.exists(path) and os.path.getsize(path) >= FILE_HEADER.size
+        if exists:
+            _check_header(path, payload_bits)
+        self._file = open(path, 'ab')
+        if exists:
+            # Drop a partial record left by an interrupted writer
+            data_size = os.path.getsize(path) - FILE_HEADER.size
+            self._file.truncate(FILE_HEADER.size + data_size - data_size % self.dtype.itemsize)
+        else:
+            self._file.truncate(0)
+            self._file.write(FILE_HEADER.pack(MAGIC, FILE_VERSION, payload_bits))
+
+    def append(self, seq, bits, attempts=1, crc_ok=True, timestamp=None):
+        record = self._chunk[self._count]
+        record['seq'] = seq
+        record['attempts'] = min(attempts, 255)
+        record['crc_ok'] = crc_ok
+        record['timestamp'] = time.time() if timestamp is None else timestamp
+        record['payload'] = np.packbits(np.asarray(bits, dtype=np.uint8)[:self.payload_bits])
+        self._count += 1
+        if self._count == len(self._chunk):
+            self.flush()
+
+    def append_batch(self, seqs, bits, attempts=1, crc_ok=True, timestamps=None):
+        """Append an (N, payload_bits) bit matrix with per-row (or scalar) metadata."""
+        bits = np.asarray(bits, dtype=np.uint8)
+        records = np.zeros(len(bits), dtype=self.dtype)
+        records['seq'] = seqs
+        records['attempts'] = np.minimum(attempts, 255)
+        records['crc_ok'] = crc_ok
+        records['timestamp'] = time.time() if timestamps is None else timestamps
+        records['payload'] = np.packbits(bits[:, :self.payload_bits], axis=1)
+        self.flush()
+        self._file.write(records.tobytes())
+        self._sync()
+
+    def flush(self):
+        if self._count:
+            self._file.write(self._chunk[:self._count].tobytes())
+            self._count = 0
+            self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _check_header(path, payload_bits=None):
+    with open(path, 'rb') as f:
+        magic, version, bits = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+    if magic != MAGIC or version != FILE_VERSION:
+        raise ValueError(f"{path} is not a version {FILE_VERSION} HARQ result file")
+    if payload_bits is not None and bits != payload_bits:
+        raise ValueError(f"{path} holds {bits}-bit packets, not {payload_bits}-bit")
+    return bits
+
+
+class ResultFile:
+    """
+    Memory-mapped view of a result file.
+
+    records is a read-only structured np.memmap with fields seq, attempts,
+    crc_ok, timestamp and payload (packed bits); nothing is read until used.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.payload_bits = _check_header(path)
+        self.dtype = record_dtype(self.payload_bits)
+        num_records = (os.path.getsize(path) - FILE_HEADER.size) // self.dtype.itemsize
+        if num_records:
+            self.records = np.memmap(path, dtype=self.dtype, mode='r',
+                                     offset=FILE_HEADER.size, shape=(num_records,))
+        else:
+            self.records = np.zeros(0, dtype=self.dtype)
+
+    def __len__(self):
+        return len(self.records)
+
+    def bits(self, start=0, stop=None):
+        """Unpacked (N, payload_bits) payload bits of records[start:stop]."""
+        payload = self.records['payload'][start:stop]
+        return np.unpackbits(payload, axis=1, count=self.payload_bits)
+
+    def iter_chunks(self, chunk_size=1 << 20):
+        """Yield consecutive record slices of at most chunk_size records."""
+        for start in range(0, len(self.records), chunk_size):
+            yield self.records[start:start + chunk_size]
+
+
+def open_results(path):
+    return ResultFile(path)
@@ -1,61 +1,30 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import threading
-import queue
-from scipy.special import erfc
+
+from codes import get_code
+from crc import append_crc, validate_crc
+from event_sim import EventQueue
+from interleaver import get_interleaver
 
 # Tham số mô phỏng
 num_bits = 8  # Số lượng bit dữ liệu gốc trong mỗi gói tin
 polynomial = '1101'  # Đa thức CRC
-timeout = 2  # Thời gian chờ ACK (Acknowledgment)
+timeout = 2  # Thời gian chờ ACK (Acknowledgment), in simulated seconds
 max_retransmissions = 5  # Số lần truyền lại tối đa
-
-ack_received = threading.Event()
-simulation_done = threading.Event()  # Sự kiện cho biết mô phỏng đã hoàn tất
+propagation_delay = 0.01  # One-way link delay (simulated seconds)
+processing_delay = 0.001  # Receiver decode time (simulated seconds)
 BER_results = []
 
-# Hàng đợi để truyền dữ liệu giữa sender và receiver
-network_queue = queue.Queue()
-
-# --- CRC ---
-def crc_remainder(input_bitstring, polynomial_bitstring):
-    polynomial_bitstring = polynomial_bitstring.lstrip('0')
-    len_input = len(input_bitstring)
-    input_padded_array = list(input_bitstring + '0' * (len(polynomial_bitstring) - 1))
-    while '1' in input_padded_array[:len_input]:
-        cur_shift = input_padded_array.index('1')
-        for i in range(len(polynomial_bitstring)):
-            input_padded_array[cur_shift + i] = str(int(polynomial_bitstring[i] != input_padded_array[cur_shift + i]))
-    remainder = ''.join(input_padded_array)[len_input:]
-    return remainder
-
-def append_crc(data, polynomial=polynomial):
-    data_bitstring = ''.join(map(str, data))
-    crc = crc_remainder(data_bitstring, polynomial)
-    data_with_crc = data_bitstring + crc
-    return np.array([int(x) for x in data_with_crc])
-
-def validate_crc(data_with_crc, polynomial=polynomial):
-    data_with_crc_bitstring = ''.join(map(str, data_with_crc))
-    remainder = crc_remainder(data_with_crc_bitstring, polynomial)
-    return int(remainder) == 0
-
 # --- Mã Hamming ---
+# Hamming(7,4) from the code registry: positional layout p1 p2 d1 p3 d2 d3 d4,
+# syndrome = 1-based error position (row 0 of H is its most significant bit).
+hamming_7_4 = get_code("Hamming(7,4)")
+
 def hamming_encode(data_with_crc):
     if len(data_with_crc) != 7:
         raise ValueError("Dữ liệu đầu vào phải có 7 bit (4 bit dữ liệu và 3 bit CRC).")
-    # Hamming (7,4) Generator Matrix (G)
-    G = np.array([[1, 1, 0, 1],
-                  [1, 0, 1, 1],
-                  [1, 0, 0, 0],
-                  [0, 1, 1, 1],
-                  [0, 1, 0, 0],
-                  [0, 0, 1, 0],
-                  [0, 0, 0, 1]])
-
     data_bits = data_with_crc[:4]  # 4 data bits
     crc_bits = data_with_crc[4:]   # 3 CRC bits
-    encoded_data = np.dot(G, data_bits) % 2
+    encoded_data = hamming_7_4.encode(data_bits)
     encoded_data = np.concatenate((encoded_data, crc_bits))  # Append CRC bits to encoded data
     return encoded_data
 
@@ -66,131 +35,133 @@ def hamming_decode(encoded_data_with_crc):
 
     if len(encoded_data) != 7:
         raise ValueError("Dữ liệu đầu vào phải có 7 bit")
-    
-    # Hamming(7,4) Check Matrix (H)
-    H = np.array([[1, 0, 1, 0, 1, 0, 1],
-                  [0, 1, 1, 0, 0, 1, 1],
-                  [0, 0, 0, 1, 1, 1, 1]])
-
-    # Calculate the syndrome (error detection)
-    syndrome = np.dot(H, encoded_data) % 2
-    error_position = int(''.join(map(str, syndrome)), 2)  # Convert syndrome to error position
-
-    # If there is an error (syndrome != 0), correct it
-    if error_position != 0:
-        encoded_data[error_position - 1] ^= 1  # Flip the bit at the error position (1-based index)
-
-    # Extract the 4 data bits after correction
-    data_bits = np.array([encoded_data[2], encoded_data[4], encoded_data[5], encoded_data[6]])
+
+    # Syndrome lookup corrects any single-bit error
+    data_bits = hamming_7_4.decode(encoded_data).data
     dencoded_data = np.concatenate ([data_bits, crc_bits])
 
     return dencoded_data
 
 # --- Chuyển đổi chéo ---
+# A group of codewords is written row by row (one codeword per row) and read
+# column by column; the receiver must deinterleave with the same number of
+# codewords the sender grouped together.
 def interleave(codewords):
-    interleaved = []
-    for i in range(len(codewords[0])):
-        interleaved.append([cw[i] for cw in codewords])
-    return np.array(interleaved).flatten()
+    codewords = np.atleast_2d(codewords)
+    num_codewords, length = codewords.shape
+    return get_interleaver("block", num_codewords * length, rows=num_codewords).interleave(codewords.ravel())
 
-def deinterleave(codewords, original_length):
-    deinterleaved = []
-    for i in range(original_length):
-        deinterleaved.append(codewords[i::original_length])
-    return np.array(deinterleaved).flatten()
+def deinterleave(codewords, num_codewords=1):
+    codewords = np.asarray(codewords)
+    return get_interleaver("block", codewords.size, rows=num_codewords).deinterleave(codewords)
 
 # --- Kênh truyền ---
-def channel(tx_signal, SNR):
-    noise = np.random.normal(0, np.sqrt(1/(2 * SNR)), tx_signal.shape)
+# Any model from channels.py (AwgnChannel, BscChannel, FadingChannel, ...) can be
+# passed in place of this function as `channel_model`.
+def channel(tx_signal, SNR, rng=None, soft=False):
+    rng = np.random if rng is None else rng
+    noise = rng.normal(0, np.sqrt(1/(2 * SNR)), tx_signal.shape)
     rx_signal = tx_signal + noise
+    if soft:
+        # LLR log(p(y|0) / p(y|1)) for levels 0/1 and noise variance 1/(2 SNR)
+        return (1 - 2 * rx_signal) * SNR
     return np.where(rx_signal > 0.5, 1, 0)
 
 # --- Hoạt động HARQ ---
-def sender(data_packets):
-    for sequence_number, packet in enumerate(data_packets):
-        retransmission_count = 0
-        while retransmission_count <= max_retransmissions:
-            data_bits = packet[:4]  # Lấy 4 bit dữ liệu
-            packet_with_crc = append_crc(data_bits)  # Thêm CRC vào gói tin
-            encoded_packet = hamming_encode(packet_with_crc)  # Mã hóa gói tin với CRC
-            interleaved_packet = interleave([encoded_packet])  # Xen kẽ gói tin
-            
-            # Đưa gói tin vào hàng đợi để gửi
-            network_queue.put((sequence_number, interleaved_packet))
-            print(f"@ Sender: Gửi gói tin {sequence_number} ---- lần thứ {retransmission_count + 1}")
-            
-            ack_received.clear()  # Xóa trạng thái ACK cũ
-            ack_received.wait(timeout=timeout)  # Chờ ACK trong khoảng thời gian timeout
-
-            if ack_received.is_set():  # Nếu nhận được ACK
-                break
-            else:
-                retransmission_count += 1
-                print(f"Sender: Không nhận được ACK cho gói tin {sequence_number}. Gửi lại gói tin.")
-                
-            if retransmission_count == max_retransmissions:
-                print(f"----Sender: Gửi lại gói tin {sequence_number} quá số lần cho phép.----") 
-                break
-    simulation_done.set()  # Đánh dấu mô phỏng đã hoàn tất
-
-
-
-# --- Kết hợp gói tin (Chase Combining) ---
-# def chase_combine(previous_signals, current_signal):
-#     """
-#     Kết hợp các gói tin bằng cách tính giá trị trung bình của các bit từ các lần truyền trước và lần truyền hiện tại.
-#     """
-#     combined_signal = np.zeros_like(current_signal)
-#     for i in range(len(current_signal)):
-#         # Tính trung bình có trọng số của các bit nhận được từ các lần truyền trước
-#         combined_signal[i] = np.mean([previous_signals[j][i] for j in range(len(previous_signals))] + [current_signal[i]])
-#     return np.where(combined_signal > 0.5, 1, 0)
+# The sender and receiver run as callbacks on an event_sim.EventQueue: packets
+# and ACKs arrive after propagation_delay of simulated time and the ACK timer
+# is a scheduled event that is cancelled when the ACK arrives, so nothing
+# sleeps or spins and a lost ACK costs no real time.
+def send_packet(link):
+    sequence_number = link["seq"]
+    packet = link["packets"][sequence_number]
+    data_bits = packet[:4]  # Lấy 4 bit dữ liệu
+    packet_with_crc = append_crc(data_bits, polynomial)  # Thêm CRC vào gói tin
+    encoded_packet = hamming_encode(packet_with_crc)  # Mã hóa gói tin với CRC
+    interleaved_packet = interleave([encoded_packet])  # Xen kẽ gói tin
+
+    events = link["events"]
+    print(f"@ Sender: Gửi gói tin {sequence_number} ---- lần thứ {link['retransmission_count'] + 1}")
+    events.schedule(propagation_delay, receiver_with_combining, link, sequence_number, interleaved_packet)
+    link["timer"] = events.schedule(timeout, on_ack_timeout, link, sequence_number)  # Chờ ACK
+
+
+def next_packet(link):
+    link["seq"] += 1
+    link["retransmission_count"] = 0
+    if link["seq"] < len(link["packets"]):
+        link["start"] = link["events"].now
+        send_packet(link)
+
+
+def on_ack(link, sequence_number):
+    if sequence_number != link["seq"]:
+        return  # ACK of an earlier attempt that already timed out
+    link["timer"].cancel()
+    link["latency"].append(link["events"].now - link["start"])
+    next_packet(link)
+
+
+def on_ack_timeout(link, sequence_number):
+    link["retransmission_count"] += 1
+    print(f"Sender: Không nhận được ACK cho gói tin {sequence_number}. Gửi lại gói tin.")
+    if link["retransmission_count"] == max_retransmissions:
+        print(f"----Sender: Gửi lại gói tin {sequence_number} quá số lần cho phép.----")
+        link["failed"] += 1
+        next_packet(link)
+    else:
+        send_packet(link)
 
 
 # --- Receiver with Chase Combining ---
-def receiver_with_combining(data_packets, SNR):
-    retransmissions = {}
-    combined_signal = None  # Initialize the combined signal variable
-
-    while True:
-        if not network_queue.empty():
-            sequence_number, encoded_packet = network_queue.get()
-            print(f"Receiver: Nhận gói tin {sequence_number}")
-
-            # Perform channel decoding
-            received_signal = channel(encoded_packet, SNR)
-            deinterleaved_packet = deinterleave(received_signal, len(data_packets))
-
-            # Perform Chase Combining: Combine current and previous received signals
-            if combined_signal is None:
-                combined_signal = deinterleaved_packet
-            else:
-                combined_signal = np.maximum(combined_signal, deinterleaved_packet)
-
-            # Decoding after combining
-            decoded_packet = hamming_decode(combined_signal)
-            if validate_crc(decoded_packet):
-                print(f"$$$ Receiver: Gửi ACK về Sender của gói tin {sequence_number} $$$")
-                ack_received.set()
-                combined_signal = None  # Reset after successful decoding
-            else:
-                print(f"Receiver: Gửi NACK về Sender của gói tin {sequence_number}")
-                if sequence_number not in retransmissions:
-                    retransmissions[sequence_number] = 0
-                retransmissions[sequence_number] += 1
-
-        if simulation_done.is_set():
-            break
-
-# --- Mô phỏng HARQ với Hamming, CRC và Chase Combining ---
-def simulate_harq_hamming_crc_chase_combining(SNR):
-    data_to_send = [np.random.randint(0, 2, num_bits) for _ in range(10)]
-    sender_thread = threading.Thread(target=sender, args=(data_to_send,))
-    receiver_thread = threading.Thread(target=receiver_with_combining, args=(data_to_send,SNR))
+def receiver_with_combining(link, sequence_number, encoded_packet):
+    print(f"Receiver: Nhận gói tin {sequence_number}")
+
+    # Perform channel decoding: LLRs (llr < 0 decides 1) of the received codeword
+    received_llr = link["channel_model"](encoded_packet, link["SNR"], soft=True)
+    deinterleaved_llr = deinterleave(received_llr, 1)  # one codeword per transmission
+
+    # Perform Chase Combining: add the LLRs of this attempt to those of the earlier attempts of this packet
+    combined_llr = link["combined"].pop(sequence_number, None)
+    if combined_llr is None:
+        combined_llr = deinterleaved_llr
+    else:
+        combined_llr = combined_llr + deinterleaved_llr
+
+    # Decoding after combining: hard decisions on the combined LLRs
+    decoded_packet = hamming_decode((combined_llr < 0).astype(np.uint8))
+    if validate_crc(decoded_packet, polynomial):
+        print(f"$$$ Receiver: Gửi ACK về Sender của gói tin {sequence_number} $$$")
+        link["events"].schedule(processing_delay + propagation_delay, on_ack, link, sequence_number)
+    else:
+        print(f"Receiver: Gửi NACK về Sender của gói tin {sequence_number}")
+        link["combined"] = {sequence_number: combined_llr}
+        link["retransmissions"][sequence_number] = link["retransmissions"].get(sequence_number, 0) + 1
 
-    receiver_thread.start()
-    sender_thread.start()
 
-    sender_thread.join()
-    receiver_thread.join()
-simulate_harq_hamming_crc_chase_combining(1)
+# --- Mô phỏng HARQ với Hamming, CRC và Chase Combining ---
+def simulate_harq_hamming_crc_chase_combining(SNR, channel_model=channel, num_packets=10):
+    """Run the stop-and-wait link in simulated time. Returns the link state with latencies and counters."""
+    events = EventQueue()
+    link = {
+        "events": events,
+        "packets": [np.random.randint(0, 2, num_bits) for _ in range(num_packets)],
+        "SNR": SNR,
+        "channel_model": channel_model,
+        "seq": -1,
+        "retransmission_count": 0,
+        "timer": None,
+        "start": 0.0,
+        "combined": {},
+        "retransmissions": {},
+        "latency": [],
+        "failed": 0,
+    }
+    next_packet(link)
+    events.run()
+    print(f"Simulated time: {events.now:.3f} s, packets acknowledged: {len(link['latency'])}, "
+          f"dropped: {link['failed']}, mean latency: {np.mean(link['latency'] or [np.nan]):.3f} s")
+    return link
+
+if __name__ == "__main__":
+    simulate_harq_hamming_crc_chase_combining(1)
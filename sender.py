@@ -1,30 +1,25 @@
+import logging
+import os
 import socket
 import numpy as np
 import time
+from collections import deque
+
+from adaptation import DEFAULT_MCS, get_mcs
+from crc import append_crc
+from frame import FLAG_ACK, FrameReader, encode_frame
+from hamming import hamming_71_64
+from metrics import SenderMetrics, start_exporters
+from results import ResultWriter
 
 # Max transmission attempts
 MAX_TRANSMISSION = 4
 timeout = 1
+NUM_PROCESSES = 8  # Parallel stop-and-wait HARQ processes
 polynomial = "1101"
+METRICS_PORT = 9106  # Prometheus text endpoint of `python sender.py`
 
-# CRC calculation
-def crc_remainder(input_bitstring, polynomial_bitstring):
-    polynomial_bitstring = polynomial_bitstring.lstrip('0')
-    len_input = len(input_bitstring)
-    input_padded_array = list(input_bitstring + '0' * (len(polynomial_bitstring) - 1))
-    while '1' in input_padded_array[:len_input]:
-        cur_shift = input_padded_array.index('1')
-        for i in range(len(polynomial_bitstring)):
-            input_padded_array[cur_shift + i] = str(int(polynomial_bitstring[i] != input_padded_array[cur_shift + i]))
-    remainder = ''.join(input_padded_array)[len_input:]
-    return remainder
-
-def append_crc(data, polynomial=polynomial):
-    data_bitstring = ''.join(map(str, data))
-    crc = crc_remainder(data_bitstring, polynomial)
-    data_with_crc = data_bitstring + crc
-    return np.array([int(x) for x in data_with_crc])
-
+logger = logging.getLogger(__name__)
 
 # Hamming encode/decoder
 def hamming_encode(data_with_crc):
@@ -34,74 +29,208 @@ def hamming_encode(data_with_crc):
     if len(data_bits) != 64:
         raise ValueError("Dữ liệu đầu vào phải có 64 bit")
 
-    # Tạo mảng 64 bit, chèn dữ liệu vào các vị trí không phải 2^i
-    encoded_bits = np.zeros(71, dtype=int)
-    data_index = 0
-    for i in range(71):
-        if (i + 1) & i != 0:  # Loại bỏ các vị trí 2^i (1, 2, 4, 8, 16, 32, 64)
-            encoded_bits[i] = data_bits[data_index]
-            data_index += 1
-
-    # Tính các bit kiểm tra
-    for i in range(7):  # Có 7 bit kiểm tra tại các vị trí 2^i
-        parity_pos = 2**i - 1
-        parity_value = 0
-        for j in range(71):
-            if (j + 1) & (parity_pos + 1) != 0:
-                parity_value ^= encoded_bits[j]
-        encoded_bits[parity_pos] = parity_value
-
+    encoded_bits = hamming_71_64.encode(data_bits).astype(int)
     encoded_data = np.concatenate((encoded_bits, crc_bits))  # Append CRC bits to encoded data
     return encoded_data
 
 
-def sender(packets, server_ip, server_port, timeout=timeout):
+def encode_packet(packet):
+    data_with_crc = append_crc(packet, polynomial)  # Add CRC
+    return hamming_encode(data_with_crc)  # Hamming encode
+
+
+class HarqSender:
+    """
+    Sender side of N parallel stop-and-wait HARQ processes.
+
+    Every process owns one packet at a time together with its transmit buffer
+    (the encoded codeword), its attempt counter and its ACK timer. Feedback is
+    matched by (process, sequence number), so ACK/NACKs may arrive in any order.
+    New packets are only started while their sequence number is within `window`
+    of the oldest unfinished packet, which bounds the receiver's reorder buffer.
+
+    With a link adaptation `policy` (see adaptation.py), every new packet is
+    encoded at the MCS level the policy selects, which is sent in the frame
+    header, and retransmitted at most min(max_transmission, that level's
+    max_transmission) times; ACK/NACKs and the corrected-bit counts the receiver
+    reports are fed back to the policy as link 0. Without one, every packet uses
+    `encode` (the fixed scheme, DEFAULT_MCS).
+
+    The class holds no socket and takes the current time as an argument, so the
+    same state machine can be driven by a blocking socket loop or anything else.
+    Counters, RTT and attempt histograms go to `metrics` (a metrics.SenderMetrics,
+    by default on the shared metrics.REGISTRY).
+    """
+
+    def __init__(self, packets, num_processes=NUM_PROCESSES, window=None,
+                 max_transmission=MAX_TRANSMISSION, timeout=timeout, encode=encode_packet, metrics=None,
+                 policy=None):
+        if num_processes < 1 or num_processes > 256:
+            raise ValueError("num_processes must be between 1 and 256")
+        self.packets = packets
+        self.window = window or num_processes
+        self.max_transmission = max_transmission
+        self.timeout = timeout
+        self.encode = encode
+        self.metrics = metrics or SenderMetrics()
+        self.policy = policy
+
+        self.free_processes = deque(range(num_processes))
+        self.processes = {}  # process id -> {"seq", "codeword", "mcs", "max_transmission", "attempts", "deadline", "sent"}
+        self.next_seq = 0
+        self.base_seq = 0  # oldest packet not yet finished
+        self.finished_seqs = set()
+
+        self.acked = 0
+        self.failed = 0
+        self.transmissions = 0
+        self.timeouts = 0
+
+    @property
+    def finished(self):
+        return self.base_seq >= len(self.packets)
+
+    def next_deadline(self):
+        """Earliest ACK deadline among the busy processes, or None if all are idle."""
+        if not self.processes:
+            return None
+        return min(state["deadline"] for state in self.processes.values())
+
+    def _transmit(self, process, now):
+        state = self.processes[process]
+        state["attempts"] += 1
+        state["deadline"] = now + self.timeout
+        state["sent"] = now
+        self.transmissions += 1
+        self.metrics.transmissions.inc()
+        logger.debug("Sending packet %d on process %d (attempt %d)...", state["seq"], process, state["attempts"])
+        return encode_frame(state["seq"], state["codeword"], process=process, rv=(state["attempts"] - 1) % 4,
+                            mcs=state["mcs"])
+
+    def _finish(self, process, ack):
+        state = self.processes.pop(process)
+        self.free_processes.append(process)
+        self.metrics.attempts.observe(state["attempts"])
+        if ack:
+            self.acked += 1
+        else:
+            self.failed += 1
+            self.metrics.dropped.inc()
+            logger.debug("Max transmission attempts reached for packet %d. Skipping it.", state["seq"])
+        self.finished_seqs.add(state["seq"])
+        while self.base_seq in self.finished_seqs:
+            self.finished_seqs.remove(self.base_seq)
+            self.base_seq += 1
+
+    def _retransmit_or_drop(self, process, now):
+        state = self.processes[process]
+        if state["attempts"] >= state["max_transmission"]:
+            self._finish(process, ack=False)
+            return []
+        return [self._transmit(process, now)]
+
+    def poll(self, now):
+        """Handle expired timers and start new packets. Returns the frames to send."""
+        frames = []
+        for process in [p for p, state in self.processes.items() if state["deadline"] <= now]:
+            self.timeouts += 1
+            self.metrics.timeouts.inc()
+            logger.debug("Timeout on process %d (packet %d).", process, self.processes[process]["seq"])
+            frames += self._retransmit_or_drop(process, now)
+
+        while (self.free_processes and self.next_seq < len(self.packets)
+               and self.next_seq < self.base_seq + self.window):
+            process = self.free_processes.popleft()
+            packet = self.packets[self.next_seq]
+            if self.policy is None:
+                mcs, codeword, max_transmission = DEFAULT_MCS, self.encode(packet), self.max_transmission
+            else:
+                mcs = int(self.policy.select(0))
+                level = get_mcs(mcs, self.policy.table)
+                codeword = level.encode(packet)
+                max_transmission = min(self.max_transmission, level.max_transmission)
+                self.metrics.mcs.set(mcs)
+            self.processes[process] = {
+                "seq": self.next_seq,
+                "codeword": codeword,
+                "mcs": mcs,
+                "max_transmission": max_transmission,
+                "attempts": 0,
+                "deadline": now,
+            }
+            self.next_seq += 1
+            frames.append(self._transmit(process, now))
+        self.metrics.in_flight.set(len(self.processes))
+        return frames
+
+    def on_feedback(self, header, now):
+        """Process an ACK/NACK frame. Returns the frames to send in response."""
+        state = self.processes.get(header.process)
+        if state is None or state["seq"] != header.seq:
+            return []  # late feedback for a packet that is already finished
+        self.metrics.rtt_seconds.observe(now - state["sent"])
+        if self.policy is not None:
+            self.policy.update(0, state["mcs"], bool(header.flags & FLAG_ACK), state["attempts"], header.corrections)
+        if header.flags & FLAG_ACK:
+            self.metrics.acks.inc()
+            logger.debug("ACK received for packet %d on process %d.", header.seq, header.process)
+            self._finish(header.process, ack=True)
+            return self.poll(now)
+        self.metrics.nacks.inc()
+        logger.debug("NACK received for packet %d on process %d. Resending...", header.seq, header.process)
+        return self._retransmit_or_drop(header.process, now) + self.poll(now)
+
+
+def sender(packets, server_ip, server_port, timeout=timeout, num_processes=NUM_PROCESSES, window=None,
+           metrics_port=None, snapshot_path=None, policy=None):
+    """
+    Send packets to a receiver() over TCP, with link adaptation if a policy is
+    given (see HarqSender). If given, metrics are served in Prometheus text
+    format at http://127.0.0.1:metrics_port/metrics and/or written to
+    snapshot_path as JSON every few seconds.
+    """
+    stop_exporters = start_exporters(metrics_port, snapshot_path)
     sender_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    sender_socket.connect((server_ip, server_port))
-    
-    # Set timeout for socket operations
-    sender_socket.settimeout(timeout)
-    
-    for packet in packets:
-        print(f"[Sender] Data to send: {packet}")
-        data_with_crc = append_crc(packet)  # Add CRC
-        print(f"[Sender] Data with CRC: {data_with_crc}")
-        encoded_data = hamming_encode(data_with_crc)  # Hamming encode
-        print(f"[Sender] Encoded data (Hamming): {encoded_data}")
-        
-        attempt = 0
-        while attempt < MAX_TRANSMISSION:
-            print(f"[Sender] Sending data (attempt {attempt + 1})...")
-            sender_socket.sendall(encoded_data.tobytes())
-            
+    try:
+        sender_socket.connect((server_ip, server_port))
+
+        harq = HarqSender(packets, num_processes=num_processes, window=window, timeout=timeout, policy=policy)
+        reader = FrameReader()
+
+        for frame in harq.poll(time.monotonic()):
+            sender_socket.sendall(frame)
+
+        while not harq.finished:
+            # Wait for feedback until the earliest ACK timer expires
+            deadline = harq.next_deadline()
+            sender_socket.settimeout(max(1e-3, deadline - time.monotonic()) if deadline is not None else None)
             try:
-                response = sender_socket.recv(1024).decode()
-                
-                if response == "ACK":
-                    print("[Sender] ACK received. Moving to next packet.")
+                if not reader.recv_from(sender_socket):
+                    logger.warning("Connection closed by receiver.")
                     break
-
-                elif response == "NACK":
-                    print("[Sender] NACK received. Resending data...")
-                    attempt += 1
-                else:
-                    print("[Sender] Unknown response. Resending data...")
-                    attempt += 1
+                frames = []
+                for header, _ in reader.frames():
+                    frames += harq.on_feedback(header, time.monotonic())
             except socket.timeout:
-                print(f"[Sender] Timeout occurred. No response received in {timeout} seconds. Retrying...")
-                attempt += 1
-
-            if attempt == MAX_TRANSMISSION:
-                print("[Sender] Max transmission attempts reached. Skipping to next packet.")
+                frames = []
+            frames += harq.poll(time.monotonic())
+            for frame in frames:
+                sender_socket.sendall(frame)
 
-    print("---[Sender] All packets sent. Closing connection.---")
-    sender_socket.close()
+        logger.info("Packets acknowledged: %d, dropped: %d, transmissions: %d, timeouts: %d",
+                    harq.acked, harq.failed, harq.transmissions, harq.timeouts)
+        logger.info("All packets sent. Closing connection.")
+    finally:
+        sender_socket.close()
+        stop_exporters()
 
 if __name__ == "__main__":
     server_ip = "127.0.0.1"
     server_port = 5055
     # Example packet generation
     data = [np.random.randint(0, 2, 64) for _ in range(56)]
-    np.save('data_original.npy', data)
-    sender(data, server_ip, server_port)
+    with ResultWriter('data_original.harq', 64, append=False) as writer:
+        writer.append_batch(np.arange(len(data)), np.array(data), attempts=0)
+    logging.basicConfig(level=os.environ.get("HARQ_LOG_LEVEL", "INFO"), format="[Sender] %(message)s")
+    sender(data, server_ip, server_port, metrics_port=METRICS_PORT)
     time.sleep(1)
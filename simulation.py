@@ -0,0 +1,210 @@
+import numpy as np
+from functools import lru_cache
+
+from combining import RV_SEQUENCE, RateMatcher, SoftBuffer, soft_decode
+from codes import get_code
+from crc import get_crc
+from hamming import HammingCodec
+from interleaver import get_interleaver
+from run import channel
+
+# Default simulation parameters (same chain as sender.py / receiver.py)
+NUM_BITS = 64
+MAX_TRANSMISSIONS = 4
+BATCH_SIZE = 100_000
+
+COUNT_KEYS = ("packets", "bits", "bit_errors", "first_block_errors", "residual_block_errors",
+              "crc_failures", "delivered", "transmissions", "delay", "channel_bits")
+
+
+@lru_cache(maxsize=None)
+def get_codec(num_bits):
+    return HammingCodec(num_bits)
+
+
+def empty_counts():
+    return dict.fromkeys(COUNT_KEYS, 0)
+
+
+def merge_counts(total, counts):
+    for key in COUNT_KEYS:
+        total[key] += counts[key]
+    return total
+
+
+def simulate_batch(SNR_dB, num_packets, num_bits=NUM_BITS, max_transmissions=MAX_TRANSMISSIONS,
+                   polynomial="CRC3", channel=channel, interleaver=None, rng=None,
+                   combining=None, num_tx_bits=None, buffer_dtype=np.float16, num_flips=0, code=None):
+    """
+    Push num_packets random packets through CRC -> Hamming -> interleaver -> channel
+    -> decode -> CRC check, retransmitting failed packets up to max_transmissions times.
+
+    Every HARQ round is one batch step over the packets still in flight; a packet
+    leaves the batch once its CRC passes. Any channels.py model can be passed
+    as channel (SNR_dB is then its Eb/N0). interleaver, if given, is an
+    interleaver.py kind ("block", "random", "subblock") or any object with
+    interleave()/deinterleave() methods working on (N, n) arrays. code selects
+    the block code: a codes.py registry name or LinearBlockCode with k ==
+    num_bits (default: the positional Hamming code for num_bits).
+
+    combining selects how rounds are decoded:
+        None: every round is hard-decoded on its own; channel(tx_bits, SNR, rng=rng)
+            must return hard bits.
+        "chase": LLRs of all rounds are summed in a SoftBuffer (buffer_dtype).
+        "ir": incremental redundancy; round i sends num_tx_bits bits of the
+            circular buffer at redundancy version RV_SEQUENCE[i % 4].
+    With combining, channel(tx_bits, SNR, rng=rng, soft=True) must return LLRs,
+    and packets are soft-decoded with up to num_flips test flips.
+
+    Returns:
+        dict of raw counts (see COUNT_KEYS), which can be merged with merge_counts().
+    """
+    if combining not in (None, "chase", "ir"):
+        raise ValueError(f"Unknown combining mode {combining!r}")
+    rng = np.random.default_rng(rng)
+    crc = get_crc(polynomial)
+    codec = get_codec(num_bits) if code is None else get_code(code) if isinstance(code, str) else code
+    if codec.k != num_bits:
+        raise ValueError(f"Code {codec!r} carries {codec.k} data bits, not num_bits={num_bits}")
+    SNR = 10 ** (SNR_dB / 10)
+
+    data = rng.integers(0, 2, (num_packets, num_bits), dtype=np.uint8)
+    tx = np.concatenate((codec.encode(data), crc.compute_batch(data)), axis=1)
+    n = tx.shape[1]
+    if isinstance(interleaver, str):
+        interleaver = get_interleaver(interleaver, n)
+    if interleaver is not None:
+        tx = interleaver.interleave(tx)
+
+    if combining is not None:
+        soft_buffer = SoftBuffer(num_packets, n, dtype=buffer_dtype)
+        rate_matcher = RateMatcher(n, num_tx_bits if combining == "ir" else None)
+
+    decoded = np.empty_like(data)
+    attempts = np.zeros(num_packets, dtype=np.int64)
+    passed = np.zeros(num_packets, dtype=bool)
+    active = np.arange(num_packets)
+    first_block_errors = 0
+    channel_bits = 0
+
+    for round_index in range(max_transmissions):
+        if combining is None:
+            rx = np.asarray(channel(tx[active], SNR, rng=rng), dtype=np.uint8)
+            channel_bits += rx.size
+            if interleaver is not None:
+                rx = interleaver.deinterleave(rx)
+            result = codec.decode(rx[:, :codec.n])
+            round_data = result.data
+            ok = result.valid & crc.check_batch(np.concatenate((result.data, rx[:, codec.n:]), axis=1))
+        else:
+            rv = RV_SEQUENCE[round_index % len(RV_SEQUENCE)] if combining == "ir" else 0
+            llr = channel(rate_matcher.select(tx[active], rv), SNR, rng=rng, soft=True)
+            channel_bits += llr.size
+            soft_buffer.combine(active, llr, rate_matcher.positions(rv))
+            combined = soft_buffer.llr(active)
+            if interleaver is not None:
+                combined = interleaver.deinterleave(combined)
+            round_data, ok = soft_decode(combined, codec, crc, num_flips)
+
+        decoded[active] = round_data
+        attempts[active] += 1
+        passed[active[ok]] = True
+        if round_index == 0:
+            first_block_errors = int(np.count_nonzero(~ok))
+        active = active[~ok]
+        if active.size == 0:
+            break
+
+    wrong = decoded != data
+    counts = empty_counts()
+    counts.update(
+        packets=num_packets,
+        bits=data.size,
+        bit_errors=int(np.count_nonzero(wrong)),
+        first_block_errors=first_block_errors,
+        residual_block_errors=int(np.count_nonzero(wrong.any(axis=1))),
+        crc_failures=int(num_packets - np.count_nonzero(passed)),
+        delivered=int(np.count_nonzero(passed)),
+        transmissions=int(attempts.sum()),
+        delay=int(attempts[passed].sum()),
+        channel_bits=channel_bits,
+    )
+    return counts
+
+
+def summarize(counts, num_bits=NUM_BITS):
+    """
+    Turn raw counts into rates.
+
+    ber / residual_bler: errors in the data handed over after the last round.
+    bler: block error rate of the first transmission.
+    throughput: CRC-passed data bits per transmitted channel bit.
+    mean_delay: mean number of transmissions of the packets that passed CRC.
+    """
+    packets = max(counts["packets"], 1)
+    return {
+        "ber": counts["bit_errors"] / max(counts["bits"], 1),
+        "bler": counts["first_block_errors"] / packets,
+        "residual_bler": counts["residual_block_errors"] / packets,
+        "throughput": counts["delivered"] * num_bits / max(counts["channel_bits"], 1),
+        "mean_delay": counts["delay"] / max(counts["delivered"], 1),
+    }
+
+
+def simulate_harq(SNR_dB, num_packets, batch_size=BATCH_SIZE, rng=None, **kwargs):
+    """Run simulate_batch in batches of batch_size packets and return the merged counts."""
+    rng = np.random.default_rng(rng)
+    total = empty_counts()
+    for start in range(0, num_packets, batch_size):
+        merge_counts(total, simulate_batch(SNR_dB, min(batch_size, num_packets - start), rng=rng, **kwargs))
+    return total
+
+
+def sweep(SNR_dB_values, num_packets, rng=None, **kwargs):
+    """Simulate every SNR point. Returns a list of summarize() dicts with an added "SNR_dB" key."""
+    rng = np.random.default_rng(rng)
+    num_bits = kwargs.get("num_bits", NUM_BITS)
+    results = []
+    for SNR_dB in SNR_dB_values:
+        result = summarize(simulate_harq(SNR_dB, num_packets, rng=rng, **kwargs), num_bits)
+        result["SNR_dB"] = SNR_dB
+        results.append(result)
+    return results
+
+
+def plot_throughput_delay_snr(results):
+    import matplotlib.pyplot as plt
+
+    SNR_dB_values = [r["SNR_dB"] for r in results]
+    plt.figure(figsize=(8, 9))
+    plt.subplot(3, 1, 1)
+    plt.semilogy(SNR_dB_values, [r["ber"] for r in results], marker='o', label='BER')
+    plt.semilogy(SNR_dB_values, [r["bler"] for r in results], marker='s', label='BLER (1st transmission)')
+    plt.semilogy(SNR_dB_values, [r["residual_bler"] for r in results], marker='^', label='Residual BLER')
+    plt.xlabel('SNR (dB)')
+    plt.ylabel('Error rate')
+    plt.grid(True)
+    plt.legend()
+
+    plt.subplot(3, 1, 2)
+    plt.plot(SNR_dB_values, [r["throughput"] for r in results], marker='o')
+    plt.xlabel('SNR (dB)')
+    plt.ylabel('Throughput')
+    plt.grid(True)
+
+    plt.subplot(3, 1, 3)
+    plt.plot(SNR_dB_values, [r["mean_delay"] for r in results], marker='o')
+    plt.xlabel('SNR (dB)')
+    plt.ylabel('Mean delay (transmissions)')
+    plt.grid(True)
+
+    plt.tight_layout()
+    plt.show()
+
+
+if __name__ == "__main__":
+    results = sweep(range(0, 16), 100_000, rng=1)
+    for r in results:
+        print(f"SNR {r['SNR_dB']:2d} dB: BER={r['ber']:.3e} BLER={r['bler']:.3e} "
+              f"residual={r['residual_bler']:.3e} throughput={r['throughput']:.3f} delay={r['mean_delay']:.2f}")
+    plot_throughput_delay_snr(results)
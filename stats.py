@@ -0,0 +1,12 @@
+import math
+
+
+def wilson_interval(errors, trials, z=1.96):
+    """Wilson score confidence interval (default 95%) for a proportion."""
+    if trials == 0:
+        return 0.0, 1.0
+    p = errors / trials
+    denominator = 1 + z * z / trials
+    center = (p + z * z / (2 * trials)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, center - half_width), min(1.0, center + half_width)
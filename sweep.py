@@ -0,0 +1,196 @@
+import math
+import os
+import numpy as np
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from analytic import analytic_sweep
+from simulation import NUM_BITS, empty_counts, merge_counts, simulate_harq, summarize
+from stats import wilson_interval
+
+CHUNK_SIZE = 20_000  # Packets per task
+ANALYTIC_STREAK = 2  # Agreeing simulated points after which higher SNR points are taken from the model
+ANALYTIC_MAX_RATE = 0.5  # Simulated rates above this are saturated and do not count as agreement
+
+# summarize() rate of each error_key, compared against analytic.harq_model()
+RATE_KEYS = {"first_block_errors": "bler", "residual_block_errors": "residual_bler", "bit_errors": "ber"}
+# simulate_harq() arguments that the analytic model depends on
+ANALYTIC_PARAMETERS = ("num_bits", "max_transmissions", "polynomial", "channel", "combining", "code")
+
+
+def chunk_rng(seed, point_index, chunk_index):
+    """Independent, reproducible RNG stream for one (SNR point, chunk) task."""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(point_index, chunk_index)))
+
+
+def _run_chunk(SNR_dB, seed, point_index, chunk_index, chunk_size, kwargs):
+    return simulate_harq(SNR_dB, chunk_size, rng=chunk_rng(seed, point_index, chunk_index), **kwargs)
+
+
+class _Point:
+    def __init__(self, index, SNR_dB):
+        self.index = index
+        self.SNR_dB = SNR_dB
+        self.counts = empty_counts()
+        self.next_chunk = 0  # next chunk to submit
+        self.merged = 0  # chunks merged so far, always a prefix 0..merged-1
+        self.pending = {}  # chunk index -> counts that arrived out of order
+        self.done = False
+        self.skipped = False  # taken from the analytic model instead
+
+
+def _should_stop(counts, error_key, target_errors, ci_width, min_packets, max_packets):
+    packets = counts["packets"]
+    if packets >= max_packets:
+        return True
+    if packets < min_packets:
+        return False
+    errors = counts[error_key]
+    if target_errors is not None and errors >= target_errors:
+        return True
+    if ci_width is not None and errors > 0:
+        low, high = wilson_interval(errors, packets)
+        return (high - low) <= ci_width * errors / packets
+    return False
+
+
+def parallel_sweep(SNR_dB_values, max_packets, seed=0, max_workers=None, chunk_size=CHUNK_SIZE,
+                   target_errors=None, ci_width=None, error_key="first_block_errors",
+                   min_packets=0, analytic_tolerance=None, analytic_streak=ANALYTIC_STREAK, **kwargs):
+    """
+    Simulate every SNR point on a process pool.
+
+    Work is split into (SNR point, chunk) tasks of chunk_size packets, each with
+    its own SeedSequence stream derived from (seed, point, chunk). Chunks of a
+    point are merged strictly in chunk order and the stopping rule is checked
+    after every merged chunk, so the result is bit-identical for any number of
+    workers (max_workers=0 runs everything in this process).
+
+    A point stops once max_packets are simulated (the last chunk is shortened
+    to max_packets - (num_chunks - 1) * chunk_size), or, after min_packets, when
+    counts[error_key] reaches target_errors or the 95% confidence interval of
+    that error rate is narrower than ci_width times the estimate.
+
+    With analytic_tolerance, every point is also predicted by
+    analytic.analytic_sweep() and points are judged in increasing SNR order:
+    once analytic_streak consecutive finished points have a simulated error_key
+    rate below ANALYTIC_MAX_RATE and within analytic_tolerance (relative) of
+    the prediction, the remaining higher SNR points, which are the expensive
+    ones, are not simulated and report the analytic values (with empty counts)
+    instead. In this mode the points are simulated one after another in SNR
+    order, each with all workers on its chunks, so a point is only started
+    once every decision below it is known and the result stays the same for
+    any number of workers.
+
+    Extra keyword arguments go to simulation.simulate_harq().
+
+    Returns:
+        list of summarize() dicts per point, with "SNR_dB", "counts", "ci"
+        (confidence interval of the error_key rate, None for a skipped point)
+        and "source" ("simulation" or "analytic") added, and with
+        analytic_tolerance the model's prediction as "analytic".
+    """
+    points = [_Point(index, SNR_dB) for index, SNR_dB in enumerate(SNR_dB_values)]
+    num_chunks = math.ceil(max_packets / chunk_size)
+    stop_args = (error_key, target_errors, ci_width, min_packets, max_packets)
+    num_bits = kwargs.get("num_bits", NUM_BITS)
+    by_snr = sorted(points, key=lambda p: p.SNR_dB)
+
+    analytic = None
+    if analytic_tolerance is not None:
+        if error_key not in RATE_KEYS:
+            raise ValueError(f"No analytic rate for error_key {error_key!r}")
+        analytic = analytic_sweep(SNR_dB_values, **{key: kwargs[key] for key in ANALYTIC_PARAMETERS if key in kwargs})
+
+    def agrees(point):
+        if point.counts[error_key] == 0:
+            return False
+        simulated = summarize(point.counts, num_bits)[RATE_KEYS[error_key]]
+        return (simulated <= ANALYTIC_MAX_RATE
+                and abs(analytic[point.index][RATE_KEYS[error_key]] - simulated) <= analytic_tolerance * simulated)
+
+    def skip_accurate_points():
+        streak = 0
+        for position, point in enumerate(by_snr):
+            if not point.done or point.skipped:
+                return
+            streak = streak + 1 if agrees(point) else 0
+            if streak >= analytic_streak:
+                for later in by_snr[position + 1:]:
+                    if not later.done:
+                        later.done = later.skipped = True
+                return
+
+    def chunk_length(chunk_index):
+        return min(chunk_size, max_packets - chunk_index * chunk_size)
+
+    def absorb(point, chunk_index, counts):
+        if point.done:
+            return
+        point.pending[chunk_index] = counts
+        while point.merged in point.pending:
+            merge_counts(point.counts, point.pending.pop(point.merged))
+            point.merged += 1
+            if _should_stop(point.counts, *stop_args):
+                point.done = True
+                point.pending.clear()
+                if analytic is not None:
+                    skip_accurate_points()
+                break
+
+    def next_task():
+        # Round-robin over the points that still need chunks; with the analytic
+        # model only the lowest unfinished point, whose chunks may run in parallel
+        candidates = sorted(points, key=lambda p: p.next_chunk)
+        if analytic is not None:
+            candidates = [point for point in by_snr if not point.done][:1]
+        for point in candidates:
+            if not point.done and point.next_chunk < num_chunks:
+                point.next_chunk += 1
+                return point, point.next_chunk - 1
+        return None
+
+    if max_workers == 0:
+        while (task := next_task()) is not None:
+            point, chunk_index = task
+            absorb(point, chunk_index,
+                   _run_chunk(point.SNR_dB, seed, point.index, chunk_index, chunk_length(chunk_index), kwargs))
+    else:
+        max_workers = max_workers or os.cpu_count()
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            in_flight = {}
+            while True:
+                while len(in_flight) < 2 * max_workers and (task := next_task()) is not None:
+                    point, chunk_index = task
+                    future = pool.submit(_run_chunk, point.SNR_dB, seed, point.index,
+                                         chunk_index, chunk_length(chunk_index), kwargs)
+                    in_flight[future] = task
+                if not in_flight:
+                    break
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    point, chunk_index = in_flight.pop(future)
+                    absorb(point, chunk_index, future.result())
+
+    results = []
+    for point in points:
+        if point.skipped:
+            result = {key: analytic[point.index][key] for key in summarize(point.counts, num_bits)}
+            result["ci"] = None
+        else:
+            result = summarize(point.counts, num_bits)
+            result["ci"] = wilson_interval(point.counts[error_key], point.counts["packets"])
+        result["SNR_dB"] = point.SNR_dB
+        result["counts"] = point.counts
+        result["source"] = "analytic" if point.skipped else "simulation"
+        if analytic is not None:
+            result["analytic"] = analytic[point.index]
+        results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    for r in parallel_sweep(range(0, 16), 2_000_000, seed=1, target_errors=200, ci_width=0.2,
+                            analytic_tolerance=0.2):
+        ci = f"CI=[{r['ci'][0]:.3e}, {r['ci'][1]:.3e}]" if r["ci"] else f"{'(analytic)':>27}"
+        print(f"SNR {r['SNR_dB']:2d} dB: packets={r['counts']['packets']:8d} BLER={r['bler']:.3e} "
+              f"{ci} model={r['analytic']['bler']:.3e} throughput={r['throughput']:.3f}")
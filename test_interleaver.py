@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from interleaver import INTERLEAVERS, BlockInterleaver, get_interleaver
+
+LENGTHS = (1, 7, 10, 32, 33, 74, 75, 1000)
+DTYPES = (np.uint8, np.int64, np.float16, np.float32, np.float64, bool)
+
+
+@pytest.mark.parametrize("n", LENGTHS)
+@pytest.mark.parametrize("kind", INTERLEAVERS)
+def test_round_trip_batch(kind, n):
+    interleaver = get_interleaver(kind, n)
+    x = np.random.default_rng(n).integers(0, 2, (100, n), dtype=np.uint8)
+    interleaved = interleaver.interleave(x)
+    assert interleaved.shape == x.shape
+    assert np.array_equal(interleaver.deinterleave(interleaved), x)
+    assert np.array_equal(interleaver.interleave(interleaver.deinterleave(x)), x)
+
+
+@pytest.mark.parametrize("kind", INTERLEAVERS)
+def test_is_permutation(kind):
+    interleaver = get_interleaver(kind, 74)
+    assert np.array_equal(np.sort(interleaver.interleave(np.arange(74))), np.arange(74))
+    assert not np.array_equal(interleaver.perm, np.arange(74))
+
+
+@pytest.mark.parametrize("dtype", DTYPES)
+@pytest.mark.parametrize("kind", INTERLEAVERS)
+def test_round_trip_preserves_dtype(kind, dtype):
+    interleaver = get_interleaver(kind, 74)
+    x = np.random.default_rng(1).normal(size=(16, 74)).astype(dtype)
+    interleaved = interleaver.interleave(x)
+    assert interleaved.dtype == x.dtype
+    assert np.array_equal(interleaver.deinterleave(interleaved), x)
+
+
+@pytest.mark.parametrize("shape", [(74,), (1, 74), (5, 74), (2, 3, 74)])
+@pytest.mark.parametrize("kind", INTERLEAVERS)
+def test_rows_match_single_codewords(kind, shape):
+    interleaver = get_interleaver(kind, 74)
+    x = np.random.default_rng(2).integers(0, 2, shape, dtype=np.uint8)
+    interleaved = interleaver.interleave(x)
+    assert interleaved.shape == shape
+    assert np.array_equal(interleaver.deinterleave(interleaved), x)
+    # A batch is interleaved row by row
+    for row, out in zip(x.reshape(-1, 74), interleaved.reshape(-1, 74)):
+        assert np.array_equal(interleaver.interleave(row), out)
+
+
+def test_block_interleaver_transposes_codewords():
+    codewords = np.random.default_rng(3).integers(0, 2, (4, 10))
+    assert np.array_equal(BlockInterleaver(40, rows=4).interleave(codewords.ravel()), codewords.T.ravel())
+
+
+def test_get_interleaver_caches():
+    assert get_interleaver("block", 74) is get_interleaver("block", 74)
+    assert get_interleaver("random", 74, seed=1) is not get_interleaver("random", 74, seed=2)
+
+
+def test_rejects_wrong_length():
+    with pytest.raises(ValueError):
+        get_interleaver("block", 74).interleave(np.zeros((3, 75)))
+
+
+def test_unknown_kind():
+    with pytest.raises(KeyError):
+        get_interleaver("spiral", 74)